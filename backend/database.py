@@ -1,10 +1,23 @@
 # backend/database.py
+import logging
 import os
+from urllib.parse import parse_qsl, urlencode
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+try:
+    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+except ImportError:  # SQLAlchemy < 1.4: no asyncio support, reads use the sync engine
+    create_async_engine = None
+    AsyncSession = None
+try:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+except ImportError:  # SQLAlchemy 1.4: a plain sessionmaker with class_=AsyncSession does the same
+    async_sessionmaker = sessionmaker
+
+logger = logging.getLogger(__name__)
 
 loaded = load_dotenv()
 if not loaded:
@@ -12,7 +25,7 @@ if not loaded:
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# FastApi uses asyncpg driver, but SQLAlchemy uses psycopg2
+# Ingestion and migrations use the sync psycopg2 engine; read endpoints use the async (asyncpg) one below
 
 db_url = DATABASE_URL
 if db_url and db_url.startswith("postgresql+asyncpg://"):
@@ -37,3 +50,63 @@ def get_db():
     finally:
         db.close()
 
+
+# ------------------------
+# Async read engine
+# ------------------------
+# Per-process pool: with N uvicorn workers the database sees up to
+# N * (DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW) read connections, plus the sync pool.
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "10"))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "10"))
+DB_ASYNC_POOL_TIMEOUT = float(os.getenv("DB_ASYNC_POOL_TIMEOUT", "5"))
+
+
+def _asyncpg_query(url: str) -> str:
+    """asyncpg takes ssl=<mode>; libpq's sslmode=<mode> (fine for psycopg2) is rejected."""
+    base, sep, query = url.partition("?")
+    if not sep:
+        return url
+    params = [("ssl" if k == "sslmode" else k, v) for k, v in parse_qsl(query, keep_blank_values=True)]
+    return f"{base}?{urlencode(params)}"
+
+
+def _async_url(url: str):
+    if url.startswith(("postgresql://", "postgresql+psycopg2://", "postgresql+asyncpg://")):
+        return _asyncpg_query("postgresql+asyncpg://" + url.split("://", 1)[1])
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return None
+
+
+def _create_async_engine():
+    url = _async_url(db_url)
+    if create_async_engine is None or url is None or os.getenv("DB_ASYNC_READS", "1") in ("0", "false", "False"):
+        return None
+    kwargs = {"pool_pre_ping": True}
+    if url.startswith("postgresql"):
+        kwargs.update(
+            pool_size=DB_ASYNC_POOL_SIZE,
+            max_overflow=DB_ASYNC_MAX_OVERFLOW,
+            pool_timeout=DB_ASYNC_POOL_TIMEOUT,
+            pool_recycle=1800,
+        )
+    try:
+        return create_async_engine(url, **kwargs)
+    except ImportError as e:  # asyncpg / aiosqlite not installed
+        logger.warning(f"Async DB reads disabled ({e}); read endpoints fall back to the sync engine.")
+        return None
+
+
+async_engine = _create_async_engine()
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False) if async_engine else None
+)
+
+
+# Async session for read endpoints, or None when only the sync engine is available
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        yield None
+        return
+    async with AsyncSessionLocal() as session:
+        yield session
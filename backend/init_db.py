@@ -1,8 +1,7 @@
 # backend/init_db.py
-from database import engine, Base
-from models import OptionData, StockData  
+from database import engine
+from migrations import upgrade
 from sqlalchemy.exc import OperationalError
-from sqlalchemy.sql import text
 import time
 
 
@@ -11,27 +10,17 @@ def initialize_database():
     retries = 5
     while retries > 0:
         try:
-            with engine.connect() as conn:
-                print("Connection successful.")
-                
-                # Enable TimescaleDB extension
-                print("Enabling TimescaleDB extension...")
-                conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb;"))
-                conn.commit()
-                
-                # Create the tables
-                print("Creating tables (if they don't exist)...")
-                Base.metadata.create_all(bind=engine)
-                
-                # Convert option_data to a hypertable
-                print("Turning 'option_data' into a hypertable...")
-                # We partition by the 'timestamp' column
-                conn.execute(text("SELECT create_hypertable('option_data', 'timestamp', if_not_exists => TRUE);"))
-                conn.commit()
-                
-                print("\nDatabase initialization successful!")
-                print("Tables 'option_data' and 'stock_data' are ready.")
-                break
+            # Extension, tables, hypertable and indexes are all managed by migrations/
+            print("Applying schema migrations...")
+            applied = upgrade(engine)
+            for name in applied:
+                print(f"  applied {name}")
+            if not applied:
+                print("  schema is up to date")
+
+            print("\nDatabase initialization successful!")
+            print("Tables 'option_data' (history), 'option_chain_latest' and 'stock_data' are ready.")
+            break
         except OperationalError as e:
             print(f"Database connection failed. Is the DATABASE_URL in .env correct?")
             print(f"Error: {e}")
@@ -45,4 +34,3 @@ def initialize_database():
 
 if __name__ == "__main__":
     initialize_database()
-
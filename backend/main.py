@@ -1,35 +1,46 @@
 # backend/main.py
-from fastapi import FastAPI, Depends, BackgroundTasks, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from apscheduler.schedulers.background import BackgroundScheduler
-from database import get_db, engine
-from models import OptionData, StockData, Base
+from fastapi.responses import Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from database import get_async_db, engine, SessionLocal, AsyncSession, AsyncSessionLocal
+from migrations import pending_migrations
 # MERGED IMPORT: We need both fetch_and_store AND the provider instance
 from services.ingestion import fetch_and_store, provider
+from services.ingestion_engine import IngestionEngine
+from services.refresh_scheduler import RefreshScheduler
+from services.demand_tracker import demand_tracker
+from services.compute_pool import compute_pool
+from services.metrics import latency_recorder
 from services.ai_analyzer import get_market_sentiment_insight
-from services.analysis_service import calculate_key_levels
-from services.financial_calcs import calculate_max_pain, get_realized_volatility, get_implied_volatility
+from services.analysis_service import ChainSummary
+from services.financial_calcs import get_realized_volatility
 from services.news_service import fetch_news
 from services.social.aggregator import get_social_buzz
 from services.alert_engine import AlertEngine, AlertSignal
 # NEW IMPORTS: Auth and Cache
 from services.api_auth import require_api_key
 from services.simple_cache import cache
+from services.chain_repository import load_latest_chain, load_latest_chain_async
+from services.chain_history import (
+    HISTORY_METRICS, HISTORY_MAX_POINTS, HISTORY_MAX_DAYS, SeriesQuery, normalize_time,
+    load_chain_as_of, load_chain_as_of_async, load_metric_series, load_metric_series_async,
+)
+from services.chain_store import chain_store
+from services.ingest_leader import ingest_leader
+from services.snapshot_archive import RetentionJob
+from services import chain_export
 import logging
 import os
 from dotenv import load_dotenv
-import threading 
 import time
+from datetime import date, datetime, timedelta, timezone
 import yfinance as yf
 from pydantic import BaseModel
 from typing import List, Any, Dict, Optional, Literal
 
 load_dotenv()
 
-# Create DB tables if not existing
-Base.metadata.create_all(bind=engine)
-
 app = FastAPI(title="CMEProject Data Pipeline API")
 
 # --- CORS ---
@@ -43,6 +54,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Latency metrics (split by whether ingestion was parsing at the time) ---
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    busy_before = compute_pool.busy()
+    response = await call_next(request)
+    if request.url.path.startswith("/api/"):
+        route = request.scope.get("route")
+        latency_recorder.record(
+            route.path if route else request.url.path,
+            time.perf_counter() - start,
+            busy_before or compute_pool.busy(),
+        )
+    return response
+
 # --- CONFIGURATION: 35 STOCKS TO TRACK ---
 STOCKS_TO_TRACK = [
     'HDFCBANK', 'ICICIBANK', 'SBIN', 'AXISBANK', 'KOTAKBANK',
@@ -71,79 +97,81 @@ TIER_2_STOCKS = [
 
 TIER_3_STOCKS = [s for s in STOCKS_TO_TRACK if s not in TIER_1_STOCKS and s not in TIER_2_STOCKS]
 
+INDICES = ['NIFTY', 'BANKNIFTY', 'FINNIFTY']
+
+TRACKED_SYMBOLS = frozenset(INDICES + STOCKS_TO_TRACK)
+
+ingestion_engine = IngestionEngine(fetch_and_store)
+
 def run_initial_fetch():
     logging.info("=" * 70)
-    logging.info("🚀 PHASE 1: Fetching Indices (Priority)")
+    logging.info("🚀 INITIAL INGESTION: Indices first, then Tier 1 → Tier 3")
     logging.info("=" * 70)
     try:
-        for symbol in ['NIFTY', 'BANKNIFTY', 'FINNIFTY']:
-            logging.info(f"📊 Fetching {symbol}...")
-            fetch_and_store(symbol)
-        logging.info("✅ Indices loaded! Frontend is now ready.\n")
-
-        logging.info("=" * 70)
-        logging.info(f"🚀 PHASE 2: Fetching Tier 1 Stocks ({len(TIER_1_STOCKS)} stocks)")
-        logging.info("=" * 70)
-        for i, stock in enumerate(TIER_1_STOCKS, 1):
-            logging.info(f"📈 [{i}/{len(TIER_1_STOCKS)}] Fetching {stock}...")
-            fetch_and_store(stock)
-            time.sleep(1)
-
-        logging.info("✅ Tier 1 stocks loaded!\n")
-        logging.info("=" * 70)
-        logging.info(f"🚀 PHASE 3: Fetching Tier 2 Stocks ({len(TIER_2_STOCKS)} stocks)")
-        logging.info("=" * 70)
-        for i, stock in enumerate(TIER_2_STOCKS, 1):
-            logging.info(f"📊 [{i}/{len(TIER_2_STOCKS)}] Fetching {stock}...")
-            fetch_and_store(stock)
-            time.sleep(1.5)
-        logging.info("✅ Tier 2 stocks loaded!\n")
-
-        logging.info("=" * 70)
-        logging.info(f"🚀 PHASE 4: Fetching Tier 3 Stocks ({len(TIER_3_STOCKS)} stocks)")
-        logging.info("=" * 70)
-        for i, stock in enumerate(TIER_3_STOCKS, 1):
-            logging.info(f"📊 [{i}/{len(TIER_3_STOCKS)}] Fetching {stock}...")
-            fetch_and_store(stock)
-            time.sleep(2)
-
-        logging.info("=" * 70)
-        logging.info("✅ ALL DATA INGESTION COMPLETE!")
-        logging.info(f"📊 Total: 3 Indices + {len(STOCKS_TO_TRACK)} Stocks")
-        logging.info("=" * 70)
+        ingestion_engine.run([
+            ("indices", INDICES),
+            ("tier_1", TIER_1_STOCKS),
+            ("tier_2", TIER_2_STOCKS),
+            ("tier_3", TIER_3_STOCKS),
+        ])
+        logging.info(f"📊 Total: {len(INDICES)} Indices + {len(STOCKS_TO_TRACK)} Stocks")
     except Exception as e:
         logging.error(f"❌ Initial data fetch failed: {e}")
-
-scheduler = BackgroundScheduler(daemon=True)
+    finally:
+        # Periodic refreshes start once the startup load is done, so they don't double-fetch
+        logging.info("⏰ Starting refresh scheduler...")
+        scheduler.start()
+
+scheduler = RefreshScheduler(
+    fetch_and_store,
+    demand_fn=demand_tracker.scores,
+    calls_per_refresh_fn=provider.calls_per_refresh,
+    requests_fn=ingest_leader.take_refresh_requests,
+)
+# Moves snapshot history past HISTORY_RETENTION_DAYS to the Parquet archive (ingest leader only)
+retention_job = RetentionJob(engine)
 alert_engine = AlertEngine()
 
-# Schedule ingestion jobs
-scheduler.add_job(fetch_and_store, 'interval', seconds=60, args=['NIFTY'], id='job_nifty')
-scheduler.add_job(fetch_and_store, 'interval', seconds=60, args=['BANKNIFTY'], id='job_banknifty')
-scheduler.add_job(fetch_and_store, 'interval', seconds=60, args=['FINNIFTY'], id='job_finnifty')
-
+# Refresh intervals (market hours) by priority; the scheduler staggers them within the provider budget
+for index in INDICES:
+    scheduler.add(index, 60)
 for stock in TIER_1_STOCKS:
-    scheduler.add_job(fetch_and_store, 'interval', seconds=120, args=[stock], id=f'job_{stock.lower()}')
+    scheduler.add(stock, 120)
 for stock in TIER_2_STOCKS:
-    scheduler.add_job(fetch_and_store, 'interval', seconds=180, args=[stock], id=f'job_{stock.lower()}')
+    scheduler.add(stock, 180)
 for stock in TIER_3_STOCKS:
-    scheduler.add_job(fetch_and_store, 'interval', seconds=300, args=[stock], id=f'job_{stock.lower()}')
+    scheduler.add(stock, 300)
 
 @app.on_event("startup")
 def startup_event():
     logging.info("=" * 70)
     logging.info("🚀 CME PROJECT DATA PIPELINE STARTING")
     logging.info("=" * 70)
-    logging.info(f"📊 Total Symbols: {len(STOCKS_TO_TRACK) + 3}")
+    logging.info(f"📊 Total Symbols: {len(STOCKS_TO_TRACK) + len(INDICES)}")
     logging.info("=" * 70)
-    threading.Thread(target=run_initial_fetch, daemon=True).start()
-    logging.info("⏰ Starting background scheduler...")
-    scheduler.start()
+    # Schema changes are applied by `python init_db.py` / `python -m migrations`, never at startup
+    try:
+        pending = pending_migrations(engine)
+        if pending:
+            logging.warning(f"⚠️  Pending schema migrations: {', '.join(pending)}. Run `python -m migrations`.")
+    except Exception as e:
+        logging.warning(f"⚠️  Could not check schema migrations: {e}")
+    # With several uvicorn workers only one of them ingests and writes the shared chain store
+    ingest_leader.run_when_leader(start_ingestion)
+
+def start_ingestion():
+    chain_store.become_writer()
+    retention_job.start()
+    run_initial_fetch()
 
 @app.on_event("shutdown")
 def shutdown_event():
     logging.info("🛑 Shutting down scheduler...")
     scheduler.shutdown()
+    retention_job.stop()
+    compute_pool.shutdown()
+    provider.close()
+    ingest_leader.release()
 
 # --- Pydantic Models ---
 class ChartData(BaseModel):
@@ -237,58 +265,63 @@ class DataSourceConfig(BaseModel):
 class DataSourceStatus(BaseModel):
     preference: str
     current_source_type: str 
+    scraper: Optional[Dict[str, Any]] = None
 
-# ------------------------
-# Utility: build option-chain payload from DB (same shape frontend expects)
-# ------------------------
-def fetch_option_chain_from_db(symbol: str, db: Session) -> Optional[dict]:
-    """
-    Build the same payload your frontend used to expect:
-    {
-      "symbol": "...",
-      "underlyingPrice": 123.4,
-      "timestamp": "...",
-      "expiryDate": "YYYY-MM-DD",
-      "legs": [ {oi_change, strike, type, lastPrice, iv, oi, volume, delta, gamma, theta, vega}, ... ]
-    }
-    """
+def _sync_read(loader, *args):
+    db = SessionLocal()
     try:
-        stock_data = db.query(StockData).filter(StockData.symbol == symbol).first()
-        if not stock_data:
-            return None
-        option_legs = db.query(OptionData).filter(OptionData.symbol == symbol).order_by(OptionData.strike_price).all()
-        if not option_legs:
-            return None
-        legs = []
-        for leg in option_legs:
-            legs.append({
-                "oi_change": leg.oi_change,
-                "strike": leg.strike_price,
-                "type": leg.option_type,
-                "lastPrice": leg.last_price,
-                "iv": leg.iv,
-                "oi": leg.oi,
-                "volume": leg.volume,
-                "delta": leg.delta,
-                "gamma": leg.gamma,
-                "theta": leg.theta,
-                "vega": leg.vega
-            })
-        return {
-            "symbol": stock_data.symbol,
-            "underlyingPrice": stock_data.underlying_value,
-            "timestamp": stock_data.timestamp.isoformat(),
-            "expiryDate": option_legs[0].expiry_date.isoformat(),
-            "legs": legs
-        }
+        return loader(db, *args)
+    finally:
+        db.close()
+
+# Runs the async loader on the request's session, or the sync twin in the threadpool
+# when no async driver is configured (keeps the sync query off the event loop)
+async def _read(db: Optional[AsyncSession], async_loader, sync_loader, *args):
+    if db is not None:
+        return await async_loader(db, *args)
+    return await run_in_threadpool(_sync_read, sync_loader, *args)
+
+async def _load_chain(symbol: str, db: Optional[AsyncSession]):
+    return await _read(db, load_latest_chain_async, load_latest_chain, symbol)
+
+# Latest chain snapshot (in-memory store; the DB is only read on a cold miss).
+# A failed cold load is logged and treated as "not loaded yet", so callers answer 404.
+async def latest_snapshot(symbol: str, db: Optional[AsyncSession]):
+    try:
+        return await chain_store.get_or_load_async(symbol, lambda sym: _load_chain(sym, db))
     except Exception as e:
-        logging.error(f"Error assembling chain from DB for {symbol}: {e}")
+        logging.error(f"Loading the latest chain for {symbol} failed: {e}")
         return None
 
+# Aggregates computed once at ingest (PCR, OI totals, max-OI strikes, IVs, max pain)
+async def chain_summary(symbol: str, db: Optional[AsyncSession]) -> dict:
+    snapshot = await latest_snapshot(symbol, db)
+    return snapshot.summary if snapshot else ChainSummary().to_dict()
+
+# chain_summary for work that can outlive the request (stale-while-revalidate refreshes):
+# it opens its own session rather than using the request's, which is closed after the response
+async def detached_chain_summary(symbol: str) -> dict:
+    if AsyncSessionLocal is None:
+        return await chain_summary(symbol, None)
+    async with AsyncSessionLocal() as db:
+        return await chain_summary(symbol, db)
+
+# Records which symbols clients are viewing (drives refresh priority); only after the API key
+# check passed, and only for symbols the scheduler refreshes
+async def track_symbol_demand(symbol: str, auth = Depends(require_api_key)):
+    if symbol.upper() in TRACKED_SYMBOLS:
+        demand_tracker.record(symbol)
+
 # Helper for cache keys
 def _cache_key(*parts):
     return "cache:" + ":".join(map(str, parts))
 
+# (soft, hard) TTLs in seconds: past soft the cached value is still served while it is
+# refreshed in the background; only past hard does a request wait for the recompute
+SWR_HARD_TTL_SEC = int(os.getenv("SWR_HARD_TTL_SEC", "600"))
+SENTIMENT_TTL = (30, SWR_HARD_TTL_SEC)
+VOLSPREAD_TTL = (60, SWR_HARD_TTL_SEC)
+
 # ------------------------
 # API endpoints
 # ------------------------
@@ -298,11 +331,17 @@ def read_root():
     return {
         "message": "CME Data Pipeline is running.",
         "tracking": {
-            "indices": ["NIFTY", "BANKNIFTY", "FINNIFTY"],
+            "indices": INDICES,
             "tier_1_stocks": TIER_1_STOCKS,
             "total_stocks": len(STOCKS_TO_TRACK),
             "data_source": provider.get_preference() # Added for visibility
         },
+        "ingestion": ingestion_engine.progress(),
+        "scheduler": scheduler.status(),
+        "hot_symbols": demand_tracker.top(),
+        "chain_store": chain_store.status(),
+        "worker": ingest_leader.status(),
+        "history_retention": retention_job.status(),
     }
 
 # --- MERGED: Data Source Switching Endpoints (Admin Only) ---
@@ -310,7 +349,8 @@ def read_root():
 def get_data_source_status(auth = Depends(require_api_key)):
     return {
         "preference": provider.get_preference(),
-        "current_source_type": provider.preference 
+        "current_source_type": provider.preference,
+        "scraper": provider.nse_provider.health()
     }
 
 @app.post("/api/v1/data-source/set")
@@ -326,21 +366,90 @@ def set_data_source(config: DataSourceConfig, auth = Depends(require_api_key)):
 
 # --- Standard Endpoints (With Cache & Auth) ---
 
-@app.get("/api/v1/option-chain/{symbol}")
-def get_option_chain(symbol: str, auth = Depends(require_api_key), db: Session = Depends(get_db)):
+@app.get("/api/v1/option-chain/{symbol}", dependencies=[Depends(track_symbol_demand)])
+async def get_option_chain(
+    symbol: str,
+    as_of: Optional[datetime] = Query(default=None, description="Chain as stored at this time (IST if no offset)"),
+    auth = Depends(require_api_key),
+    db: Optional[AsyncSession] = Depends(get_async_db),
+):
     s = symbol.upper()
-    key = _cache_key("optionchain", s)
-    cached = cache.get(key)
-    if cached:
-        cached["_cached"] = True
-        return cached
-
-    chain = fetch_option_chain_from_db(s, db)
-    if not chain:
+    if as_of is not None:
+        # Point-in-time reads come from the snapshot history, not the latest-chain store
+        requested = normalize_time(as_of)
+        chain = await _read(db, load_chain_as_of_async, load_chain_as_of, s, requested)
+        if chain is None:
+            raise HTTPException(status_code=404, detail=f"No stored snapshot of {s} at or before {requested.isoformat()}.")
+        return {**chain.to_payload(), "asOf": requested.isoformat()}
+    # Served from the in-memory store (pre-serialized at ingest); the DB is only read on a cold miss
+    snapshot = await latest_snapshot(s, db)
+    if not snapshot:
         raise HTTPException(status_code=404, detail=f"Data for {s} is still loading. Please wait 1-2 minutes and refresh.")
-    cache.set(key, chain, ttl=30)
-    chain["_cached"] = False
-    return chain
+    return Response(content=snapshot.payload_json, media_type="application/json")
+
+@app.get("/api/v1/option-chain/{symbol}/history")
+async def get_option_chain_history(
+    symbol: str,
+    metrics: str = Query(default="pcr,call_oi,put_oi,atm_iv", description=f"Comma-separated, any of: {', '.join(HISTORY_METRICS)}"),
+    start: Optional[datetime] = Query(default=None, description="Range start (IST if no offset); default end - 1 day"),
+    end: Optional[datetime] = Query(default=None, description="Range end (IST if no offset); default now"),
+    points: int = Query(default=300, ge=2, le=HISTORY_MAX_POINTS, description="Maximum points per series"),
+    expiry: Optional[date] = Query(default=None, description="Expiry (YYYY-MM-DD); default nearest one live at `end`"),
+    auth = Depends(require_api_key),
+    db: Optional[AsyncSession] = Depends(get_async_db),
+):
+    names = [m.strip() for m in metrics.split(',') if m.strip()]
+    unknown = [m for m in names if m not in HISTORY_METRICS]
+    if not names or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown metrics {unknown}; choose from {list(HISTORY_METRICS)}.")
+    end = normalize_time(end) if end else datetime.now(timezone.utc)
+    start = normalize_time(start) if start else end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end.")
+    if end - start > timedelta(days=HISTORY_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Range is limited to {HISTORY_MAX_DAYS} days.")
+    query = SeriesQuery(symbol=symbol.upper(), metrics=names, start=start, end=end, points=points, expiry=expiry)
+    return await _read(db, load_metric_series_async, load_metric_series, query)
+
+@app.get("/api/v1/export/option-chains")
+async def export_option_chains(
+    symbols: Optional[str] = Query(default=None, description="Comma-separated symbols; default every tracked symbol"),
+    format: Literal["arrow", "parquet"] = Query(default="arrow", description="Arrow IPC stream or Parquet"),
+    start: Optional[datetime] = Query(default=None, description="History range start (IST if no offset); omit for the latest chains"),
+    end: Optional[datetime] = Query(default=None, description="History range end (IST if no offset); default now"),
+    auth = Depends(require_api_key),
+    db: Optional[AsyncSession] = Depends(get_async_db),
+):
+    if not chain_export.available():
+        raise HTTPException(status_code=501, detail="Export requires pyarrow on the server.")
+    names = [x.strip().upper() for x in symbols.split(',') if x.strip()] if symbols else INDICES + STOCKS_TO_TRACK
+    if len(names) > chain_export.EXPORT_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {chain_export.EXPORT_MAX_SYMBOLS} symbols per export.")
+
+    if start is None and end is None:
+        # Latest chains straight from the in-memory store (cold misses load from the DB)
+        chains = []
+        for name in names:
+            snapshot = await latest_snapshot(name, db)
+            if snapshot:
+                chains.append(snapshot.chain)
+        batches = chain_export.latest_batches(chains)
+    else:
+        end = normalize_time(end) if end else datetime.now(timezone.utc)
+        start = normalize_time(start) if start else end - timedelta(days=1)
+        if start >= end:
+            raise HTTPException(status_code=400, detail="start must be before end.")
+        if end - start > timedelta(days=HISTORY_MAX_DAYS):
+            raise HTTPException(status_code=400, detail=f"Range is limited to {HISTORY_MAX_DAYS} days.")
+        # Sync generator: Starlette iterates it in the threadpool, so the DB streaming stays off the event loop
+        batches = chain_export.history_batches(engine, names, start, end)
+
+    media_type, extension = chain_export.EXPORT_FORMATS[format]
+    return StreamingResponse(
+        chain_export.encode(batches, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="option-chains.{extension}"'},
+    )
 
 @app.get("/api/v1/historical-price/{symbol}", response_model=HistoricalResponse)
 def get_historical_price(
@@ -407,77 +516,76 @@ def get_historical_price(
         logging.error(f"Error fetching historical price: {e}")
         return HistoricalResponse(symbol=symbol, data=[], period=period)
 
-@app.get("/api/v1/sentiment/{symbol}", response_model=SentimentResponse)
-def get_market_sentiment(symbol: str, auth = Depends(require_api_key), db: Session = Depends(get_db)):
+@app.get("/api/v1/sentiment/{symbol}", response_model=SentimentResponse, dependencies=[Depends(track_symbol_demand)])
+async def get_market_sentiment(symbol: str, auth = Depends(require_api_key)):
     s = symbol.upper()
     key = _cache_key("sentiment", s)
-    cached = cache.get(key)
-    if cached:
-        return cached
-    try:
-        levels = calculate_key_levels(db, s)
+
+    async def compute():
+        levels = await detached_chain_summary(s)
         try:
-            insight = get_market_sentiment_insight(s, levels.get("pcr", 0), levels.get("max_oi_call_strike"), levels.get("max_oi_put_strike"))
+            insight = await run_in_threadpool(
+                get_market_sentiment_insight, s, levels.get("pcr", 0), levels.get("max_oi_call_strike"), levels.get("max_oi_put_strike")
+            )
         except Exception:
             insight = ""
-        out = {"symbol": s, "pcr": levels.get("pcr", 0.0), "detailed_insight": insight}
-        cache.set(key, out, ttl=30)
-        return out
+        return {"symbol": s, "pcr": levels.get("pcr", 0.0), "detailed_insight": insight}
+
+    try:
+        # Concurrent misses share one Gemini call (across workers too when Redis is configured)
+        soft, hard = SENTIMENT_TTL
+        return await cache.get_or_compute_async(key, compute, ttl=hard, soft_ttl=soft)
     except Exception as e:
         logging.error(f"Error in sentiment: {e}")
         return SentimentResponse(symbol=s, pcr=0.0, detailed_insight="Error calculating sentiment.")
 
-@app.get("/api/v1/max-pain/{symbol}")
-def get_max_pain_endpoint(symbol: str, auth = Depends(require_api_key), db: Session = Depends(get_db)):
+@app.get("/api/v1/max-pain/{symbol}", dependencies=[Depends(track_symbol_demand)])
+async def get_max_pain_endpoint(symbol: str, auth = Depends(require_api_key), db: Optional[AsyncSession] = Depends(get_async_db)):
+    """Max pain of the nearest expiry, plus the pain curve for every stored expiry."""
     s = symbol.upper()
-    key = _cache_key("maxpain", s)
-    cached = cache.get(key)
-    if cached:
-        return cached
     try:
-        mp = calculate_max_pain(db, s)
-        stock = db.query(StockData).filter(StockData.symbol == s).first()
-        current_price = stock.underlying_value if stock else 0.0
-        out = {"symbol": s, "max_pain_strike": mp, "current_price": current_price}
-        cache.set(key, out, ttl=60)
-        return out
+        snapshot = await latest_snapshot(s, db)
+        if not snapshot:
+            return {"symbol": s, "max_pain_strike": 0.0, "current_price": 0.0, "expiry": None, "expiries": []}
+        by_expiry = snapshot.summary["max_pain_by_expiry"]
+        return {
+            "symbol": s,
+            "max_pain_strike": snapshot.summary["max_pain_strike"],
+            "current_price": snapshot.chain.underlying_value,
+            "expiry": by_expiry[0]["expiry"] if by_expiry else None,
+            "expiries": by_expiry,
+        }
     except Exception as e:
         logging.error(f"Error in max-pain: {e}")
         raise HTTPException(status_code=500, detail="Failed to calculate Max Pain.")
 
-@app.get("/api/v1/open-interest/{symbol}", response_model=OpenInterestResponse)
-def get_open_interest_summary(symbol: str, auth = Depends(require_api_key), db: Session = Depends(get_db)):
+@app.get("/api/v1/open-interest/{symbol}", response_model=OpenInterestResponse, dependencies=[Depends(track_symbol_demand)])
+async def get_open_interest_summary(symbol: str, auth = Depends(require_api_key), db: Optional[AsyncSession] = Depends(get_async_db)):
     s = symbol.upper()
-    key = _cache_key("openinterest", s)
-    cached = cache.get(key)
-    if cached:
-        return cached
     try:
-        levels = calculate_key_levels(db, s)
-        out = {
+        levels = await chain_summary(s, db)
+        return {
             "symbol": s,
-            "total_call_oi": levels.get("total_call_oi", 0),
-            "total_put_oi": levels.get("total_put_oi", 0)
+            "total_call_oi": levels["total_call_oi"],
+            "total_put_oi": levels["total_put_oi"]
         }
-        cache.set(key, out, ttl=30)
-        return out
     except Exception as e:
         logging.error(f"Error in open-interest: {e}")
         raise HTTPException(status_code=500, detail="Error calculating open interest.")
 
-@app.get("/api/v1/volatility-spread/{symbol}", response_model=VolatilitySpreadResponse)
-def get_vol_spread(symbol: str, auth = Depends(require_api_key), db: Session = Depends(get_db)):
+@app.get("/api/v1/volatility-spread/{symbol}", response_model=VolatilitySpreadResponse, dependencies=[Depends(track_symbol_demand)])
+async def get_vol_spread(symbol: str, auth = Depends(require_api_key)):
     s = symbol.upper()
     key = _cache_key("volspread", s)
-    cached = cache.get(key)
-    if cached:
-        return cached
+
+    async def compute():
+        iv = (await detached_chain_summary(s))["avg_iv"]
+        rv = await run_in_threadpool(get_realized_volatility, s)
+        return {"symbol": s, "implied_volatility": iv, "realized_volatility": rv, "spread": round(iv - rv, 2)}
+
     try:
-        iv = get_implied_volatility(db, s)
-        rv = get_realized_volatility(s)
-        out = {"symbol": s, "implied_volatility": iv, "realized_volatility": rv, "spread": round(iv - rv, 2)}
-        cache.set(key, out, ttl=60)
-        return out
+        soft, hard = VOLSPREAD_TTL
+        return await cache.get_or_compute_async(key, compute, ttl=hard, soft_ttl=soft)
     except Exception as e:
         logging.error(f"Error in vol-spread: {e}")
         raise HTTPException(status_code=500, detail="Error calculating volatility spread.")
@@ -510,17 +618,17 @@ def get_social_buzz_endpoint(symbol: str, auth = Depends(require_api_key)):
             top_posts=[]
         )
 
-@app.get("/api/v1/alerts/{symbol}", response_model=AlertsResponse)
-def get_symbol_alerts(symbol: str, db: Session = Depends(get_db), auth = Depends(require_api_key)):
+@app.get("/api/v1/alerts/{symbol}", response_model=AlertsResponse, dependencies=[Depends(track_symbol_demand)])
+async def get_symbol_alerts(symbol: str, db: Optional[AsyncSession] = Depends(get_async_db), auth = Depends(require_api_key)):
     s = symbol.upper()
     try:
-        levels = calculate_key_levels(db, s)
+        levels = await chain_summary(s, db)
         pcr = levels.get("pcr")
         total_call_oi = levels.get("total_call_oi")
         total_put_oi = levels.get("total_put_oi")
-        iv = get_implied_volatility(db, s)
-        rv = get_realized_volatility(s)
-        social_data = get_social_buzz(s)
+        iv = levels.get("avg_iv")
+        rv = await run_in_threadpool(get_realized_volatility, s)
+        social_data = await run_in_threadpool(get_social_buzz, s)
         buzz_score = social_data.get("buzz_score")
         sentiment_data = social_data.get("sentiment", {}) or {}
         social_sentiment_score = float(sentiment_data.get("positive", 0.0)) - float(sentiment_data.get("negative", 0.0))
@@ -584,16 +692,34 @@ def get_current_price(symbol: str, auth = Depends(require_api_key)):
 
 # --- ADMIN: trigger ingestion for a symbol (protected) ---
 @app.post("/api/v1/admin/refresh/{symbol}")
-def admin_refresh(symbol: str, background_tasks: BackgroundTasks, auth = Depends(require_api_key)):
+def admin_refresh(symbol: str, auth = Depends(require_api_key)):
     # only admin role allowed
     if auth.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Admin API key required")
     sym = symbol.upper()
-    background_tasks.add_task(fetch_and_store, sym)
+    # Only the ingest leader writes; it queues through its scheduler so the in-flight
+    # guard and rate budget apply, and other workers forward the symbol to it
+    if ingest_leader.is_leader:
+        scheduler.refresh_now(sym)
+        status = "scheduled"
+    else:
+        ingest_leader.request_refresh(sym)
+        status = "forwarded"
     # also clear relevant caches
-    cache.set(_cache_key("optionchain", sym), None, ttl=1)
-    cache.set(_cache_key("maxpain", sym), None, ttl=1)
-    cache.set(_cache_key("openinterest", sym), None, ttl=1)
-    cache.set(_cache_key("sentiment", sym), None, ttl=1)
-    cache.set(_cache_key("volspread", sym), None, ttl=1)
-    return {"status": "scheduled", "symbol": sym}
\ No newline at end of file
+    cache.delete(_cache_key("sentiment", sym))
+    cache.delete(_cache_key("volspread", sym))
+    return {"status": status, "symbol": sym}
+
+# --- ADMIN: ingestion offload + API latency metrics (protected) ---
+@app.get("/api/v1/admin/metrics")
+def admin_metrics(reset: bool = False, auth = Depends(require_api_key)):
+    if auth.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin API key required")
+    out = {
+        "ingest_offload": compute_pool.status(),
+        "api_latency": latency_recorder.summary(),
+        "cache": cache.status(),
+    }
+    if reset:
+        latency_recorder.reset()
+    return out
@@ -0,0 +1,11 @@
+# backend/migrations/__init__.py
+"""
+Versioned schema migrations (run with `python -m migrations` or `python init_db.py`).
+
+The app no longer creates tables on import; schema changes are applied here,
+outside app startup. See migrations/runner.py.
+"""
+
+from .runner import upgrade, pending_migrations, applied_migrations
+
+__all__ = ["upgrade", "pending_migrations", "applied_migrations"]
@@ -0,0 +1,29 @@
+# backend/migrations/__main__.py
+"""
+python -m migrations            apply pending migrations
+python -m migrations --status   list applied / pending versions
+"""
+
+import argparse
+import logging
+
+from database import engine
+from migrations.runner import upgrade, applied_migrations, pending_migrations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument("--status", action="store_true", help="show applied and pending migrations")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.status:
+        print(f"applied: {applied_migrations(engine)}")
+        print(f"pending: {pending_migrations(engine)}")
+        return
+    applied = upgrade(engine)
+    print(f"Applied {len(applied)} migration(s): {', '.join(applied) or 'schema is up to date'}")
+
+
+if __name__ == "__main__":
+    main()
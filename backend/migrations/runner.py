@@ -0,0 +1,118 @@
+# backend/migrations/runner.py
+"""
+Minimal migration runner for the TimescaleDB schema.
+
+- Migrations live in migrations/versions as vNNNN_<name>.py modules exposing
+  DESCRIPTION and upgrade(conn); they are applied in version order.
+- Applied versions are recorded in `schema_migrations`.
+- Each migration runs in its own transaction, and the whole run holds a
+  Postgres advisory lock, so two deploys (or workers) can't apply the same
+  migration twice.
+- A module with TRANSACTIONAL = False runs in autocommit mode instead (needed
+  for statements Postgres refuses inside a transaction block, e.g. TimescaleDB
+  continuous aggregates); such migrations must be written to be re-runnable.
+- Non-Postgres databases (SQLite for quick local runs) have no migrations;
+  the tables are created from the models instead.
+"""
+
+import importlib
+import logging
+import pkgutil
+import re
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from migrations import versions
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary app-wide key for pg_advisory_lock
+_LOCK_KEY = 0x434D4531
+
+_VERSION_RE = re.compile(r"^v(\d{4})_\w+$")
+
+
+def discover() -> List[Tuple[int, str, object]]:
+    """(version, name, module) for every migration module, sorted by version."""
+    found = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        match = _VERSION_RE.match(info.name)
+        if match:
+            module = importlib.import_module(f"{versions.__name__}.{info.name}")
+            found.append((int(match.group(1)), info.name, module))
+    found.sort(key=lambda m: m[0])
+    numbers = [v for v, _, _ in found]
+    if len(numbers) != len(set(numbers)):
+        raise RuntimeError(f"Duplicate migration versions: {numbers}")
+    return found
+
+
+def _ensure_table(conn: Connection):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """))
+
+
+def _record(conn: Connection, version: int, name: str):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+        {"v": version, "n": name},
+    )
+
+
+def applied_migrations(engine: Engine) -> List[int]:
+    if engine.dialect.name != "postgresql":
+        return []
+    with engine.connect() as conn:
+        exists = conn.execute(text("SELECT to_regclass('schema_migrations')")).scalar()
+        if not exists:
+            return []
+        return [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+
+
+def pending_migrations(engine: Engine) -> List[str]:
+    if engine.dialect.name != "postgresql":
+        return []
+    done = set(applied_migrations(engine))
+    return [name for version, name, _ in discover() if version not in done]
+
+
+def upgrade(engine: Engine) -> List[str]:
+    """Apply all pending migrations. Returns the names of the ones applied."""
+    if engine.dialect.name != "postgresql":
+        from database import Base
+        import models  # noqa: F401  (registers the tables)
+        logger.info(f"{engine.dialect.name}: no migrations, creating tables from the models")
+        Base.metadata.create_all(bind=engine)
+        return []
+
+    applied = []
+    with engine.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": _LOCK_KEY})
+        try:
+            with engine.begin() as conn:
+                _ensure_table(conn)
+            done = set(applied_migrations(engine))
+            for version, name, module in discover():
+                if version in done:
+                    continue
+                logger.info(f"Applying migration {name}: {module.DESCRIPTION}")
+                if getattr(module, "TRANSACTIONAL", True):
+                    with engine.begin() as conn:
+                        module.upgrade(conn)
+                        _record(conn, version, name)
+                else:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        module.upgrade(conn)
+                        _record(conn, version, name)
+                applied.append(name)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _LOCK_KEY})
+            lock_conn.commit()
+    return applied
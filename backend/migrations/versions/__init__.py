@@ -0,0 +1,2 @@
+# backend/migrations/versions/__init__.py
+# One module per schema version: vNNNN_<name>.py with DESCRIPTION and upgrade(conn).
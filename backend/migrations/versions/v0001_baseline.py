@@ -0,0 +1,62 @@
+# backend/migrations/versions/v0001_baseline.py
+"""
+Baseline: the schema previously created by Base.metadata.create_all + init_db.py.
+Idempotent, so databases created the old way are adopted as-is.
+"""
+
+from sqlalchemy import text
+
+DESCRIPTION = "option_data hypertable, option_chain_latest, stock_data"
+
+_LEG_COLUMNS = """
+    oi_change INTEGER,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+    symbol VARCHAR,
+    expiry_date DATE,
+    strike_price FLOAT,
+    option_type VARCHAR(2),
+    last_price FLOAT,
+    iv FLOAT,
+    oi INTEGER,
+    volume INTEGER,
+    delta FLOAT,
+    gamma FLOAT,
+    theta FLOAT,
+    vega FLOAT
+"""
+
+
+def upgrade(conn):
+    timescale = conn.execute(text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'timescaledb'"
+    )).scalar()
+    if timescale:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb"))
+
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS option_data ({_LEG_COLUMNS},
+            PRIMARY KEY (timestamp, symbol, strike_price, option_type, expiry_date)
+        )
+    """))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_option_data_symbol ON option_data (symbol)"))
+
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS option_chain_latest ({_LEG_COLUMNS},
+            PRIMARY KEY (symbol, expiry_date, strike_price, option_type)
+        )
+    """))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_option_chain_latest_symbol ON option_chain_latest (symbol)"))
+
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS stock_data (
+            id SERIAL PRIMARY KEY,
+            timestamp TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            symbol VARCHAR,
+            underlying_value FLOAT
+        )
+    """))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_stock_data_id ON stock_data (id)"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_stock_data_symbol ON stock_data (symbol)"))
+
+    if timescale:
+        conn.execute(text("SELECT create_hypertable('option_data', 'timestamp', if_not_exists => TRUE)"))
@@ -0,0 +1,31 @@
+# backend/migrations/versions/v0002_covering_indexes.py
+"""
+Indexes that match the real access paths.
+
+- option_chain_latest (symbol, strike_price) INCLUDE <leg columns>:
+  chain_repository.load_latest_chain reads every leg of a symbol ordered by
+  strike; with the payload columns included this is an index-only scan with
+  no sort. ingestion._load_previous_legs uses the same prefix.
+- option_data (symbol, timestamp DESC): the last stored snapshot of a symbol
+  (ingestion._history_has_snapshot) and per-symbol history ranges.
+- The single-column symbol indexes are dropped; both tables now have
+  composite indexes (and option_chain_latest its primary key) led by symbol.
+"""
+
+from sqlalchemy import text
+
+DESCRIPTION = "covering index for latest-chain reads, (symbol, timestamp) on history"
+
+
+def upgrade(conn):
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_option_chain_latest_symbol_strike
+        ON option_chain_latest (symbol, strike_price)
+        INCLUDE (expiry_date, option_type, last_price, iv, oi, volume, oi_change, delta, gamma, theta, vega, timestamp)
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_option_data_symbol_timestamp
+        ON option_data (symbol, timestamp DESC)
+    """))
+    conn.execute(text("DROP INDEX IF EXISTS ix_option_chain_latest_symbol"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_option_data_symbol"))
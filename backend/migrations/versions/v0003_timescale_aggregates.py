@@ -0,0 +1,158 @@
+# backend/migrations/versions/v0003_timescale_aggregates.py
+"""
+Intraday trend aggregates, compression and symbol space partitioning.
+
+- option_chain_metrics: one row per symbol / expiry / stored snapshot, written
+  at ingest (analysis_service.expiry_metrics). ATM IV depends on the spot at
+  snapshot time, which the raw legs don't carry, so the trend aggregates are
+  built on this table instead of on option_data.
+- option_chain_metrics_1m / _5m: continuous aggregates per symbol and expiry
+  (last OI totals, PCR, ATM IV and spot in the bucket, plus averages and
+  ranges), refreshed by TimescaleDB policies. real-time aggregation is on,
+  so the not-yet-materialized tail is still served.
+- Both hypertables get 1-day chunks, a hash dimension on symbol and a
+  compression policy for chunks older than COMPRESS_AFTER. option_data is
+  compressed segmented by (symbol, expiry_date), which is how it is read.
+  A symbol dimension can only be added to an empty hypertable; on an
+  existing option_data with rows this is skipped with a log line.
+
+Without TimescaleDB only the plain table and its index are created.
+Runs outside a transaction (continuous aggregates require it); every step is
+guarded so the migration can be re-run after a partial failure.
+"""
+
+import logging
+
+from sqlalchemy import text
+
+DESCRIPTION = "option_chain_metrics + 1m/5m continuous aggregates, compression, symbol partitioning"
+TRANSACTIONAL = False
+
+logger = logging.getLogger(__name__)
+
+CHUNK_INTERVAL = "1 day"
+SYMBOL_PARTITIONS = 4
+COMPRESS_AFTER = "7 days"
+
+# name -> (bucket width, refresh start offset, refresh end offset, schedule interval)
+AGGREGATES = {
+    "option_chain_metrics_1m": ("1 minute", "2 hours", "1 minute", "1 minute"),
+    "option_chain_metrics_5m": ("5 minutes", "1 day", "5 minutes", "5 minutes"),
+}
+
+COMPRESSION = {
+    "option_data": ("symbol, expiry_date", "timestamp DESC, strike_price, option_type"),
+    "option_chain_metrics": ("symbol, expiry_date", "timestamp DESC"),
+}
+
+
+def _create_metrics_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS option_chain_metrics (
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+            symbol VARCHAR NOT NULL,
+            expiry_date DATE NOT NULL,
+            underlying_value FLOAT,
+            call_oi BIGINT,
+            put_oi BIGINT,
+            pcr FLOAT,
+            atm_strike FLOAT,
+            atm_iv FLOAT,
+            oi_weighted_iv FLOAT,
+            max_pain_strike FLOAT,
+            PRIMARY KEY (timestamp, symbol, expiry_date)
+        )
+    """))
+    conn.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_option_chain_metrics_symbol_timestamp
+        ON option_chain_metrics (symbol, timestamp DESC)
+    """))
+
+
+def _is_empty(conn, table: str) -> bool:
+    return not conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {table} LIMIT 1)")).scalar()
+
+
+def _partition_by_symbol(conn, table: str):
+    has_dimension = conn.execute(text("""
+        SELECT 1 FROM timescaledb_information.dimensions
+        WHERE hypertable_name = :t AND column_name = 'symbol'
+    """), {"t": table}).scalar()
+    if has_dimension:
+        return
+    if not _is_empty(conn, table):
+        logger.warning(f"{table} already has rows; symbol space partitioning skipped "
+                       f"(TimescaleDB only adds dimensions to empty hypertables)")
+        return
+    conn.execute(
+        text("SELECT add_dimension(:t, 'symbol', number_partitions => :n, if_not_exists => TRUE)"),
+        {"t": table, "n": SYMBOL_PARTITIONS},
+    )
+
+
+def _enable_compression(conn, table: str, segment_by: str, order_by: str):
+    enabled = conn.execute(text("""
+        SELECT compression_enabled FROM timescaledb_information.hypertables WHERE hypertable_name = :t
+    """), {"t": table}).scalar()
+    if not enabled:
+        conn.execute(text(f"""
+            ALTER TABLE {table} SET (
+                timescaledb.compress,
+                timescaledb.compress_segmentby = '{segment_by}',
+                timescaledb.compress_orderby = '{order_by}'
+            )
+        """))
+    conn.execute(
+        text(f"SELECT add_compression_policy(:t, INTERVAL '{COMPRESS_AFTER}', if_not_exists => TRUE)"),
+        {"t": table},
+    )
+
+
+def _create_aggregate(conn, name: str, bucket: str, start: str, end: str, schedule: str):
+    conn.execute(text(f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS {name}
+        WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+        SELECT time_bucket(INTERVAL '{bucket}', timestamp) AS bucket,
+               symbol,
+               expiry_date,
+               last(underlying_value, timestamp) AS underlying_value,
+               last(call_oi, timestamp) AS call_oi,
+               last(put_oi, timestamp) AS put_oi,
+               last(pcr, timestamp) AS pcr,
+               avg(pcr) AS avg_pcr,
+               last(atm_strike, timestamp) AS atm_strike,
+               last(atm_iv, timestamp) AS atm_iv,
+               avg(atm_iv) AS avg_atm_iv,
+               min(atm_iv) AS min_atm_iv,
+               max(atm_iv) AS max_atm_iv,
+               last(max_pain_strike, timestamp) AS max_pain_strike,
+               count(*) AS snapshots
+        FROM option_chain_metrics
+        GROUP BY bucket, symbol, expiry_date
+        WITH NO DATA
+    """))
+    conn.execute(text(f"""
+        SELECT add_continuous_aggregate_policy('{name}',
+            start_offset => INTERVAL '{start}',
+            end_offset => INTERVAL '{end}',
+            schedule_interval => INTERVAL '{schedule}',
+            if_not_exists => TRUE)
+    """))
+
+
+def upgrade(conn):
+    _create_metrics_table(conn)
+
+    timescale = conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")).scalar()
+    if not timescale:
+        logger.warning("TimescaleDB not installed; continuous aggregates and compression skipped")
+        return
+
+    conn.execute(text("SELECT create_hypertable('option_chain_metrics', 'timestamp', if_not_exists => TRUE)"))
+    for table, (segment_by, order_by) in COMPRESSION.items():
+        conn.execute(text(f"SELECT set_chunk_time_interval('{table}', INTERVAL '{CHUNK_INTERVAL}')"))
+        _partition_by_symbol(conn, table)
+        _enable_compression(conn, table, segment_by, order_by)
+
+    for name, (bucket, start, end, schedule) in AGGREGATES.items():
+        _create_aggregate(conn, name, bucket, start, end, schedule)
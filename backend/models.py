@@ -1,17 +1,19 @@
 # backend/models.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, func, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Date, func, PrimaryKeyConstraint, Index, text
 from database import Base
 
 
-class OptionData(Base):
-    __tablename__ = 'option_data'
+class OptionLegMixin:
+    """
+    Columns shared by the snapshot history and the latest-chain table.
+    The schema itself is owned by migrations/ (indexes included); these models mirror it.
+    """
 
-    
     oi_change = Column(Integer, default=0)
 
     
     timestamp = Column(DateTime(timezone=True), nullable=False)
-    symbol = Column(String, index=True)
+    symbol = Column(String)
     expiry_date = Column(Date)
     strike_price = Column(Float)
     option_type = Column(String(2)) # 'CE' or 'PE'
@@ -24,9 +26,31 @@ class OptionData(Base):
     theta = Column(Float, default=0.0)
     vega = Column(Float, default=0.0)
 
+
+class OptionData(OptionLegMixin, Base):
+    """Append-only snapshot history (TimescaleDB hypertable on `timestamp`)."""
+    __tablename__ = 'option_data'
+
     
     __table_args__ = (
         PrimaryKeyConstraint('timestamp', 'symbol', 'strike_price', 'option_type', 'expiry_date'),
+        Index('ix_option_data_symbol_timestamp', 'symbol', text('timestamp DESC')),
+    )
+
+
+class OptionChainLatest(OptionLegMixin, Base):
+    """Latest chain per symbol, updated in place on every ingest. All read endpoints use this."""
+    __tablename__ = 'option_chain_latest'
+
+    __table_args__ = (
+        PrimaryKeyConstraint('symbol', 'expiry_date', 'strike_price', 'option_type'),
+        Index(
+            'ix_option_chain_latest_symbol_strike', 'symbol', 'strike_price',
+            postgresql_include=[
+                'expiry_date', 'option_type', 'last_price', 'iv', 'oi', 'volume', 'oi_change',
+                'delta', 'gamma', 'theta', 'vega', 'timestamp',
+            ],
+        ),
     )
 
 
@@ -36,3 +60,28 @@ class StockData(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     symbol = Column(String, unique=True, index=True)
     underlying_value = Column(Float)
+
+
+class OptionChainMetrics(Base):
+    """
+    Per-expiry aggregates of every stored snapshot (TimescaleDB hypertable on `timestamp`).
+    The 1m / 5m continuous aggregates over it (option_chain_metrics_1m / _5m) back intraday trends.
+    """
+    __tablename__ = 'option_chain_metrics'
+
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+    symbol = Column(String, nullable=False)
+    expiry_date = Column(Date, nullable=False)
+    underlying_value = Column(Float)
+    call_oi = Column(BigInteger, default=0)
+    put_oi = Column(BigInteger, default=0)
+    pcr = Column(Float, default=0.0)
+    atm_strike = Column(Float)
+    atm_iv = Column(Float, default=0.0)
+    oi_weighted_iv = Column(Float, default=0.0)
+    max_pain_strike = Column(Float)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('timestamp', 'symbol', 'expiry_date'),
+        Index('ix_option_chain_metrics_symbol_timestamp', 'symbol', text('timestamp DESC')),
+    )
@@ -1,5 +1,19 @@
 # backend/services/__init__.py
-from .data_provider import DataProvider
-from .data_parser import parse_option_chain_data
+# Exports are resolved lazily: the compute-pool workers import services.* submodules,
+# and importing DataProvider (requests/Playwright) here would slow every worker spawn.
+import importlib
 
-__all__ = ['DataProvider', 'parse_option_chain_data']
+_EXPORTS = {
+    'DataProvider': '.data_provider',
+    'parse_option_chain_data': '.data_parser',
+    'parse_option_chain_rows': '.data_parser',
+    'parse_option_chain_columns': '.data_parser',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
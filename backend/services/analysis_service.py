@@ -1,59 +1,123 @@
 # backend/services/analysis_service.py
-import logging
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from models import OptionData
-
-
-def calculate_key_levels(db: Session, symbol: str) -> dict:
-    """
-    Calculates PCR, Max OI Call Strike, and Max OI Put Strike.
-    """
-    try:
-        # 1. Calculate PCR
-        puts_oi_query = db.query(func.sum(OptionData.oi)).filter(
-            OptionData.symbol == symbol,
-            OptionData.option_type == 'PE'
-        )
-        total_puts_oi = puts_oi_query.scalar() or 0
-        
-        calls_oi_query = db.query(func.sum(OptionData.oi)).filter(
-            OptionData.symbol == symbol,
-            OptionData.option_type == 'CE'
-        )
-        total_calls_oi = calls_oi_query.scalar() or 0
-
-        pcr = round(total_puts_oi / total_calls_oi, 2) if total_calls_oi > 0 else 0.0
-
-        # 2. Find Max OI Call Strike 
-        max_call = db.query(OptionData.strike_price, func.sum(OptionData.oi).label('total_oi')) \
-            .filter(OptionData.symbol == symbol, OptionData.option_type == 'CE') \
-            .group_by(OptionData.strike_price) \
-            .order_by(desc('total_oi')) \
-            .first()
-        
-        # 3. Find Max OI Put Strike 
-        max_put = db.query(OptionData.strike_price, func.sum(OptionData.oi).label('total_oi')) \
-            .filter(OptionData.symbol == symbol, OptionData.option_type == 'PE') \
-            .group_by(OptionData.strike_price) \
-            .order_by(desc('total_oi')) \
-            .first()
-
-        return {
-            "pcr": pcr,
-            "max_oi_call_strike": max_call[0] if max_call else 0.0,
-            "max_oi_put_strike": max_put[0] if max_put else 0.0,
-            "total_call_oi": int(total_calls_oi), 
-            "total_put_oi": int(total_puts_oi)    
-        }
-
-    except Exception as e:
-        logging.error(f"Error calculating key levels: {e}")
-        return {
-            "pcr": 0.0, 
-            "max_oi_call_strike": 0.0, 
-            "max_oi_put_strike": 0.0,
-            "total_call_oi": 0, 
-            "total_put_oi": 0     
-        }
+"""
+Ingest-time aggregates for one option chain.
 
+summarize_chain makes a single pass over the chain's arrays when a snapshot is
+published, and the result travels with the snapshot in the chain store. The
+sentiment, open-interest, max-pain, volatility-spread and alerts endpoints read
+these numbers instead of running aggregate queries per request.
+
+expiry_metrics gives the same numbers per expiry; ingestion appends them to the
+option_chain_metrics hypertable that the intraday trend aggregates are built on.
+"""
+
+from dataclasses import dataclass, asdict, field
+from typing import List, Optional
+
+import numpy as np
+
+from services.chain_columns import OptionChainColumns
+from services.financial_calcs import max_pain_curve
+
+
+@dataclass
+class ChainSummary:
+    pcr: float = 0.0
+    total_call_oi: int = 0
+    total_put_oi: int = 0
+    max_oi_call_strike: float = 0.0
+    max_oi_put_strike: float = 0.0
+    avg_iv: float = 0.0          # simple mean of legs with IV > 0
+    oi_weighted_iv: float = 0.0
+    atm_strike: float = 0.0      # strike closest to spot in the nearest expiry
+    atm_iv: float = 0.0          # mean CE/PE IV at atm_strike
+    max_pain_strike: float = 0.0  # nearest expiry
+    # [{"expiry", "max_pain_strike", "curve": [{"strike", "pain"}, ...]}] per expiry, nearest first
+    max_pain_by_expiry: List[dict] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _max_oi_strike(strikes: np.ndarray, oi: np.ndarray) -> float:
+    # OI summed per strike across expiries, like the old GROUP BY strike_price
+    if not len(strikes):
+        return 0.0
+    unique, inverse = np.unique(strikes, return_inverse=True)
+    return float(unique[np.argmax(np.bincount(inverse, weights=oi))])
+
+
+def _atm(chain: OptionChainColumns) -> tuple:
+    if not len(chain):
+        return 0.0, 0.0
+    nearest = chain.expiry_date == chain.expiry_date.min()
+    strikes = chain.strike_price[nearest]
+    atm_strike = float(strikes[np.argmin(np.abs(strikes - chain.underlying_value))])
+    ivs = chain.iv[nearest & (chain.strike_price == atm_strike) & (chain.iv > 0)]
+    return atm_strike, (float(ivs.mean()) if len(ivs) else 0.0)
+
+
+def _max_pain_by_expiry(chain: OptionChainColumns) -> List[dict]:
+    out = []
+    for expiry in np.unique(chain.expiry_date):
+        legs = chain.expiry_date == expiry
+        strikes, pain = max_pain_curve(chain.strike_price[legs], chain.oi[legs], chain.is_call[legs])
+        if not len(strikes):
+            continue
+        out.append({
+            "expiry": expiry.item().isoformat(),
+            "max_pain_strike": float(strikes[np.argmin(pain)]),
+            "curve": [{"strike": k, "pain": p} for k, p in zip(strikes.tolist(), np.round(pain).tolist())],
+        })
+    return out
+
+
+def summarize_chain(chain: Optional[OptionChainColumns]) -> ChainSummary:
+    """PCR, OI totals, max-OI strikes, IV measures and per-expiry max pain for `chain`."""
+    if chain is None or not len(chain):
+        return ChainSummary()
+
+    is_call = chain.is_call
+    is_put = chain.option_type == 'PE'
+    call_oi = int(chain.oi[is_call].sum())
+    put_oi = int(chain.oi[is_put].sum())
+
+    priced = chain.iv > 0
+    priced_oi = chain.oi[priced].sum()
+    atm_strike, atm_iv = _atm(chain)
+    max_pain = _max_pain_by_expiry(chain)
+
+    return ChainSummary(
+        pcr=round(put_oi / call_oi, 2) if call_oi > 0 else 0.0,
+        total_call_oi=call_oi,
+        total_put_oi=put_oi,
+        max_oi_call_strike=_max_oi_strike(chain.strike_price[is_call], chain.oi[is_call]),
+        max_oi_put_strike=_max_oi_strike(chain.strike_price[is_put], chain.oi[is_put]),
+        avg_iv=round(float(chain.iv[priced].mean()), 2) if priced.any() else 0.0,
+        oi_weighted_iv=round(float((chain.iv[priced] * chain.oi[priced]).sum() / priced_oi), 2) if priced_oi > 0 else 0.0,
+        atm_strike=atm_strike,
+        atm_iv=round(atm_iv, 2),
+        max_pain_strike=max_pain[0]["max_pain_strike"] if max_pain else 0.0,
+        max_pain_by_expiry=max_pain,
+    )
+
+
+def expiry_metrics(chain: OptionChainColumns) -> List[dict]:
+    """One option_chain_metrics row per expiry of `chain`."""
+    rows = []
+    for expiry in np.unique(chain.expiry_date):
+        summary = summarize_chain(chain.take(chain.expiry_date == expiry))
+        rows.append({
+            'timestamp': chain.timestamp,
+            'symbol': chain.symbol,
+            'expiry_date': expiry.item(),
+            'underlying_value': chain.underlying_value,
+            'call_oi': summary.total_call_oi,
+            'put_oi': summary.total_put_oi,
+            'pcr': summary.pcr,
+            'atm_strike': summary.atm_strike,
+            'atm_iv': summary.atm_iv,
+            'oi_weighted_iv': summary.oi_weighted_iv,
+            'max_pain_strike': summary.max_pain_strike,
+        })
+    return rows
@@ -17,7 +17,8 @@ ADMIN_KEY = os.getenv("ADMIN_API_KEY", "admin-key-456")
 
 ALLOW_LOCAL_UNAUTH = os.getenv("ALLOW_LOCAL_UNAUTH", "1") not in ("0", "false", "False")
 
-def require_api_key(request: Request, x_api_key: Optional[str] = Header(None)) -> Dict:
+# async: pure CPU, so it runs on the event loop instead of taking a threadpool slot per request
+async def require_api_key(request: Request, x_api_key: Optional[str] = Header(None)) -> Dict:
     # If API key provided, validate
     if x_api_key:
         if x_api_key == ADMIN_KEY:
@@ -0,0 +1,281 @@
+# backend/services/browser_pool.py
+"""
+Long-lived headless Firefox shared by every NSE scraper fetch.
+
+Playwright objects are bound to the event loop that created them, so the browser
+lives on its own daemon thread with a private asyncio loop. Callers on any thread
+(scheduler jobs, request handlers) submit work to that loop and block on the result.
+
+- Tabs are primed once (homepage visit for the NSE cookies) and then reused.
+- At most NSE_MAX_TABS fetches run at the same time.
+- Tabs are recycled after NSE_TAB_RECYCLE_AFTER fetches, the whole browser after
+  NSE_BROWSER_MAX_AGE_SEC seconds (only when no fetch is in flight).
+- A housekeeping task checks browser health and closes stale idle tabs.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+logger = logging.getLogger(__name__)
+
+
+class _Tab:
+    """A primed browser context + page pair owned by the pool."""
+
+    def __init__(self, context, page, generation: int):
+        self.context = context
+        self.page = page
+        self.generation = generation
+        self.uses = 0
+        self.last_used = time.time()
+
+
+class BrowserPool:
+
+    def __init__(self, base_url: str, headers: Dict[str, str], nav_timeout_ms: int = 60000):
+        self.base_url = base_url
+        self.headers = headers
+        self.nav_timeout_ms = nav_timeout_ms
+        self.max_tabs = max(1, int(os.getenv("NSE_MAX_TABS", "3")))
+        self.recycle_after = max(1, int(os.getenv("NSE_TAB_RECYCLE_AFTER", "50")))
+        self.max_browser_age = float(os.getenv("NSE_BROWSER_MAX_AGE_SEC", "1800"))
+        self.max_tab_idle = float(os.getenv("NSE_TAB_MAX_IDLE_SEC", "600"))
+        self.health_interval = float(os.getenv("NSE_BROWSER_HEALTH_SEC", "60"))
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # Loop-side state (only touched from the pool thread)
+        self._playwright = None
+        self._browser = None
+        self._browser_started = 0.0
+        self._generation = 0
+        self._idle: List[_Tab] = []
+        self._in_use = 0
+        self._tab_sem: Optional[asyncio.Semaphore] = None
+        self._browser_lock: Optional[asyncio.Lock] = None
+
+        self.stats = {"fetches": 0, "failures": 0, "tabs_created": 0, "tabs_recycled": 0, "browser_launches": 0, "cookie_harvests": 0}
+
+    # ------------------------
+    # Thread / loop management
+    # ------------------------
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop and self._thread and self._thread.is_alive():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                self._tab_sem = asyncio.Semaphore(self.max_tabs)
+                self._browser_lock = asyncio.Lock()
+                loop.create_task(self._housekeeping())
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_run, daemon=True, name="nse-browser-pool")
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            return loop
+
+    def _submit(self, coro, timeout: Optional[float]):
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    # ------------------------
+    # Browser lifecycle (pool thread)
+    # ------------------------
+    async def _launch_browser(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        logger.info("Launching shared headless FIREFOX for NSE scraper...")
+        self._browser = await self._playwright.firefox.launch(headless=True)
+        self._browser_started = time.time()
+        self._generation += 1
+        self.stats["browser_launches"] += 1
+
+    async def _close_browser(self):
+        tabs, self._idle = self._idle, []
+        for tab in tabs:
+            await self._close_tab(tab)
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+        self._browser = None
+
+    async def _ensure_browser(self):
+        async with self._browser_lock:
+            if self._browser is not None and not self._browser.is_connected():
+                logger.warning("Shared browser disconnected. Relaunching...")
+                await self._close_browser()
+            elif (
+                self._browser is not None
+                and self._in_use == 0
+                and time.time() - self._browser_started > self.max_browser_age
+            ):
+                logger.info("Recycling shared browser (age limit reached).")
+                await self._close_browser()
+            if self._browser is None:
+                await self._launch_browser()
+
+    async def _new_tab(self) -> _Tab:
+        context = await self._browser.new_context(extra_http_headers=self.headers)
+        page = await context.new_page()
+        tab = _Tab(context, page, self._generation)
+        try:
+            # Visiting the homepage sets the session cookies the API endpoints expect
+            logger.info(f"Priming new scraper tab at {self.base_url}")
+            await page.goto(self.base_url, timeout=self.nav_timeout_ms)
+        except Exception:
+            await self._close_tab(tab)
+            raise
+        self.stats["tabs_created"] += 1
+        return tab
+
+    async def _close_tab(self, tab: _Tab):
+        try:
+            await tab.context.close()
+        except Exception:
+            pass
+
+    def _tab_is_healthy(self, tab: _Tab) -> bool:
+        return (
+            tab.generation == self._generation
+            and not tab.page.is_closed()
+            and tab.uses < self.recycle_after
+        )
+
+    async def _acquire_tab(self) -> _Tab:
+        await self._ensure_browser()
+        while self._idle:
+            tab = self._idle.pop()
+            if self._tab_is_healthy(tab):
+                return tab
+            self.stats["tabs_recycled"] += 1
+            await self._close_tab(tab)
+        return await self._new_tab()
+
+    async def _release_tab(self, tab: _Tab, healthy: bool):
+        if healthy and self._tab_is_healthy(tab):
+            tab.last_used = time.time()
+            self._idle.append(tab)
+        else:
+            self.stats["tabs_recycled"] += 1
+            await self._close_tab(tab)
+
+    async def _housekeeping(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                now = time.time()
+                tabs, self._idle = self._idle, []
+                for tab in tabs:
+                    if self._tab_is_healthy(tab) and now - tab.last_used < self.max_tab_idle:
+                        self._idle.append(tab)
+                    else:
+                        self.stats["tabs_recycled"] += 1
+                        await self._close_tab(tab)
+                if self._browser is not None:
+                    await self._ensure_browser()
+            except Exception as e:
+                logger.warning(f"Browser pool housekeeping failed: {e}")
+
+    async def _fetch_json(self, url: str) -> Any:
+        async with self._tab_sem:
+            self._in_use += 1
+            tab = None
+            healthy = False
+            try:
+                tab = await self._acquire_tab()
+                await tab.page.goto(url, timeout=self.nav_timeout_ms)
+                # The JSON response is rendered inside a <pre> tag
+                content = await tab.page.inner_text('pre')
+                data = json.loads(content)
+                tab.uses += 1
+                healthy = True
+                self.stats["fetches"] += 1
+                return data
+            except Exception:
+                self.stats["failures"] += 1
+                if tab is not None:
+                    try:
+                        snippet = (await tab.page.content())[:200]
+                        logger.error(f"Page content was: {snippet}...")
+                    except Exception:
+                        pass
+                raise
+            finally:
+                if tab is not None:
+                    await self._release_tab(tab, healthy)
+                self._in_use -= 1
+
+    async def _harvest_cookies(self) -> List[Dict[str, Any]]:
+        async with self._tab_sem:
+            self._in_use += 1
+            tab = None
+            healthy = False
+            try:
+                tab = await self._acquire_tab()
+                # Re-visit the homepage so NSE hands out a fresh session
+                await tab.page.goto(self.base_url, timeout=self.nav_timeout_ms)
+                cookies = await tab.context.cookies()
+                healthy = True
+                self.stats["cookie_harvests"] += 1
+                return cookies
+            finally:
+                if tab is not None:
+                    await self._release_tab(tab, healthy)
+                self._in_use -= 1
+
+    # ------------------------
+    # Public (thread-safe) API
+    # ------------------------
+    def fetch_json(self, url: str, timeout: Optional[float] = 120) -> Any:
+        """Navigate a pooled tab to `url` and return the parsed JSON body."""
+        return self._submit(self._fetch_json(url), timeout)
+
+    def harvest_cookies(self, timeout: Optional[float] = 120) -> List[Dict[str, Any]]:
+        """Prime a pooled tab on the homepage and return its session cookies."""
+        return self._submit(self._harvest_cookies(), timeout)
+
+    def health(self) -> Dict[str, Any]:
+        browser = self._browser
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "browser_connected": bool(browser is not None and browser.is_connected()),
+            "browser_age_sec": round(time.time() - self._browser_started, 1) if browser is not None else 0.0,
+            "idle_tabs": len(self._idle),
+            "in_use": self._in_use,
+            "max_tabs": self.max_tabs,
+            **self.stats,
+        }
+
+    def close(self):
+        loop = self._loop
+        if not loop or not self._thread or not self._thread.is_alive():
+            return
+
+        async def _shutdown():
+            await self._close_browser()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), loop).result(30)
+        except Exception as e:
+            logger.warning(f"Browser pool shutdown failed: {e}")
+        loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,116 @@
+# backend/services/bulk_writer.py
+"""
+Bulk writer for option legs.
+
+Takes the plain row tuples from parse_option_chain_rows and writes them without
+creating ORM objects:
+- PostgreSQL (psycopg2): streams the rows through `COPY ... FROM STDIN` (CSV).
+- Any other driver: one multi-row `executemany` INSERT through SQLAlchemy Core.
+
+It also provides the incremental helpers used to maintain option_chain_latest:
+upserts of changed legs via `INSERT ... ON CONFLICT` on the table's primary key,
+deletes of legs that disappeared, and the stock_data upsert.
+
+Runs on the session's current connection, so it is part of the caller's transaction.
+"""
+
+import csv
+import io
+from typing import Iterable, Sequence
+
+from sqlalchemy import insert, and_, delete, bindparam
+from sqlalchemy.orm import Session
+
+from models import OptionData, StockData
+from services.chain_columns import OPTION_COLUMNS
+
+# A leg is identified by these columns within a symbol
+LEG_KEY_COLUMNS = ('expiry_date', 'strike_price', 'option_type')
+
+
+def _csv_value(v):
+    if v is None:
+        return ''  # NULL in COPY's CSV format
+    if hasattr(v, 'isoformat'):
+        return v.isoformat()
+    return v
+
+
+def copy_option_rows(db: Session, rows: Sequence[tuple], table: str = OptionData.__tablename__) -> int:
+    """COPY rows (OPTION_COLUMNS order) into `table`. Requires a psycopg2 connection."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([_csv_value(v) for v in row])
+    buf.seek(0)
+
+    raw_conn = db.connection().connection
+    with raw_conn.cursor() as cur:
+        cur.copy_expert(
+            f"COPY {table} ({', '.join(OPTION_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
+    return len(rows)
+
+
+def insert_option_rows(db: Session, rows: Iterable[tuple], table=OptionData.__table__) -> int:
+    """Portable fallback: executemany INSERT from plain dicts."""
+    params = [dict(zip(OPTION_COLUMNS, row)) for row in rows]
+    if params:
+        db.execute(insert(table), params)
+    return len(params)
+
+
+def write_option_rows(db: Session, rows: Sequence[tuple], table=OptionData.__table__) -> int:
+    """Write option legs using the fastest path the database driver supports."""
+    if not rows:
+        return 0
+    if db.get_bind().dialect.driver == 'psycopg2':
+        return copy_option_rows(db, rows, table.name)
+    return insert_option_rows(db, rows, table)
+
+
+def _upsert_statement(db: Session, table):
+    # The app runs on PostgreSQL or SQLite; both spell the upsert as INSERT ... ON CONFLICT
+    if db.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(table)
+
+
+def upsert_option_rows(db: Session, rows: Sequence[tuple], table=OptionData.__table__) -> int:
+    """INSERT ... ON CONFLICT (primary key) DO UPDATE every non-key column of `rows`."""
+    if not rows:
+        return 0
+    pk = [c.name for c in table.primary_key.columns]
+    stmt = _upsert_statement(db, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=pk,
+        set_={c: stmt.excluded[c] for c in OPTION_COLUMNS if c not in pk},
+    )
+    db.execute(stmt, [dict(zip(OPTION_COLUMNS, row)) for row in rows])
+    return len(rows)
+
+
+def delete_option_legs(db: Session, symbol: str, keys: Sequence[tuple], table=OptionData.__table__) -> int:
+    """Delete legs of `symbol` identified by (expiry_date, strike_price, option_type) keys."""
+    if not keys:
+        return 0
+    stmt = delete(table).where(and_(
+        table.c.symbol == bindparam('b_symbol'),
+        *[table.c[c] == bindparam(f'b_{c}') for c in LEG_KEY_COLUMNS],
+    ))
+    params = [{'b_symbol': symbol, **{f'b_{c}': v for c, v in zip(LEG_KEY_COLUMNS, key)}} for key in keys]
+    db.execute(stmt, params)
+    return len(keys)
+
+
+def upsert_stock_row(db: Session, stock_row: dict):
+    """Insert or update the single stock_data row for a symbol (unique on symbol)."""
+    stmt = _upsert_statement(db, StockData.__table__).values(**stock_row)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['symbol'],
+        set_={'underlying_value': stmt.excluded.underlying_value, 'timestamp': stmt.excluded.timestamp},
+    )
+    db.execute(stmt)
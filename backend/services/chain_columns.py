@@ -0,0 +1,117 @@
+# backend/services/chain_columns.py
+"""
+Struct-of-arrays representation of one option-chain snapshot.
+
+Produced by data_parser.parse_option_chain_columns and consumed directly by the
+Greeks engine, the bulk writers, aggregates and API serialization, so a chain
+is never expanded into one Python object per leg unless a caller asks for it.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+# Column order of the plain rows produced for the writers (matches option_data)
+OPTION_COLUMNS = (
+    'timestamp', 'symbol', 'expiry_date', 'strike_price', 'option_type', 'last_price',
+    'iv', 'oi', 'volume', 'oi_change', 'delta', 'gamma', 'theta', 'vega',
+)
+
+# Per-leg array columns and their dtypes
+ARRAY_DTYPES = {
+    'expiry_date': 'datetime64[D]',
+    'strike_price': np.float64,
+    'option_type': '<U2',
+    'last_price': np.float64,
+    'iv': np.float64,
+    'oi': np.int64,
+    'volume': np.int64,
+    'oi_change': np.int64,
+    'delta': np.float64,
+    'gamma': np.float64,
+    'theta': np.float64,
+    'vega': np.float64,
+}
+
+
+def _empty(name: str) -> np.ndarray:
+    return np.empty(0, dtype=ARRAY_DTYPES[name])
+
+
+@dataclass
+class OptionChainColumns:
+    symbol: str
+    underlying_value: float
+    timestamp: datetime
+    expiry_date: np.ndarray = field(default_factory=lambda: _empty('expiry_date'))
+    strike_price: np.ndarray = field(default_factory=lambda: _empty('strike_price'))
+    option_type: np.ndarray = field(default_factory=lambda: _empty('option_type'))
+    last_price: np.ndarray = field(default_factory=lambda: _empty('last_price'))
+    iv: np.ndarray = field(default_factory=lambda: _empty('iv'))
+    oi: np.ndarray = field(default_factory=lambda: _empty('oi'))
+    volume: np.ndarray = field(default_factory=lambda: _empty('volume'))
+    oi_change: np.ndarray = field(default_factory=lambda: _empty('oi_change'))
+    delta: np.ndarray = field(default_factory=lambda: _empty('delta'))
+    gamma: np.ndarray = field(default_factory=lambda: _empty('gamma'))
+    theta: np.ndarray = field(default_factory=lambda: _empty('theta'))
+    vega: np.ndarray = field(default_factory=lambda: _empty('vega'))
+
+    def __len__(self) -> int:
+        return len(self.strike_price)
+
+    @property
+    def is_call(self) -> np.ndarray:
+        return self.option_type == 'CE'
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in ARRAY_DTYPES}
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.arrays().values())
+
+    def take(self, index) -> "OptionChainColumns":
+        """Subset (boolean mask) or reordering (integer indices) of the legs."""
+        return OptionChainColumns(
+            symbol=self.symbol,
+            underlying_value=self.underlying_value,
+            timestamp=self.timestamp,
+            **{name: arr[index] for name, arr in self.arrays().items()},
+        )
+
+    def sorted_by_strike(self) -> "OptionChainColumns":
+        return self.take(np.lexsort((self.option_type, self.expiry_date, self.strike_price)))
+
+    def stock_row(self) -> dict:
+        return {'symbol': self.symbol, 'underlying_value': self.underlying_value, 'timestamp': self.timestamp}
+
+    def rows(self) -> Iterator[tuple]:
+        """Plain tuples in OPTION_COLUMNS order (Python scalars, safe for any DB driver)."""
+        n = len(self)
+        return zip(
+            [self.timestamp] * n,
+            [self.symbol] * n,
+            self.expiry_date.tolist(),
+            *(getattr(self, name).tolist() for name in OPTION_COLUMNS[3:]),
+        )
+
+    def to_legs(self) -> List[dict]:
+        """Legs in the shape the frontend expects for /api/v1/option-chain."""
+        keys = ('oi_change', 'strike', 'type', 'lastPrice', 'iv', 'oi', 'volume', 'delta', 'gamma', 'theta', 'vega')
+        columns = (
+            self.oi_change, self.strike_price, self.option_type, self.last_price, self.iv,
+            self.oi, self.volume, self.delta, self.gamma, self.theta, self.vega,
+        )
+        return [dict(zip(keys, values)) for values in zip(*(c.tolist() for c in columns))]
+
+    def to_payload(self) -> dict:
+        """The /api/v1/option-chain response body."""
+        chain = self.sorted_by_strike()
+        return {
+            "symbol": chain.symbol,
+            "underlyingPrice": chain.underlying_value,
+            "timestamp": chain.timestamp.isoformat(),
+            "expiryDate": chain.expiry_date[0].item().isoformat() if len(chain) else None,
+            "legs": chain.to_legs(),
+        }
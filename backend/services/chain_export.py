@@ -0,0 +1,222 @@
+# backend/services/chain_export.py
+"""
+Bulk export of option chains as Apache Arrow IPC (stream format) or Parquet.
+
+One flat table, one row per leg, for any number of symbols:
+
+    timestamp, symbol, underlying_value, expiry_date, strike_price, option_type,
+    last_price, iv, oi, volume, oi_change, delta, gamma, theta, vega
+
+- Latest chains come from the chain store: the NumPy columns of each
+  OptionChainColumns are handed to Arrow as they are (numeric columns
+  without a copy), no per-leg objects.
+- History ranges are streamed from option_data (joined with the spot in
+  option_chain_metrics) in EXPORT_BATCH_ROWS partitions, each turned into
+  one record batch column by column; archived days are read from the
+  Parquet archive as Arrow tables directly, one day file at a time.
+
+Batches are regrouped to about EXPORT_BATCH_ROWS rows (one Parquet row
+group each) and encoded incrementally, so a large export is never held in
+memory as a whole.
+
+Needs pyarrow (optional dependency).
+"""
+
+import io
+import os
+from datetime import datetime, time, timezone
+from typing import Iterable, Iterator, List, Sequence
+
+import numpy as np
+from sqlalchemy import and_, select
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: export endpoint disabled
+    pa = None
+
+from models import OptionChainMetrics, OptionData
+from services import snapshot_archive
+from services.chain_columns import ARRAY_DTYPES, OptionChainColumns
+from services.chain_repository import db_time, from_db_time
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "100000"))
+EXPORT_MAX_SYMBOLS = int(os.getenv("EXPORT_MAX_SYMBOLS", "100"))
+
+EXPORT_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+_HEADER_COLUMNS = ("timestamp", "symbol", "underlying_value")
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def _arrow_type(dtype):
+    dtype = np.dtype(dtype)
+    if dtype.kind == "M":
+        return pa.date32()
+    if dtype.kind == "U":
+        return pa.string()
+    return pa.from_numpy_dtype(dtype)
+
+
+def export_schema():
+    return pa.schema(
+        [("timestamp", pa.timestamp("us", tz="UTC")), ("symbol", pa.string()), ("underlying_value", pa.float64())]
+        + [(name, _arrow_type(dtype)) for name, dtype in ARRAY_DTYPES.items()]
+    )
+
+
+def _repeat(value, n: int, type_):
+    return pa.array([value] * n, type=type_) if n else pa.array([], type=type_)
+
+
+def chain_batch(chain: OptionChainColumns):
+    """One record batch from a chain's column arrays."""
+    schema = export_schema()
+    n = len(chain)
+    timestamp = from_db_time(chain.timestamp).astimezone(timezone.utc) if chain.timestamp else None
+    arrays = [
+        _repeat(timestamp, n, schema.field("timestamp").type),
+        _repeat(chain.symbol, n, pa.string()),
+        _repeat(chain.underlying_value, n, pa.float64()),
+    ]
+    for name in ARRAY_DTYPES:
+        arrays.append(pa.array(getattr(chain, name), type=schema.field(name).type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def latest_batches(chains: Iterable[OptionChainColumns]) -> Iterator:
+    for chain in chains:
+        if len(chain):
+            yield chain_batch(chain)
+
+
+# ------------------------
+# History
+# ------------------------
+
+def _history_statement(symbol: str, start: datetime, end: datetime):
+    legs = OptionData.__table__
+    metrics = OptionChainMetrics.__table__
+    return (
+        select(legs.c.timestamp, legs.c.symbol, metrics.c.underlying_value, *[legs.c[n] for n in ARRAY_DTYPES])
+        .select_from(legs.outerjoin(metrics, and_(
+            metrics.c.timestamp == legs.c.timestamp,
+            metrics.c.symbol == legs.c.symbol,
+            metrics.c.expiry_date == legs.c.expiry_date,
+        )))
+        .where(legs.c.symbol == symbol, legs.c.timestamp >= start, legs.c.timestamp <= end)
+        .order_by(legs.c.timestamp, legs.c.expiry_date, legs.c.strike_price, legs.c.option_type)
+    )
+
+
+def _rows_batch(rows: Sequence[tuple], schema):
+    columns = list(zip(*rows))
+    columns[0] = [from_db_time(t) for t in columns[0]]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for field, values in zip(schema, columns)], schema=schema
+    )
+
+
+def _archived_batches(symbol: str, start: datetime, end: datetime, schema) -> Iterator:
+    """Archived legs one day file at a time (files are day-partitioned), each joined with that day's spots."""
+    for day, legs in snapshot_archive.iter_days(OptionData.__tablename__, symbol, start, end):
+        if not legs.num_rows:
+            continue
+        day_start = max(start, datetime.combine(day, time.min, tzinfo=timezone.utc))
+        day_end = min(end, datetime.combine(day, time.max, tzinfo=timezone.utc))
+        spots = next((t for _, t in snapshot_archive.iter_days(
+            OptionChainMetrics.__tablename__, symbol, day_start, day_end, ["timestamp", "expiry_date", "underlying_value"]
+        )), None)
+        if spots is not None:
+            legs = legs.join(spots, keys=["timestamp", "expiry_date"], join_type="left outer")
+        else:
+            legs = legs.append_column("underlying_value", pa.nulls(legs.num_rows, pa.float64()))
+        table = legs.select(schema.names).cast(schema).sort_by(
+            [("timestamp", "ascending"), ("expiry_date", "ascending"), ("strike_price", "ascending")]
+        )
+        yield from table.to_batches(max_chunksize=EXPORT_BATCH_ROWS)
+
+
+def history_batches(engine, symbols: Sequence[str], start: datetime, end: datetime) -> Iterator:
+    """Legs of every snapshot of `symbols` in [start, end], archive first, symbol by symbol."""
+    schema = export_schema()
+    boundary = snapshot_archive.archived_before(OptionData.__tablename__)
+    for symbol in symbols:
+        if boundary is not None and start < boundary:
+            yield from _archived_batches(symbol, start, min(end, boundary), schema)
+        with engine.connect() as conn:
+            dialect = conn.dialect.name
+            stmt = _history_statement(symbol, db_time(dialect, start), db_time(dialect, end))
+            result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_ROWS).execute(stmt)
+            for rows in result.partitions():
+                yield _rows_batch(rows, schema)
+
+
+# ------------------------
+# Encoding
+# ------------------------
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def _regroup(batches: Iterable, schema, rows: int) -> Iterator:
+    """Tables of about `rows` rows from a stream of (possibly small) batches."""
+    pending, count = [], 0
+    for batch in batches:
+        pending.append(batch)
+        count += batch.num_rows
+        if count >= rows:
+            yield pa.Table.from_batches(pending, schema=schema).combine_chunks()
+            pending, count = [], 0
+    if pending or count == 0:
+        yield pa.Table.from_batches(pending, schema=schema).combine_chunks()
+
+
+def encode(batches: Iterable, fmt: str) -> Iterator[bytes]:
+    """Encode record batches as an Arrow IPC stream or a Parquet file, chunk by chunk."""
+    schema = export_schema()
+    sink = _ChunkSink()
+    out = pa.PythonFile(sink, mode="w")
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(out, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(out, schema)
+    try:
+        for table in _regroup(batches, schema, EXPORT_BATCH_ROWS):
+            if table.num_rows:
+                writer.write_table(table)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,293 @@
+# backend/services/chain_history.py
+"""
+Reads over the stored history.
+
+- Chain as of a time: the last option_data snapshot at or before `as_of`
+  (one seek on (symbol, timestamp DESC)), its legs, and the spot recorded
+  for it in option_chain_metrics.
+- Metric series: per-expiry rows from option_chain_metrics, downsampled to a
+  point budget. The bucket width is range / points and the source is the
+  coarsest relation that still resolves it: raw rows, the 1-minute or the
+  5-minute continuous aggregate (migration v0003). With the aggregates the
+  bucketing runs in SQL (time_bucket + last), so at most `points` rows come
+  back and a wide range reads at most one row per 5 minutes. Without them
+  (SQLite, plain Postgres) the raw rows are bucketed here.
+- Ranges older than the retention window live in the Parquet archive
+  (snapshot_archive); both reads fall through to it transparently. Archived
+  metric rows are bucketed in Arrow before they reach Python, so old ranges
+  stay within the same point budget.
+
+Statements are shared by the sync and async loaders, as in chain_repository.
+"""
+
+import asyncio
+import math
+import os
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import DateTime, func, select, text
+
+from models import OptionChainMetrics, OptionData
+from services.chain_columns import ARRAY_DTYPES, OptionChainColumns
+from services.chain_repository import chain_from_rows, db_time, from_db_time
+from services import snapshot_archive
+from services.market_calendar import IST
+
+# Metrics available as series (columns of option_chain_metrics and of both aggregates)
+HISTORY_METRICS = ('pcr', 'call_oi', 'put_oi', 'atm_iv', 'atm_strike', 'underlying_value', 'max_pain_strike')
+HISTORY_MAX_POINTS = int(os.getenv("HISTORY_MAX_POINTS", "2000"))
+HISTORY_MAX_DAYS = int(os.getenv("HISTORY_MAX_DAYS", "400"))
+
+# (smallest bucket width in seconds it can serve, relation, time column), coarsest first
+_SOURCES = (
+    (300, 'option_chain_metrics_5m', 'bucket'),
+    (60, 'option_chain_metrics_1m', 'bucket'),
+    (0, 'option_chain_metrics', 'timestamp'),
+)
+_RAW_SOURCE = _SOURCES[-1]
+
+# Whether the continuous aggregates exist (checked once per process)
+_aggregates_available: Optional[bool] = None
+
+
+def normalize_time(dt: datetime) -> datetime:
+    """Query parameters without an offset are IST wall-clock times."""
+    return IST.localize(dt) if dt.tzinfo is None else dt
+
+
+def _dialect(db) -> str:
+    return db.get_bind().dialect.name
+
+
+@dataclass
+class SeriesQuery:
+    symbol: str
+    metrics: Sequence[str]
+    start: datetime
+    end: datetime
+    points: int
+    expiry: Optional[date] = None
+
+    @property
+    def width(self) -> int:
+        """Bucket width in seconds that fits the range into the point budget."""
+        return max(1, math.ceil((self.end - self.start).total_seconds() / self.points))
+
+
+def _choose_source(width: int, aggregates: bool) -> Tuple[int, str, str]:
+    if not aggregates:
+        return _RAW_SOURCE
+    return next(s for s in _SOURCES if width >= s[0])
+
+
+# ------------------------
+# Statements
+# ------------------------
+
+def _aggregates_statement():
+    return text("SELECT to_regclass('option_chain_metrics_1m') IS NOT NULL "
+                "AND to_regclass('option_chain_metrics_5m') IS NOT NULL")
+
+
+def _as_of_statement(symbol: str, as_of: datetime):
+    return select(func.max(OptionData.timestamp)).where(OptionData.symbol == symbol, OptionData.timestamp <= as_of)
+
+
+def _snapshot_legs_statement(symbol: str, timestamp: datetime):
+    columns = [getattr(OptionData, name) for name in ARRAY_DTYPES]
+    return (
+        select(*columns)
+        .where(OptionData.symbol == symbol, OptionData.timestamp == timestamp)
+        .order_by(OptionData.strike_price)
+    )
+
+
+def _spot_statement(symbol: str, timestamp: datetime):
+    return (
+        select(OptionChainMetrics.underlying_value)
+        .where(OptionChainMetrics.symbol == symbol, OptionChainMetrics.timestamp == timestamp)
+        .limit(1)
+    )
+
+
+def _default_expiry_statement(query: SeriesQuery, start: datetime, end: datetime):
+    # Nearest expiry still live at the end of the range, so the series spans all of it
+    return select(func.min(OptionChainMetrics.expiry_date)).where(
+        OptionChainMetrics.symbol == query.symbol,
+        OptionChainMetrics.expiry_date >= query.end.astimezone(IST).date(),
+        OptionChainMetrics.timestamp >= start,
+        OptionChainMetrics.timestamp <= end,
+    )
+
+
+def _series_statement(query: SeriesQuery, source: Tuple[int, str, str], bucketed: bool):
+    _, relation, time_col = source
+    if bucketed:
+        columns = ", ".join(f"last({m}, {time_col}) AS {m}" for m in query.metrics)
+        sql = f"""
+            SELECT time_bucket(make_interval(secs => :width), {time_col}) AS t, {columns}
+            FROM {relation}
+            WHERE symbol = :symbol AND expiry_date = :expiry AND {time_col} >= :start AND {time_col} <= :end
+            GROUP BY t ORDER BY t
+        """
+    else:
+        sql = f"""
+            SELECT {time_col} AS t, {", ".join(query.metrics)}
+            FROM {relation}
+            WHERE symbol = :symbol AND expiry_date = :expiry AND {time_col} >= :start AND {time_col} <= :end
+            ORDER BY t
+        """
+    return text(sql).columns(t=DateTime(timezone=True))
+
+
+# ------------------------
+# Downsampling and payloads
+# ------------------------
+
+def downsample(rows: Sequence[tuple], width: int) -> List[tuple]:
+    """Last row per `width`-second bucket of time-ordered (t, ...) rows, labelled with the
+    bucket start (epoch-aligned, like time_bucket)."""
+    if not rows:
+        return []
+    epoch = np.fromiter((r[0].timestamp() for r in rows), dtype=np.float64, count=len(rows))
+    buckets = np.floor(epoch / width).astype(np.int64)
+    last = np.flatnonzero(np.append(buckets[1:] != buckets[:-1], True))
+    return [
+        (datetime.fromtimestamp(int(buckets[i]) * width, tz=rows[i][0].tzinfo), *rows[i][1:])
+        for i in last.tolist()
+    ]
+
+
+def series_payload(query: SeriesQuery, expiry: Optional[date], source: str, rows: Sequence[tuple]) -> dict:
+    return {
+        "symbol": query.symbol,
+        "expiry": expiry.isoformat() if expiry else None,
+        "start": query.start.isoformat(),
+        "end": query.end.isoformat(),
+        "interval_seconds": query.width,
+        "source": source,
+        "metrics": list(query.metrics),
+        "points": [
+            {"time": row[0].isoformat(), **{m: v for m, v in zip(query.metrics, row[1:])}}
+            for row in rows
+        ],
+    }
+
+
+def _archive_window(query: SeriesQuery) -> Optional[Tuple[datetime, datetime]]:
+    """The part of the range that has been moved to the archive, if any."""
+    boundary = snapshot_archive.archived_before(OptionChainMetrics.__tablename__)
+    if boundary is None or query.start >= boundary:
+        return None
+    return query.start, min(query.end, boundary)
+
+
+def _series_result(query: SeriesQuery, expiry: date, source: str, rows, bucketed: bool, archived: List[tuple]) -> dict:
+    # `archived` is already bucketed to query.width (at most `points` rows); re-bucketing the
+    # merge only matters for the bucket that straddles the archive boundary
+    if archived:
+        merged = archived + [(from_db_time(r[0]), *r[1:]) for r in rows]
+        merged.sort(key=lambda r: r[0])
+        return series_payload(query, expiry, f"archive+{source}", downsample(merged, query.width))
+    return series_payload(query, expiry, source, rows if bucketed else downsample(rows, query.width))
+
+
+def _archived_as_of(symbol: str, as_of: datetime) -> Optional[OptionChainColumns]:
+    boundary = snapshot_archive.archived_before(OptionData.__tablename__)
+    if boundary is None:
+        return None
+    return snapshot_archive.read_chain_as_of(symbol, min(as_of, boundary))
+
+
+def _snapshot_chain(symbol: str, timestamp: datetime, spot, rows) -> Optional[OptionChainColumns]:
+    if not rows:
+        return None
+    return chain_from_rows(symbol, spot, timestamp, rows)
+
+
+# ------------------------
+# Sync loaders
+# ------------------------
+
+def _has_aggregates(db) -> bool:
+    global _aggregates_available
+    if _aggregates_available is None:
+        _aggregates_available = _dialect(db) == 'postgresql' and bool(db.execute(_aggregates_statement()).scalar())
+    return _aggregates_available
+
+
+def load_chain_as_of(db, symbol: str, as_of: datetime) -> Optional[OptionChainColumns]:
+    """The stored snapshot of `symbol` current at `as_of`, or None if there is none."""
+    timestamp = db.execute(_as_of_statement(symbol, db_time(_dialect(db), as_of))).scalar()
+    if timestamp is None:
+        return _archived_as_of(symbol, as_of)
+    spot = db.execute(_spot_statement(symbol, timestamp)).scalar()
+    rows = db.execute(_snapshot_legs_statement(symbol, timestamp)).all()
+    return _snapshot_chain(symbol, timestamp, spot, rows)
+
+
+def load_metric_series(db, query: SeriesQuery) -> dict:
+    dialect = _dialect(db)
+    start, end = db_time(dialect, query.start), db_time(dialect, query.end)
+    window = _archive_window(query)
+    expiry = query.expiry or db.execute(_default_expiry_statement(query, start, end)).scalar()
+    if expiry is None and window:
+        expiry = snapshot_archive.find_expiry(query.symbol, query.start, query.end)
+    aggregates = _has_aggregates(db)
+    source = _choose_source(query.width, aggregates)
+    if expiry is None:
+        return series_payload(query, None, source[1], [])
+    params = {"symbol": query.symbol, "expiry": expiry, "start": start, "end": end, "width": float(query.width)}
+    rows = db.execute(_series_statement(query, source, aggregates), params).all()
+    archived = (
+        snapshot_archive.read_metric_rows(query.symbol, expiry, *window, query.metrics, query.width) if window else []
+    )
+    return _series_result(query, expiry, source[1], rows, aggregates, archived)
+
+
+# ------------------------
+# Async loaders (read endpoints)
+# ------------------------
+
+async def _has_aggregates_async(db) -> bool:
+    global _aggregates_available
+    if _aggregates_available is None:
+        _aggregates_available = (
+            _dialect(db) == 'postgresql' and bool((await db.execute(_aggregates_statement())).scalar())
+        )
+    return _aggregates_available
+
+
+async def load_chain_as_of_async(db, symbol: str, as_of: datetime) -> Optional[OptionChainColumns]:
+    timestamp = (await db.execute(_as_of_statement(symbol, db_time(_dialect(db), as_of)))).scalar()
+    if timestamp is None:
+        # Parquet reads are blocking
+        return await asyncio.to_thread(_archived_as_of, symbol, as_of)
+    spot = (await db.execute(_spot_statement(symbol, timestamp))).scalar()
+    rows = (await db.execute(_snapshot_legs_statement(symbol, timestamp))).all()
+    return _snapshot_chain(symbol, timestamp, spot, rows)
+
+
+async def load_metric_series_async(db, query: SeriesQuery) -> dict:
+    dialect = _dialect(db)
+    start, end = db_time(dialect, query.start), db_time(dialect, query.end)
+    # The archive manifest is read from disk under the retention job's lock
+    window = await asyncio.to_thread(_archive_window, query)
+    expiry = query.expiry or (await db.execute(_default_expiry_statement(query, start, end))).scalar()
+    if expiry is None and window:
+        expiry = await asyncio.to_thread(snapshot_archive.find_expiry, query.symbol, query.start, query.end)
+    aggregates = await _has_aggregates_async(db)
+    source = _choose_source(query.width, aggregates)
+    if expiry is None:
+        return series_payload(query, None, source[1], [])
+    params = {"symbol": query.symbol, "expiry": expiry, "start": start, "end": end, "width": float(query.width)}
+    rows = (await db.execute(_series_statement(query, source, aggregates), params)).all()
+    archived = []
+    if window:
+        archived = await asyncio.to_thread(
+            snapshot_archive.read_metric_rows, query.symbol, expiry, *window, query.metrics, query.width
+        )
+    return _series_result(query, expiry, source[1], rows, aggregates, archived)
@@ -0,0 +1,78 @@
+# backend/services/chain_repository.py
+"""
+Loads option chains from Postgres straight into OptionChainColumns
+(column tuples -> NumPy arrays, no ORM objects per leg).
+
+The same Core statements back the sync loader (ingestion, tools) and the
+async one used by the read endpoints.
+"""
+
+import logging
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import OptionChainLatest, StockData
+from services.chain_columns import OptionChainColumns, ARRAY_DTYPES
+from services.market_calendar import IST
+
+if TYPE_CHECKING:  # the asyncio extension is optional (see database.py)
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+def db_time(dialect: str, dt: datetime) -> datetime:
+    """A timezone-aware bound parameter as the database stores timestamps."""
+    # SQLite keeps the IST wall-clock time the parser stamped, without the offset
+    return dt if dialect == 'postgresql' else dt.astimezone(IST).replace(tzinfo=None)
+
+
+def from_db_time(value: datetime) -> datetime:
+    """Inverse of db_time: naive values read back from SQLite are IST."""
+    return IST.localize(value) if value.tzinfo is None else value
+
+
+def chain_from_rows(symbol: str, underlying_value: float, timestamp, rows) -> OptionChainColumns:
+    """Build a chain from row tuples ordered like ARRAY_DTYPES (NULL numbers become 0)."""
+    columns = list(zip(*rows)) if rows else [[] for _ in ARRAY_DTYPES]
+    arrays = {}
+    for (name, dtype), values in zip(ARRAY_DTYPES.items(), columns):
+        if np.dtype(dtype).kind in 'if':
+            values = [0 if v is None else v for v in values]
+        arrays[name] = np.array(values, dtype=dtype)
+    return OptionChainColumns(symbol=symbol, underlying_value=underlying_value, timestamp=timestamp, **arrays)
+
+
+def _stock_statement(symbol: str):
+    return select(StockData.underlying_value, StockData.timestamp).where(StockData.symbol == symbol)
+
+
+def _legs_statement(symbol: str):
+    columns = [getattr(OptionChainLatest, name) for name in ARRAY_DTYPES]
+    return select(*columns).where(OptionChainLatest.symbol == symbol).order_by(OptionChainLatest.strike_price)
+
+
+def load_latest_chain(db: Session, symbol: str) -> Optional[OptionChainColumns]:
+    """The current chain for `symbol` from option_chain_latest, or None if nothing is stored."""
+    stock = db.execute(_stock_statement(symbol)).first()
+    if not stock:
+        return None
+    rows = db.execute(_legs_statement(symbol)).all()
+    if not rows:
+        return None
+    return chain_from_rows(symbol, stock.underlying_value, stock.timestamp, rows)
+
+
+async def load_latest_chain_async(db: "AsyncSession", symbol: str) -> Optional[OptionChainColumns]:
+    """Async twin of load_latest_chain for the read endpoints."""
+    stock = (await db.execute(_stock_statement(symbol))).first()
+    if not stock:
+        return None
+    rows = (await db.execute(_legs_statement(symbol))).all()
+    if not rows:
+        return None
+    return chain_from_rows(symbol, stock.underlying_value, stock.timestamp, rows)
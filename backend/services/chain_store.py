@@ -0,0 +1,422 @@
+# backend/services/chain_store.py
+"""
+Store of the latest option chain per symbol.
+
+Ingestion publishes every parsed snapshot here after it is committed. Each
+entry is immutable and carries:
+- the chain as compact OptionChainColumns arrays (sorted by strike),
+- a monotonically increasing version (store-wide counter),
+- the /api/v1/option-chain response, serialized to JSON once at publish time,
+- the chain's aggregates (analysis_service.summarize_chain: PCR, OI totals,
+  max-OI strikes, IVs, max pain), computed once per snapshot.
+
+Reads are a dict lookup, so serving the chain costs the same for 50 or 5,000
+legs. Postgres is only consulted on a cold miss (e.g. right after a restart).
+
+Two implementations:
+- ChainStore: plain in-process dict (one API process).
+- SharedChainStore (CHAIN_STORE_SHARED=1, default): snapshots live in mmap'd
+  segment files under CHAIN_STORE_DIR (tmpfs /dev/shm when available), so all
+  uvicorn workers map the same pages instead of each holding a copy. Exactly one
+  process (the ingest leader, see services/ingest_leader.py) writes:
+
+    <dir>/<SYMBOL>.<version>.seg   header (incl. summary) + column arrays + response JSON
+    <dir>/index.json               {symbol: {"version", "file", "timestamp"}}
+    <dir>/generation               8-byte counter, bumped after every publish
+
+  A segment is fully written and renamed into place before the index points at
+  it, and the index is swapped before the generation is bumped. Readers check
+  the generation (one memory read) on each lookup and only re-read the index
+  when it moved; arrays are np.frombuffer views over the read-only mapping.
+  Replaced segments are unlinked right away; readers that still map them keep
+  a valid view until they move on.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import quote
+
+import numpy as np
+
+from services.analysis_service import summarize_chain
+from services.chain_columns import OptionChainColumns
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ChainSnapshot:
+    chain: OptionChainColumns
+    version: int
+    published_at: float
+    payload_json: bytes
+    summary: dict
+
+    @property
+    def symbol(self) -> str:
+        return self.chain.symbol
+
+    @property
+    def timestamp(self):
+        return self.chain.timestamp
+
+
+def _is_older(ts, than) -> bool:
+    try:
+        return ts < than
+    except TypeError:  # naive vs aware (e.g. SQLite drops the zone); can't tell, so accept
+        return False
+
+
+class ChainStore:
+
+    def __init__(self):
+        self._snapshots: Dict[str, ChainSnapshot] = {}
+        self._versions = itertools.count(1)
+        self._write_lock = threading.Lock()
+        self.stats = {"published": 0, "stale_rejected": 0, "hits": 0, "cold_loads": 0}
+
+    def become_writer(self):
+        """Nothing to set up for a process-local store."""
+
+    @staticmethod
+    def _render(chain: OptionChainColumns, version: int) -> bytes:
+        payload = chain.to_payload()
+        payload["version"] = version
+        payload["_cached"] = True
+        return json.dumps(payload).encode()
+
+    def publish(self, chain: OptionChainColumns) -> Optional[ChainSnapshot]:
+        """
+        Make `chain` the current snapshot for its symbol.
+        A chain older than the one already stored is ignored (e.g. a slow cold load
+        racing an ingestion cycle); returns None in that case.
+        """
+        chain = chain.sorted_by_strike()
+        with self._write_lock:
+            current = self._snapshots.get(chain.symbol)
+            if current is not None and _is_older(chain.timestamp, current.timestamp):
+                self.stats["stale_rejected"] += 1
+                return None
+            version = next(self._versions)
+            snapshot = ChainSnapshot(
+                chain=chain,
+                version=version,
+                published_at=time.time(),
+                payload_json=self._render(chain, version),
+                summary=summarize_chain(chain).to_dict(),
+            )
+            # Single reference swap: readers see either the old or the new snapshot
+            self._snapshots[chain.symbol] = snapshot
+            self.stats["published"] += 1
+        return snapshot
+
+    def get(self, symbol: str) -> Optional[ChainSnapshot]:
+        snapshot = self._snapshots.get(symbol)
+        if snapshot is not None:
+            self.stats["hits"] += 1
+        return snapshot
+
+    def _needs_io(self, symbol: str) -> bool:
+        """Whether get(symbol) would touch files (never, for the process-local store)."""
+        return False
+
+    async def get_async(self, symbol: str) -> Optional[ChainSnapshot]:
+        """get() for the event loop: answered inline when it is a memory lookup, else in a thread."""
+        if self._needs_io(symbol):
+            return await asyncio.to_thread(self.get, symbol)
+        return self.get(symbol)
+
+    async def get_or_load_async(
+        self, symbol: str, loader: Callable[[str], Awaitable[Optional[OptionChainColumns]]]
+    ) -> Optional[ChainSnapshot]:
+        """
+        Current snapshot, falling back to `loader` (the database) on a cold miss.
+        `loader` is awaited, and the publish (sort, JSON rendering, summary,
+        segment writes) runs in a thread.
+        """
+        snapshot = await self.get_async(symbol)
+        if snapshot is not None:
+            return snapshot
+        chain = await loader(symbol)
+        if chain is None or not len(chain):
+            return None
+        self.stats["cold_loads"] += 1
+        return await asyncio.to_thread(self.publish, chain) or await self.get_async(symbol)
+
+    def status(self) -> dict:
+        snapshots = list(self._snapshots.values())
+        return {
+            "mode": "memory",
+            "symbols": len(snapshots),
+            "legs": sum(len(s.chain) for s in snapshots),
+            "array_bytes": sum(s.chain.nbytes() for s in snapshots),
+            "payload_bytes": sum(len(s.payload_json) for s in snapshots),
+            **self.stats,
+        }
+
+
+# ------------------------
+# Shared (mmap) segments
+# ------------------------
+_MAGIC = b"CHS1"
+_ALIGN = 8
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _encode_segment(chain: OptionChainColumns, version: int, payload_json: bytes, summary: dict) -> bytes:
+    """MAGIC | uint32 header length | header JSON | 8-aligned column blocks | payload JSON."""
+    blocks, layout, offset = [], {}, 0
+    for name, arr in chain.arrays().items():
+        data = np.ascontiguousarray(arr).tobytes()
+        layout[name] = [arr.dtype.str, offset, len(arr)]
+        blocks.append(data + b"\0" * (_aligned(len(data)) - len(data)))
+        offset += _aligned(len(data))
+    header = json.dumps({
+        "symbol": chain.symbol,
+        "underlying_value": chain.underlying_value,
+        "timestamp": chain.timestamp.isoformat(),
+        "version": version,
+        "summary": summary,
+        "columns": layout,
+        "payload": [offset, len(payload_json)],
+    }).encode()
+    prefix = _MAGIC + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * (_aligned(len(prefix)) - len(prefix))
+    return prefix + b"".join(blocks) + payload_json
+
+
+def _decode_segment(buf: mmap.mmap) -> ChainSnapshot:
+    if buf[:4] != _MAGIC:
+        raise ValueError("not a chain segment")
+    (header_len,) = struct.unpack_from("<I", buf, 4)
+    header = json.loads(bytes(buf[8:8 + header_len]))
+    base = _aligned(8 + header_len)
+    arrays = {
+        name: np.frombuffer(buf, dtype=np.dtype(dtype), count=count, offset=base + offset)
+        for name, (dtype, offset, count) in header["columns"].items()
+    }
+    payload_offset, payload_len = header["payload"]
+    start = base + payload_offset
+    chain = OptionChainColumns(
+        symbol=header["symbol"],
+        underlying_value=header["underlying_value"],
+        timestamp=datetime.fromisoformat(header["timestamp"]),
+        **arrays,
+    )
+    return ChainSnapshot(
+        chain=chain,
+        version=header["version"],
+        published_at=time.time(),
+        payload_json=bytes(buf[start:start + payload_len]),
+        summary=header["summary"],
+    )
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def default_store_dir() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.getenv("CHAIN_STORE_DIR", os.path.join(base, "cme-chain-store"))
+
+
+class SharedChainStore(ChainStore):
+    """
+    mmap-backed store shared by all worker processes on the host.
+
+    Processes other than the writer never touch the segment files: a cold-loaded
+    or admin-refreshed chain in a reader is kept process-locally (base class) and
+    only used while the shared index has nothing for that symbol.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        super().__init__()
+        self.directory = directory or default_store_dir()
+        self.is_writer = False
+        self._index: Dict[str, dict] = {}
+        self._generation_seen = -1
+        self._generation_map: Optional[mmap.mmap] = None
+        self._mapped: Dict[str, ChainSnapshot] = {}
+        self._map_lock = threading.Lock()
+        self.stats.update({"segments_mapped": 0, "index_reloads": 0})
+
+    # --- paths ---
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _segment_name(self, symbol: str, version: int) -> str:
+        return f"{quote(symbol, safe='')}.{version}.seg"
+
+    # --- writer ---
+    def become_writer(self):
+        """Called by the ingest leader before its first publish."""
+        os.makedirs(self.directory, exist_ok=True)
+        gen_path = self._path("generation")
+        if not os.path.exists(gen_path):
+            _write_atomic(gen_path, struct.pack("<Q", 0))
+        with open(gen_path, "r+b") as f:
+            self._generation_map = mmap.mmap(f.fileno(), 8)
+        with self._map_lock:
+            self._load_index()
+            # Continue numbering after whatever a previous writer left behind
+            last = max((e["version"] for e in self._index.values()), default=0)
+            self._versions = itertools.count(last + 1)
+            self.is_writer = True
+        self._remove_orphans()
+        logger.info(f"🗂️  Chain store: this process ({os.getpid()}) is the writer, {len(self._index)} symbols in {self.directory}")
+
+    def _remove_orphans(self):
+        live = {e["file"] for e in self._index.values()}
+        for name in os.listdir(self.directory):
+            if (name.endswith(".seg") or ".tmp." in name) and name not in live:
+                try:
+                    os.unlink(self._path(name))
+                except OSError:
+                    pass
+
+    def publish(self, chain: OptionChainColumns) -> Optional[ChainSnapshot]:
+        if not self.is_writer:
+            return super().publish(chain)
+        chain = chain.sorted_by_strike()
+        with self._write_lock:
+            current = self.get(chain.symbol)
+            if current is not None and _is_older(chain.timestamp, current.timestamp):
+                self.stats["stale_rejected"] += 1
+                return None
+            version = next(self._versions)
+            payload_json = self._render(chain, version)
+            summary = summarize_chain(chain).to_dict()
+            name = self._segment_name(chain.symbol, version)
+            _write_atomic(self._path(name), _encode_segment(chain, version, payload_json, summary))
+
+            previous = self._index.get(chain.symbol)
+            index = dict(self._index)
+            index[chain.symbol] = {"version": version, "file": name, "timestamp": chain.timestamp.isoformat()}
+            _write_atomic(self._path("index.json"), json.dumps(index).encode())
+            snapshot = ChainSnapshot(
+                chain=chain, version=version, published_at=time.time(), payload_json=payload_json, summary=summary,
+            )
+            with self._map_lock:
+                self._index = index
+                self._mapped[chain.symbol] = snapshot
+                generation = struct.unpack_from("<Q", self._generation_map, 0)[0] + 1
+                struct.pack_into("<Q", self._generation_map, 0, generation)
+                self._generation_seen = generation
+            if previous:
+                try:
+                    os.unlink(self._path(previous["file"]))
+                except OSError:
+                    pass
+            self.stats["published"] += 1
+        return snapshot
+
+    # --- readers ---
+    def _load_index(self):
+        try:
+            with open(self._path("index.json"), "rb") as f:
+                self._index = json.loads(f.read())
+        except FileNotFoundError:
+            self._index = {}
+        self.stats["index_reloads"] += 1
+
+    def _current_generation(self) -> int:
+        if self._generation_map is None:
+            try:
+                with open(self._path("generation"), "rb") as f:
+                    self._generation_map = mmap.mmap(f.fileno(), 8, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                return 0  # no writer has started yet
+        return struct.unpack_from("<Q", self._generation_map, 0)[0]
+
+    def _needs_io(self, symbol: str) -> bool:
+        if self._generation_map is None:
+            return True
+        if struct.unpack_from("<Q", self._generation_map, 0)[0] != self._generation_seen:
+            return True  # index.json has to be re-read
+        entry = self._index.get(symbol)
+        if entry is None:
+            return False
+        snapshot = self._mapped.get(symbol)
+        return snapshot is None or snapshot.version != entry["version"]  # segment has to be mapped
+
+    def _sync(self):
+        generation = self._current_generation()
+        if generation != self._generation_seen:
+            with self._map_lock:
+                if generation != self._generation_seen:
+                    self._load_index()
+                    self._generation_seen = generation
+
+    def _map(self, symbol: str, entry: dict) -> Optional[ChainSnapshot]:
+        with self._map_lock:
+            snapshot = self._mapped.get(symbol)
+            if snapshot is not None and snapshot.version == entry["version"]:
+                return snapshot
+            try:
+                with open(self._path(entry["file"]), "rb") as f:
+                    buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except FileNotFoundError:
+                # Superseded between reading the index and opening it; the next sync picks up the new one
+                self._generation_seen = -1
+                return snapshot
+            snapshot = _decode_segment(buf)
+            self._mapped[symbol] = snapshot
+            self.stats["segments_mapped"] += 1
+            return snapshot
+
+    def get(self, symbol: str) -> Optional[ChainSnapshot]:
+        self._sync()
+        entry = self._index.get(symbol)
+        if entry is not None:
+            snapshot = self._mapped.get(symbol)
+            if snapshot is None or snapshot.version != entry["version"]:
+                snapshot = self._map(symbol, entry)
+            if snapshot is not None:
+                self.stats["hits"] += 1
+                return snapshot
+        return super().get(symbol)
+
+    def status(self) -> dict:
+        self._sync()
+        mapped = list(self._mapped.values())
+        return {
+            "mode": "shared",
+            "directory": self.directory,
+            "writer": self.is_writer,
+            "generation": self._generation_seen,
+            "symbols": len(self._index),
+            "mapped_symbols": len(mapped),
+            "legs": sum(len(s.chain) for s in mapped),
+            "array_bytes": sum(s.chain.nbytes() for s in mapped),
+            "local_only_symbols": len(set(self._snapshots) - set(self._index)),
+            **self.stats,
+        }
+
+
+def _create_store() -> ChainStore:
+    if os.getenv("CHAIN_STORE_SHARED", "1") in ("0", "false", "False"):
+        return ChainStore()
+    return SharedChainStore()
+
+
+# single global instance, written by ingestion and read by the API
+chain_store = _create_store()
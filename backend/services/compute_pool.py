@@ -0,0 +1,121 @@
+# backend/services/compute_pool.py
+"""
+Process pool for the CPU-heavy part of ingestion (payload parsing + Greeks).
+
+Ingestion runs inside the API process, so parsing a big index chain on a
+scheduler thread holds the GIL and stalls request handling. With
+INGEST_PROCESS_POOL enabled (default) the parse runs in a separate process
+and only the compact OptionChainColumns arrays come back to the writer.
+
+- INGEST_PROCESS_WORKERS: pool size (default 2).
+- INGEST_MAX_IN_FLIGHT: max chains queued or parsing at once; further callers
+  block until a slot frees up (default 2 x workers).
+- Uses the 'spawn' start method: the API process runs threads (browser pool,
+  scheduler), which don't mix with fork.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from services.chain_columns import OptionChainColumns
+from services.data_parser import parse_option_chain_columns
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_in_worker(symbol: str, raw_data: dict) -> Optional[OptionChainColumns]:
+    # Runs in the pool process
+    return parse_option_chain_columns(symbol, raw_data)
+
+
+class ComputePool:
+
+    def __init__(self, enabled: Optional[bool] = None, max_workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None):
+        if enabled is None:
+            enabled = os.getenv("INGEST_PROCESS_POOL", "1") not in ("0", "false", "False")
+        self.enabled = enabled
+        self.max_workers = max_workers or int(os.getenv("INGEST_PROCESS_WORKERS", "2"))
+        self.max_in_flight = max_in_flight or int(os.getenv("INGEST_MAX_IN_FLIGHT", str(2 * self.max_workers)))
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self.stats = {"parsed": 0, "parse_seconds": 0.0, "wait_seconds": 0.0, "pool_restarts": 0}
+
+    @property
+    def mode(self) -> str:
+        return "process" if self.enabled else "inline"
+
+    def busy(self) -> bool:
+        return self._in_flight > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.stats["pool_restarts"] += 1
+
+    def parse_chain(self, symbol: str, raw_data: dict) -> Optional[OptionChainColumns]:
+        """Parse a payload (in the pool when enabled). Blocks while the in-flight bound is reached."""
+        wait_start = time.perf_counter()
+        self._slots.acquire()
+        start = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+            self.stats["wait_seconds"] += start - wait_start
+        try:
+            if not self.enabled:
+                return parse_option_chain_columns(symbol, raw_data)
+            try:
+                return self._get_executor().submit(_parse_in_worker, symbol, raw_data).result()
+            except BrokenProcessPool:
+                logger.error(f"Parse pool crashed while parsing {symbol}. Restarting pool and parsing inline.")
+                self._reset_executor()
+                return parse_option_chain_columns(symbol, raw_data)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.stats["parsed"] += 1
+                self.stats["parse_seconds"] += time.perf_counter() - start
+            self._slots.release()
+
+    def status(self) -> dict:
+        with self._lock:
+            parsed = self.stats["parsed"]
+            return {
+                "mode": self.mode,
+                "workers": self.max_workers if self.enabled else 0,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "parsed": parsed,
+                "avg_parse_ms": round(1000 * self.stats["parse_seconds"] / parsed, 1) if parsed else 0.0,
+                "total_wait_sec": round(self.stats["wait_seconds"], 2),
+                "pool_restarts": self.stats["pool_restarts"],
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# single global instance
+compute_pool = ComputePool()
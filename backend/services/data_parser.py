@@ -1,10 +1,15 @@
 # backend/services/data_parser.py
 from models import StockData, OptionData
-from datetime import datetime
+from datetime import datetime, date
+from functools import lru_cache
+from typing import Optional
 import logging 
 import pytz 
 import math
+import numpy as np
 from scipy.stats import norm
+from services.greeks import calculate_greeks_vectorized, GREEK_NAMES
+from services.chain_columns import OptionChainColumns, OPTION_COLUMNS
 
 # --- HELPER FUNCTIONS ---
 def safe_float(val, default=0.0):
@@ -90,6 +95,62 @@ def calculate_greeks(S, K, T, R, IV, option_type):
 
 # --- MAIN PARSER FUNCTION ---
 def parse_option_chain_data(symbol: str, raw_data: dict) -> tuple:
+    """
+    ORM flavour of parse_option_chain_columns: returns (StockData, [OptionData, ...]).
+    """
+    stock_row, rows = parse_option_chain_rows(symbol, raw_data)
+    if stock_row is None:
+        return (None, [])
+    stock_data = StockData(**stock_row)
+    options_list = [OptionData(**dict(zip(OPTION_COLUMNS, row))) for row in rows]
+    return (stock_data, options_list)
+
+
+def parse_option_chain_rows(symbol: str, raw_data: dict) -> tuple:
+    """
+    Row flavour of parse_option_chain_columns, without ORM objects.
+    Returns (stock_row, rows): stock_row is a dict for stock_data, rows are
+    tuples in OPTION_COLUMNS order. On failure returns (None, []).
+    """
+    chain = parse_option_chain_columns(symbol, raw_data)
+    if chain is None:
+        return (None, [])
+    return (chain.stock_row(), list(chain.rows()))
+
+
+@lru_cache(maxsize=512)
+def _parse_expiry(expiry_date_str: str) -> date:
+    # A chain has a handful of distinct expiries repeated on every strike
+    return datetime.strptime(expiry_date_str, '%d-%b-%Y').date()
+
+
+def _float_column(values: list) -> np.ndarray:
+    """Vectorized safe_float: numeric payloads convert in one go, odd strings fall back per value."""
+    if not any(isinstance(v, str) for v in values):
+        try:
+            arr = np.array(values, dtype=np.float64)
+            return np.where(np.isnan(arr), 0.0, arr)
+        except (TypeError, ValueError):
+            pass
+    return np.array([safe_float(v) for v in values], dtype=np.float64)
+
+
+def _int_column(values: list) -> np.ndarray:
+    """Vectorized safe_int (truncates floats like int())."""
+    if not any(isinstance(v, str) for v in values):
+        try:
+            arr = np.array(values, dtype=np.float64)
+            return np.where(np.isnan(arr), 0, np.trunc(arr)).astype(np.int64)
+        except (TypeError, ValueError, OverflowError):
+            pass
+    return np.array([safe_int(v) for v in values], dtype=np.int64)
+
+
+def parse_option_chain_columns(symbol: str, raw_data: dict) -> Optional[OptionChainColumns]:
+    """
+    Parses a provider payload into an OptionChainColumns struct-of-arrays, with
+    Greeks computed for the whole chain in one vectorized pass. Returns None on failure.
+    """
     try:
         records = raw_data.get('records', {})
         data_list = records.get('data', [])
@@ -121,21 +182,15 @@ def parse_option_chain_data(symbol: str, raw_data: dict) -> tuple:
             data_timestamp = datetime.now(ist_timezone)
         
         RISK_FREE_RATE = 0.05  # Standard Risk-free rate
-        
-        stock_data = StockData(
-            symbol=symbol.upper(), 
-            underlying_value=underlying_value, 
-            timestamp=data_timestamp
-        )
-        
-        options_list = []
         today = data_timestamp.date()
+
+        # One pass over the payload, appending raw values per field
+        expiries, strikes, types, days = [], [], [], []
+        last_prices, ivs, ois, volumes, oi_changes = [], [], [], [], []
         
         for entry in data_list:
             try:
-                expiry_date_str = entry['expiryDate']
-                expiry_date = datetime.strptime(expiry_date_str, '%d-%b-%Y').date()
-                strike = safe_float(entry['strikePrice'])
+                expiry_date = _parse_expiry(entry['expiryDate'])
                 
                 # Time Calculation
                 delta_days = (expiry_date - today).days
@@ -143,60 +198,65 @@ def parse_option_chain_data(symbol: str, raw_data: dict) -> tuple:
                 # Skip EXPIRED options (negative days), but keep TODAY (0 days)
                 if delta_days < 0:
                     continue
-                
-                T_years = delta_days / 365.0
+
+                strike = entry['strikePrice']
                 
                 # Loop through both Call (CE) and Put (PE)
-                for type_key in ['CE', 'PE']:
-                    if type_key in entry:
-                        opt_data = entry[type_key]
-                        
-                        iv = safe_float(opt_data.get('impliedVolatility'))
-                        last_price = safe_float(opt_data.get('lastPrice'))
-                        
-                        # --- FIX 2: HANDLE MISSING IV ---
-                        # Use actual IV for calculation, but fallback to 15% if IV is 0 
-                        # just to ensure the Greeks graph isn't empty for illiquid strikes.
-                        calc_iv = iv
-                        if calc_iv <= 0:
-                            calc_iv = 15.0 # Visual Fallback
-                        
-                        # Calculate Greeks using valid params
-                        if underlying_value > 0:
-                            greeks = calculate_greeks(
-                                S=underlying_value, 
-                                K=strike, 
-                                T=T_years, 
-                                R=RISK_FREE_RATE, 
-                                IV=calc_iv, 
-                                option_type=type_key
-                            )
-                        else:
-                            greeks = {'delta': 0, 'gamma': 0, 'theta': 0, 'vega': 0}
-                        
-                        options_list.append(OptionData(
-                            oi_change=safe_int(opt_data.get('changeinOpenInterest')),
-                            symbol=symbol.upper(),
-                            expiry_date=expiry_date,
-                            strike_price=strike,
-                            option_type=type_key,
-                            last_price=last_price,
-                            iv=iv,  # Store REAL IV in DB (even if 0)
-                            oi=safe_int(opt_data.get('openInterest')),
-                            volume=safe_int(opt_data.get('totalTradedVolume')),
-                            delta=greeks['delta'],
-                            gamma=greeks['gamma'],
-                            theta=greeks['theta'],
-                            vega=greeks['vega'],
-                            timestamp=data_timestamp
-                        ))
+                for type_key in ('CE', 'PE'):
+                    opt_data = entry.get(type_key)
+                    # Validate before appending so a bad leg cannot leave the columns misaligned
+                    if not isinstance(opt_data, dict):
+                        continue
+                    expiries.append(expiry_date)
+                    strikes.append(strike)
+                    types.append(type_key)
+                    days.append(delta_days)
+                    last_prices.append(opt_data.get('lastPrice'))
+                    ivs.append(opt_data.get('impliedVolatility'))
+                    ois.append(opt_data.get('openInterest'))
+                    volumes.append(opt_data.get('totalTradedVolume'))
+                    oi_changes.append(opt_data.get('changeinOpenInterest'))
                         
             except Exception as e:
                 continue
+
+        chain = OptionChainColumns(
+            symbol=symbol.upper(),
+            underlying_value=underlying_value,
+            timestamp=data_timestamp,
+            expiry_date=np.array(expiries, dtype='datetime64[D]'),
+            strike_price=_float_column(strikes),
+            option_type=np.array(types, dtype='<U2'),
+            last_price=_float_column(last_prices),
+            iv=_float_column(ivs),  # Store REAL IV in DB (even if 0)
+            oi=_int_column(ois),
+            volume=_int_column(volumes),
+            oi_change=_int_column(oi_changes),
+        )
+
+        # --- FIX 2: HANDLE MISSING IV ---
+        # Use actual IV for calculation, but fallback to 15% if IV is 0
+        # just to ensure the Greeks graph isn't empty for illiquid strikes.
+        n = len(chain)
+        if underlying_value > 0 and n:
+            greeks = calculate_greeks_vectorized(
+                S=underlying_value,
+                K=chain.strike_price,
+                T=np.array(days, dtype=np.float64) / 365.0,
+                R=RISK_FREE_RATE,
+                IV=chain.iv,
+                is_call=chain.is_call,
+                fallback_iv=15.0,  # Visual Fallback
+            )
+            for name in GREEK_NAMES:
+                setattr(chain, name, greeks[name])
+        else:
+            for name in GREEK_NAMES:
+                setattr(chain, name, np.zeros(n, dtype=np.float64))
         
-        logging.info(f"Parsed {symbol}: {len(options_list)} options processed. Spot: {underlying_value}")
-        return (stock_data, options_list)
+        logging.info(f"Parsed {symbol}: {n} options processed. Spot: {underlying_value}")
+        return chain
         
     except Exception as e:
         logging.error(f"Critical error parsing data for {symbol}: {e}", exc_info=True)
-        return (None, [])
\ No newline at end of file
+        return None
@@ -1,7 +1,11 @@
 # backend/services/data_provider.py
 import logging
-from playwright.sync_api import sync_playwright
-import json
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from services.browser_pool import BrowserPool
+from services.rate_limiter import nse_rate_limiter
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -11,6 +15,18 @@ class DataProvider:
     """
     Manages data fetching from the 'unofficial' NSE public API using a headless browser (Playwright)
     to bypass bot detection. THIS VERSION USES FIREFOX.
+
+    The browser is launched once and shared through a BrowserPool of primed tabs,
+    instead of starting a new Playwright runtime for every symbol.
+
+    Modes (NSE_SCRAPER_MODE):
+    - "cookie" (default): Playwright only harvests the NSE session cookies; the JSON
+      endpoints are called through a pooled HTTP session that reuses them. The browser
+      is re-primed only when a fetch gets 401/403 or a non-JSON body.
+    - "browser": every fetch navigates a pooled tab to the API URL.
+
+    Every fetch first takes a slot from nse_rate_limiter (NSE_RATE_LIMIT_SEC), so
+    concurrent ingest workers stay within one request budget for NSE.
     """
     
     BASE_URL = "https://www.nseindia.com"
@@ -24,53 +40,103 @@ class DataProvider:
     }
     
     INDICES = ["NIFTY", "BANKNIFTY", "FINNIFTY"]
+
+    MODE_COOKIE = "cookie"
+    MODE_BROWSER = "browser"
     
     def __init__(self):
         logger.info("Initializing NSE DataProvider (Playwright/Firefox Mode)...")
-        
+        # The browser itself is launched lazily on the first fetch
+        self.pool = BrowserPool(self.BASE_URL, self.HEADERS)
+        self.mode = os.getenv("NSE_SCRAPER_MODE", self.MODE_COOKIE).strip().lower()
+        if self.mode not in (self.MODE_COOKIE, self.MODE_BROWSER):
+            logger.warning(f"Unknown NSE_SCRAPER_MODE '{self.mode}', using '{self.MODE_COOKIE}'")
+            self.mode = self.MODE_COOKIE
+
+        # Pooled HTTP client for the cookie fast path
+        pool_size = int(os.getenv("NSE_HTTP_POOL_SIZE", "8"))
+        self.http_timeout = float(os.getenv("NSE_HTTP_TIMEOUT_SEC", "10"))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(self.HEADERS)
+        self.session.headers["Referer"] = f"{self.BASE_URL}/option-chain"
+        self._cookie_lock = threading.Lock()
+        self._cookie_version = 0
+        self.rate_limiter = nse_rate_limiter
+
+    def _api_url(self, symbol: str) -> str:
+        if symbol in self.INDICES:
+            return f"{self.API_BASE}/option-chain-indices?symbol={symbol}"
+        return f"{self.API_BASE}/option-chain-equities?symbol={symbol}"
+
+    # ------------------------
+    # Cookie fast path
+    # ------------------------
+    def _refresh_cookies(self, seen_version: int):
+        """
+        Re-prime the browser and load its cookies into the HTTP session.
+        Concurrent callers that saw the same (stale) cookies only trigger one refresh.
+        The new cookies go into a fresh jar that replaces the session's in one assignment,
+        so requests in flight on other threads never see a half-cleared jar.
+        """
+        with self._cookie_lock:
+            if self._cookie_version != seen_version:
+                return
+            logger.info("Harvesting NSE session cookies via Playwright...")
+            jar = requests.cookies.RequestsCookieJar()
+            for c in self.pool.harvest_cookies():
+                jar.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+            self.session.cookies = jar
+            self._cookie_version += 1
+
+    def _http_get_json(self, url: str):
+        """Returns parsed JSON, or None if the session cookies look stale."""
+        resp = self.session.get(url, timeout=self.http_timeout)
+        if resp.status_code in (401, 403):
+            return None
+        resp.raise_for_status()
+        try:
+            return resp.json()
+        except ValueError:
+            return None
+
+    def _fetch_via_cookies(self, symbol: str, api_url: str) -> dict:
+        for attempt in range(2):
+            version = self._cookie_version
+            if version == 0 or attempt > 0:
+                self._refresh_cookies(version)
+            data = self._http_get_json(api_url)
+            if data:
+                logger.info(f"Successfully fetched data for {symbol} (HTTP/cookies)")
+                return data
+            logger.info(f"NSE rejected session cookies for {symbol}. Re-priming browser...")
+        # Cookies keep failing: let the browser fetch the page itself
+        logger.warning(f"Cookie fast path failed for {symbol}. Falling back to browser navigation.")
+        return self.pool.fetch_json(api_url)
     
     def get_option_chain(self, symbol: str) -> dict:
         """
         Fetches the live option chain for a given symbol (index or stock).
         """
         symbol = symbol.upper()
+        api_url = self._api_url(symbol)
         
-        if symbol in self.INDICES:
-            api_url = f"{self.API_BASE}/option-chain-indices?symbol={symbol}"
-        else:
-            api_url = f"{self.API_BASE}/option-chain-equities?symbol={symbol}"
-        
-        logger.info(f"Launching headless FIREFOX for {symbol}...")
+        logger.info(f"Fetching option chain for: {symbol} from {api_url}")
         try:
-            with sync_playwright() as p:
-                
-                browser = p.firefox.launch(headless=True)
-                
-                context = browser.new_context(extra_http_headers=self.HEADERS)
-                page = context.new_page()
-                
-                # Visit the homepage and wait there for 60s
-                logger.info(f"Priming session at {self.BASE_URL}")
-                
-                page.goto(self.BASE_URL, timeout=60000)
-                
-                # 2. We go to the API URL
-                logger.info(f"Fetching option chain for: {symbol} from {api_url}")
-                #
-                page.goto(api_url, timeout=60000)
-                
-                # 3. Jo html data we get,the data that is present in the pre tag we are converting it to json
-                content = page.inner_text('pre') 
-                data = json.loads(content)
-                
-                browser.close()
-                logger.info(f"Successfully fetched data for {symbol} (Playwright/Firefox)")
-                return data
+            self.rate_limiter.acquire()
+            if self.mode == self.MODE_COOKIE:
+                return self._fetch_via_cookies(symbol, api_url)
+            data = self.pool.fetch_json(api_url)
+            logger.info(f"Successfully fetched data for {symbol} (Playwright/Firefox)")
+            return data
         except Exception as e:
             logger.error(f"Playwright failed to fetch {symbol}: {e}")
-            
-            try:
-                logger.error(f"Page content was: {page.content()[:200]}...")
-            except:
-                pass
             return {"error": True, "message": f"Playwright failed: {e}"}
+
+    def health(self) -> dict:
+        return {"mode": self.mode, "cookie_version": self._cookie_version, **self.pool.health()}
+
+    def close(self):
+        self.session.close()
+        self.pool.close()
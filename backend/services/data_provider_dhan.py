@@ -1,9 +1,13 @@
 import os
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, Optional, List
+import pytz
 import requests
 from datetime import datetime, timedelta
+from services.rate_limiter import dhan_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -89,6 +93,54 @@ def generate_realistic_mock_chain() -> Dict[str, Any]:
 MOCK_OPTION_CHAIN = generate_realistic_mock_chain()
 
 
+# -----------------------------
+# DHAN -> NSE PAYLOAD SHAPE
+# -----------------------------
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+def _dhan_leg(leg: Dict[str, Any]) -> Dict[str, Any]:
+    oi = leg.get("oi") or 0
+    return {
+        "lastPrice": leg.get("last_price", 0),
+        "openInterest": oi,
+        "changeinOpenInterest": oi - (leg.get("previous_oi") or 0),
+        "totalTradedVolume": leg.get("volume", 0),
+        "impliedVolatility": leg.get("implied_volatility", 0),
+    }
+
+
+def merge_dhan_chains(chains: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-expiry Dhan /optionchain responses into one NSE-style payload
+    ({"records": {"underlyingValue", "timestamp", "data": [...]}}), the shape
+    parse_option_chain_data understands.
+
+    `chains` maps a Dhan expiry ('YYYY-MM-DD') to its response body.
+    """
+    underlying = 0.0
+    data: List[Dict[str, Any]] = []
+    for expiry, body in sorted(chains.items()):
+        chain = (body or {}).get("data") or {}
+        underlying = chain.get("last_price") or underlying
+        expiry_str = datetime.strptime(expiry, "%Y-%m-%d").strftime("%d-%b-%Y")
+        for strike_str, legs in (chain.get("oc") or {}).items():
+            entry = {"strikePrice": float(strike_str), "expiryDate": expiry_str}
+            for dhan_key, nse_key in (("ce", "CE"), ("pe", "PE")):
+                if legs.get(dhan_key):
+                    entry[nse_key] = _dhan_leg(legs[dhan_key])
+            data.append(entry)
+
+    return {
+        "records": {
+            "underlyingValue": underlying,
+            "timestamp": datetime.now(IST).strftime("%d-%b-%Y %H:%M:%S"),
+            "data": data,
+        }
+    }
+
+
 # -----------------------------
 # DHAN PROVIDER
 # -----------------------------
@@ -104,8 +156,13 @@ class DhanDataProvider:
         self.api_base = os.getenv("DHAN_API_BASE", "https://api.dhan.co/v2")
         self.client_id = os.getenv("DHAN_CLIENT_ID")
         self.access_token = os.getenv("DHAN_ACCESS_TOKEN")
-        self.rate_limit_sec = float(os.getenv("DHAN_RATE_LIMIT_SEC", "3.0"))
-        self._last_call_ts = 0.0
+        # How many of the nearest expiries get_option_chain_all_expiries fetches
+        self.expiry_count = int(os.getenv("DHAN_EXPIRY_COUNT", "3"))
+        # Expiry lists per (scrip, segment) for the current IST trading day: {key: (day, expiries)}
+        self._expiry_cache: Dict[tuple, tuple] = {}
+        self._expiry_lock = threading.Lock()
+        # Shared with every other Dhan caller so concurrent fetches stay within budget
+        self.rate_limiter = dhan_rate_limiter
         self.session = requests.Session()
         self.session.headers.update({"Content-Type": "application/json"})
 
@@ -124,10 +181,27 @@ class DhanDataProvider:
             "client-id": str(self.client_id or ""),
         }
 
-    def _respect_rate_limit(self):
-        elapsed = time.time() - self._last_call_ts
-        if elapsed < self.rate_limit_sec:
-            time.sleep(self.rate_limit_sec - elapsed)
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST to the Dhan API under the shared rate limit, retrying transient failures."""
+        url = f"{self.api_base}{path}"
+        backoff = 0.5
+        attempts = 4
+        for attempt in range(1, attempts + 1):
+            try:
+                self.rate_limiter.acquire()
+                resp = self.session.post(url, json=payload, headers=self._headers(), timeout=20)
+                resp.raise_for_status()
+                return resp.json()
+            except requests.HTTPError as he:
+                status = getattr(he.response, "status_code", None)
+                if status and 400 <= status < 500:
+                    break
+            except Exception:
+                pass
+            time.sleep(backoff)
+            backoff *= 2
+
+        return {"error": True, "message": f"Dhan {path} failed after retries."}
 
     def get_option_chain_by_instrument(
         self,
@@ -143,31 +217,73 @@ class DhanDataProvider:
             logger.info("Returning DEMO option chain for instrument %s", underlying_scrip_id)
             return MOCK_OPTION_CHAIN
 
-        url = f"{self.api_base}/optionchain"
         payload = {
             "UnderlyingScrip": int(underlying_scrip_id),
             "UnderlyingSeg": underlying_seg
         }
         if expiry:
             payload["Expiry"] = expiry
+        return self._post("/optionchain", payload)
 
-        self._respect_rate_limit()
+    def get_expiry_list(self, underlying_scrip_id: int, underlying_seg: str = "IDX_I") -> List[str]:
+        """
+        Active expiries ('YYYY-MM-DD', nearest first) from DhanHQ /optionchain/expirylist.
+        The list only changes between trading days, so it is fetched once per scrip per IST day.
+        """
+        today = datetime.now(IST).strftime("%Y-%m-%d")
+        key = (int(underlying_scrip_id), underlying_seg)
+        with self._expiry_lock:
+            cached = self._expiry_cache.get(key)
+        if cached and cached[0] == today:
+            return cached[1]
 
-        backoff = 0.5
-        attempts = 4
-        for attempt in range(1, attempts + 1):
-            try:
-                resp = self.session.post(url, json=payload, headers=self._headers(), timeout=20)
-                self._last_call_ts = time.time()
-                resp.raise_for_status()
-                return resp.json()
-            except requests.HTTPError as he:
-                status = getattr(he.response, "status_code", None)
-                if status and 400 <= status < 500:
-                    break
-            except Exception:
-                pass
-            time.sleep(backoff)
-            backoff *= 2
+        body = self._post("/optionchain/expirylist", {
+            "UnderlyingScrip": int(underlying_scrip_id),
+            "UnderlyingSeg": underlying_seg
+        })
+        if body.get("error"):
+            return []
+        expiries = sorted(e for e in body.get("data") or [] if e >= today)
+        if expiries:
+            with self._expiry_lock:
+                self._expiry_cache[key] = (today, expiries)
+        return expiries
+
+    def calls_per_refresh(self) -> int:
+        """Rate-limited Dhan calls one get_option_chain_all_expiries makes (expiry list cached)."""
+        if self._is_demo:
+            return 0  # demo mode serves mock data without calling Dhan
+        return max(1, self.expiry_count)
+
+    def get_option_chain_all_expiries(
+        self,
+        underlying_scrip_id: int,
+        underlying_seg: str = "IDX_I",
+        count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch the `count` nearest expiries concurrently and merge them into one
+        NSE-style payload. Every request goes through the shared rate limiter, so
+        the parallelism only removes idle time between calls, not the spacing.
+        """
+        if self._is_demo:
+            logger.info("Returning DEMO option chain for instrument %s", underlying_scrip_id)
+            return MOCK_OPTION_CHAIN
+
+        expiries = self.get_expiry_list(underlying_scrip_id, underlying_seg)[:count or self.expiry_count]
+        if not expiries:
+            return {"error": True, "message": "Dhan expiry list unavailable."}
+
+        with ThreadPoolExecutor(max_workers=len(expiries), thread_name_prefix="dhan-expiry") as pool:
+            bodies = dict(zip(expiries, pool.map(
+                lambda e: self.get_option_chain_by_instrument(underlying_scrip_id, underlying_seg, e),
+                expiries,
+            )))
 
-        return {"error": True, "message": "Dhan optionchain failed after retries."}
+        chains = {e: b for e, b in bodies.items() if b and not b.get("error") and (b.get("data") or {}).get("oc")}
+        failed = len(expiries) - len(chains)
+        if failed:
+            logger.warning(f"Dhan chain fetch failed for {failed}/{len(expiries)} expiries of {underlying_scrip_id}")
+        if not chains:
+            return {"error": True, "message": "Dhan optionchain failed for every expiry."}
+        return merge_dhan_chains(chains)
@@ -0,0 +1,55 @@
+# backend/services/demand_tracker.py
+"""
+Tracks which symbols clients are actually looking at.
+
+Every symbol request bumps an exponentially decaying counter (half-life
+DEMAND_HALF_LIFE_SEC), so the score reflects recent traffic without keeping a
+log of individual requests. The refresh scheduler reads these scores to spend
+more of the provider budget on hot symbols.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class DemandTracker:
+
+    def __init__(self, half_life_sec: Optional[float] = None):
+        half_life = half_life_sec or float(os.getenv("DEMAND_HALF_LIFE_SEC", "300"))
+        self._decay = math.log(2) / max(half_life, 1.0)
+        self._lock = threading.Lock()
+        self._scores: Dict[str, Tuple[float, float]] = {}  # symbol -> (score, last_update_ts)
+
+    def _decayed(self, score: float, ts: float, now: float) -> float:
+        return score * math.exp(-self._decay * (now - ts))
+
+    def record(self, symbol: str, weight: float = 1.0):
+        now = time.time()
+        symbol = symbol.upper()
+        with self._lock:
+            score, ts = self._scores.get(symbol, (0.0, now))
+            self._scores[symbol] = (self._decayed(score, ts, now) + weight, now)
+
+    def scores(self) -> Dict[str, float]:
+        """Current decayed score per symbol (roughly 'requests in the last half-life')."""
+        now = time.time()
+        with self._lock:
+            out = {}
+            for symbol, (score, ts) in list(self._scores.items()):
+                value = self._decayed(score, ts, now)
+                if value < 0.01:
+                    del self._scores[symbol]
+                    continue
+                out[symbol] = value
+            return out
+
+    def top(self, n: int = 10) -> List[Dict[str, float]]:
+        ranked = sorted(self.scores().items(), key=lambda kv: kv[1], reverse=True)[:n]
+        return [{"symbol": s, "score": round(v, 2)} for s, v in ranked]
+
+
+# single global instance
+demand_tracker = DemandTracker()
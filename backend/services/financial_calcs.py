@@ -1,36 +1,35 @@
 # backend/services/financial_calcs.py
 import logging
-from sqlalchemy.orm import Session
-from models import OptionData
-from sqlalchemy import func
+from typing import Tuple
 import yfinance as yf
 import numpy as np
 
 
 # ---Max Pain---
-def calculate_max_pain(db: Session, symbol: str) -> float:
-    try:
-        options = db.query(OptionData.strike_price, OptionData.oi, OptionData.option_type).filter(
-            OptionData.symbol == symbol
-        ).all()
-        if not options: return 0.0
-        strike_prices = sorted(list(set([opt.strike_price for opt in options])))
-        total_value_at_strike = []
-        for expiry_price in strike_prices:
-            current_strike_total_value = 0
-            for opt in options:
-                if opt.option_type == 'CE':
-                    value = max(0, expiry_price - opt.strike_price) * opt.oi
-                    current_strike_total_value += value
-                elif opt.option_type == 'PE':
-                    value = max(0, opt.strike_price - expiry_price) * opt.oi
-                    current_strike_total_value += value
-            total_value_at_strike.append((expiry_price, current_strike_total_value))
-        max_pain_strike, min_value = min(total_value_at_strike, key=lambda x: x[1])
-        return max_pain_strike
-    except Exception as e:
-        logging.error(f"Error calculating Max Pain: {e}")
-        return 0.0
+def max_pain_curve(strikes: np.ndarray, oi: np.ndarray, is_call: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Total writer payout if the underlying expires at each strike.
+
+    Pass the legs of ONE expiry. With OI aggregated per sorted strike K_j:
+      calls pay  sum_{K_j < P} (P - K_j) * OI_j = P * cumOI(P) - cumKOI(P)
+      puts pay   sum_{K_j > P} (K_j - P) * OI_j = revKOI(P) - P * revOI(P)
+    so the whole curve is a few cumulative sums after one sort: O(n log n).
+    Returns (sorted unique strikes, payout at each strike).
+    """
+    strikes = np.asarray(strikes, dtype=np.float64)
+    if not len(strikes):
+        return np.empty(0), np.empty(0)
+    oi = np.asarray(oi, dtype=np.float64)
+    is_call = np.asarray(is_call, dtype=bool)
+
+    candidates, inverse = np.unique(strikes, return_inverse=True)
+    call_oi = np.bincount(inverse, weights=np.where(is_call, oi, 0.0), minlength=len(candidates))
+    put_oi = np.bincount(inverse, weights=np.where(is_call, 0.0, oi), minlength=len(candidates))
+
+    # Inclusive sums are fine: a strike equal to P contributes (P - K) = 0
+    call_pain = candidates * np.cumsum(call_oi) - np.cumsum(candidates * call_oi)
+    put_pain = np.cumsum((candidates * put_oi)[::-1])[::-1] - candidates * np.cumsum(put_oi[::-1])[::-1]
+    return candidates, call_pain + put_pain
 
 
 # ---REALIZED VOLATILITY ---
@@ -69,23 +68,3 @@ def get_realized_volatility(symbol: str) -> float:
     except Exception as e:
         logging.error(f"Error calculating Realized Volatility: {e}")
         return 0.0
-
-
-# ---IMPLIED VOLATILITY---
-def get_implied_volatility(db: Session, symbol: str) -> float:
-    """
-    Finds the average Implied Volatility from our database.
-    (A simple average of all options for this symbol)
-    """
-    try:
-        # IV col we are fetching and then finding the average
-        avg_iv = db.query(func.avg(OptionData.iv)).filter(
-            OptionData.symbol == symbol,
-            OptionData.iv > 0 # Ignore 0 values
-        ).scalar()
-        
-       
-        return round((avg_iv or 0.0), 2) 
-    except Exception as e:
-        logging.error(f"Error calculating Implied Volatility: {e}")
-        return 0.0
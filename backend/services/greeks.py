@@ -0,0 +1,68 @@
+# backend/services/greeks.py
+"""
+Vectorized Black-Scholes Greeks for whole option chains.
+
+Same maths and edge cases as data_parser.calculate_greeks, but computed for
+every leg in one NumPy pass:
+- legs with S, K or IV <= 0 get all-zero Greeks,
+- T is floored at 0.00001 years (expiry day),
+- IV > 1 is treated as a percentage (15.5 -> 0.155),
+- optional `fallback_iv` replaces missing IV (<= 0) before anything else,
+- anything that comes out non-finite is zeroed (the scalar version's except branch).
+"""
+
+import numpy as np
+from scipy.special import ndtr
+
+GREEK_NAMES = ('delta', 'gamma', 'theta', 'vega')
+_T_FLOOR = 0.00001
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+
+def _pdf(x):
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+
+def calculate_greeks_vectorized(S, K, T, R, IV, is_call, fallback_iv=None) -> dict:
+    """
+    S: spot (scalar or array), K/T/IV: arrays per leg, R: scalar rate,
+    is_call: bool array (True for CE, False for PE).
+    Returns {'delta','gamma','theta','vega'} float64 arrays, rounded like the scalar version.
+    """
+    K = np.asarray(K, dtype=np.float64)
+    S = np.broadcast_to(np.asarray(S, dtype=np.float64), K.shape)
+    T = np.asarray(T, dtype=np.float64)
+    IV = np.asarray(IV, dtype=np.float64)
+    is_call = np.asarray(is_call, dtype=bool)
+
+    if fallback_iv is not None:
+        IV = np.where(IV <= 0, fallback_iv, IV)
+
+    valid = (S > 0) & (K > 0) & (IV > 0)
+    # Dummy values on invalid legs keep the maths warning-free; they are zeroed below
+    S_ = np.where(valid, S, 1.0)
+    K_ = np.where(valid, K, 1.0)
+    T_ = np.where(T <= _T_FLOOR, _T_FLOOR, T)
+    sigma = np.where(IV > 1, IV / 100.0, IV)
+    sigma = np.where(valid, sigma, 1.0)
+
+    with np.errstate(all='ignore'):
+        sqrt_T = np.sqrt(T_)
+        d1 = (np.log(S_ / K_) + (R + 0.5 * sigma ** 2) * T_) / (sigma * sqrt_T)
+        d2 = d1 - sigma * sqrt_T
+
+        N_d1 = ndtr(d1)
+        n_d1 = _pdf(d1)
+        discount = R * K_ * np.exp(-R * T_)
+        decay = -(S_ * n_d1 * sigma) / (2 * sqrt_T)
+
+        delta = np.where(is_call, N_d1, N_d1 - 1)
+        theta = np.where(is_call, decay - discount * ndtr(d2), decay + discount * ndtr(-d2)) / 365.0
+        gamma = n_d1 / (S_ * sigma * sqrt_T)
+        vega = S_ * n_d1 * sqrt_T / 100.0
+
+    out = {}
+    for name, values, digits in (('delta', delta, 4), ('gamma', gamma, 6), ('theta', theta, 2), ('vega', vega, 2)):
+        values = np.where(valid & np.isfinite(values), values, 0.0)
+        out[name] = np.round(values, digits)
+    return out
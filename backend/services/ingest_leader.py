@@ -0,0 +1,117 @@
+# backend/services/ingest_leader.py
+"""
+Elects the one process that runs ingestion when the API has several workers.
+
+Every uvicorn worker imports main.py and would otherwise start its own initial
+load, refresh scheduler and chain-store writer. Instead, each worker tries to
+take an exclusive flock on INGEST_LEADER_LOCK (next to the shared chain
+store by default). The winner ingests; the others only serve reads and keep
+retrying in the background, so if the leader dies (the kernel drops its lock)
+another worker takes over.
+
+Only the leader writes. A worker that is asked to refresh a symbol (admin
+refresh) and is not the leader drops a request file into INGEST_REQUESTS_DIR;
+the leader's refresh scheduler polls take_refresh_requests().
+
+On platforms without fcntl (Windows dev machines) every process is the leader,
+which matches the single-worker behaviour.
+"""
+
+import logging
+import os
+import threading
+from typing import Callable, List, Optional
+from urllib.parse import quote, unquote
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from services.chain_store import default_store_dir
+
+logger = logging.getLogger(__name__)
+
+
+class IngestLeader:
+
+    def __init__(self, lock_path: Optional[str] = None, retry_sec: Optional[float] = None):
+        self.lock_path = lock_path or os.getenv("INGEST_LEADER_LOCK", os.path.join(default_store_dir(), "ingest.lock"))
+        self.retry_sec = retry_sec or float(os.getenv("INGEST_LEADER_RETRY_SEC", "15"))
+        self.requests_dir = os.getenv(
+            "INGEST_REQUESTS_DIR", os.path.join(os.path.dirname(self.lock_path), "refresh-requests")
+        )
+        self.is_leader = False
+        self._fd: Optional[int] = None
+        self._stop = threading.Event()
+
+    def try_acquire(self) -> bool:
+        if self.is_leader:
+            return True
+        if fcntl is None:
+            self.is_leader = True
+            return True
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        self.is_leader = True
+        return True
+
+    def run_when_leader(self, on_acquired: Callable[[], None]):
+        """Run `on_acquired` now if this process wins the lock, otherwise as soon as it does."""
+        if self.try_acquire():
+            threading.Thread(target=on_acquired, daemon=True, name="ingest-leader").start()
+            return
+
+        logger.info(f"👀 Worker {os.getpid()} serves reads only; another process is ingesting")
+
+        def wait():
+            while not self._stop.wait(self.retry_sec):
+                if self.try_acquire():
+                    logger.info(f"👑 Worker {os.getpid()} took over ingestion")
+                    on_acquired()
+                    return
+
+        threading.Thread(target=wait, daemon=True, name="ingest-leader-wait").start()
+
+    def request_refresh(self, symbol: str):
+        """Ask the leader to refresh `symbol` (idempotent until the leader picks it up)."""
+        os.makedirs(self.requests_dir, exist_ok=True)
+        with open(os.path.join(self.requests_dir, quote(symbol, safe="")), "a"):
+            pass
+
+    def take_refresh_requests(self) -> List[str]:
+        """Symbols other workers asked to refresh since the last call (leader side)."""
+        try:
+            names = os.listdir(self.requests_dir)
+        except FileNotFoundError:
+            return []
+        symbols = []
+        for name in names:
+            try:
+                os.remove(os.path.join(self.requests_dir, name))
+            except FileNotFoundError:  # taken by a previous leader in the meantime
+                continue
+            symbols.append(unquote(name))
+        return symbols
+
+    def release(self):
+        self._stop.set()
+        if self._fd is not None:
+            os.close(self._fd)  # closing the descriptor drops the flock
+            self._fd = None
+        self.is_leader = False
+
+    def status(self) -> dict:
+        return {"pid": os.getpid(), "leader": self.is_leader, "lock": self.lock_path}
+
+
+# single global instance
+ingest_leader = IngestLeader()
@@ -2,9 +2,19 @@
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from services.unified_data_provider import UnifiedDataProvider
-from services.data_parser import parse_option_chain_data
-from models import StockData, OptionData
+from services.compute_pool import compute_pool
+from services.chain_store import chain_store
+from services.chain_columns import OPTION_COLUMNS
+from services.bulk_writer import (
+    write_option_rows, upsert_option_rows, delete_option_legs, upsert_stock_row,
+)
+from services.analysis_service import expiry_metrics
+from models import OptionData, OptionChainLatest, OptionChainMetrics
+from sqlalchemy import func, insert
+from typing import Dict, List, Tuple
 import logging
+import os
+import threading
 
 # We are setting up the logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,7 +23,70 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 provider = UnifiedDataProvider()
 
 
-def fetch_and_store(symbol: str):
+# Append every snapshot to the option_data hypertable (history). option_chain_latest is always maintained.
+STORE_OPTION_HISTORY = os.getenv("STORE_OPTION_HISTORY", "1") not in ("0", "false", "False")
+
+LATEST_TABLE = OptionChainLatest.__table__
+HISTORY_TABLE = OptionData.__table__
+METRICS_TABLE = OptionChainMetrics.__table__
+
+# Last stored chain per symbol: {(expiry_date, strike_price, option_type): row}.
+# Lets each cycle write only the legs that changed in option_chain_latest.
+_previous_legs: Dict[str, Dict[tuple, tuple]] = {}
+# Snapshot timestamp last appended to history per symbol (a repeated exchange timestamp is not re-appended)
+_last_history_ts: Dict[str, object] = {}
+_previous_lock = threading.Lock()
+
+
+def _leg_key(row: tuple) -> tuple:
+    # row is in OPTION_COLUMNS order: (timestamp, symbol, expiry_date, strike_price, option_type, ...)
+    return (row[2], row[3], row[4])
+
+
+def _dedupe_legs(rows: List[tuple]) -> List[tuple]:
+    return list({_leg_key(r): r for r in rows}.values())
+
+
+def _load_previous_legs(db: Session, symbol: str) -> Dict[tuple, tuple]:
+    with _previous_lock:
+        cached = _previous_legs.get(symbol)
+    if cached is not None:
+        return cached
+    columns = [getattr(OptionChainLatest, c) for c in OPTION_COLUMNS]
+    rows = db.query(*columns).filter(OptionChainLatest.symbol == symbol).all()
+    return {_leg_key(r): tuple(r) for r in rows}
+
+
+def _history_has_snapshot(db: Session, symbol: str, ts) -> bool:
+    with _previous_lock:
+        last = _last_history_ts.get(symbol)
+    if last is None:
+        last = db.query(func.max(OptionData.timestamp)).filter(OptionData.symbol == symbol).scalar()
+    return last is not None and ts <= last
+
+
+def _diff_legs(previous: Dict[tuple, tuple], rows: List[tuple]) -> Tuple[List[tuple], List[tuple], List[tuple], Dict[tuple, tuple]]:
+    """
+    Returns (new, changed, removed_keys, current).
+    Legs are compared on their values only; unchanged legs keep their stored row.
+    """
+    current = {_leg_key(row): row for row in rows}  # last one wins if the payload repeats a leg
+
+    new, changed = [], []
+    for key, row in current.items():
+        old = previous.get(key)
+        if old is None:
+            new.append(row)
+        elif old[5:] != row[5:]:
+            changed.append(row)
+        else:
+            current[key] = old
+    removed = [key for key in previous if key not in current]
+    return new, changed, removed, current
+
+
+def fetch_and_store(symbol: str) -> bool:
+    """Fetch, parse and store one symbol. Returns True if new data was stored."""
     db: Session = SessionLocal()
     try:
         logging.info(f"Fetching data for {symbol}...")
@@ -21,38 +94,57 @@ def fetch_and_store(symbol: str):
         
         if not raw_data or raw_data.get('error'):
             logging.warning(f"No data received for {symbol}.")
-            return
+            return False
         
         logging.info(f"Parsing data for {symbol}...")
-        stock_data, options_list = parse_option_chain_data(symbol, raw_data)
+        # CPU-heavy parse + Greeks run in the process pool so they don't hold the API's GIL
+        chain = compute_pool.parse_chain(symbol, raw_data)
         
-        if not stock_data or not options_list:
+        if chain is None or not len(chain):
             logging.warning(f"Data parsing failed for {symbol}.")
-            return
-        
-        logging.info(f"Storing {len(options_list)} option records for {symbol}...")
-        
+            return False
+
+        stock_row = chain.stock_row()
+        option_rows = list(chain.rows())
         
-        existing_stock = db.query(StockData).filter(StockData.symbol == stock_data.symbol).first()
-        if existing_stock:
-            logging.info(f"Updating existing stock data for {symbol}.")
-            existing_stock.underlying_value = stock_data.underlying_value
-            existing_stock.timestamp = stock_data.timestamp
+        logging.info(f"Storing {len(option_rows)} option records for {symbol}...")
+        upsert_stock_row(db, stock_row)
+
+        previous = _load_previous_legs(db, stock_row['symbol'])
+        new, changed, removed, current = _diff_legs(previous, option_rows)
+
+        logging.info(f"{symbol}: {len(new)} new, {len(changed)} changed, {len(removed)} removed, "
+                     f"{len(current) - len(new) - len(changed)} unchanged legs.")
+
+        snapshot_ts = stock_row['timestamp']
+        append_history = STORE_OPTION_HISTORY and not _history_has_snapshot(db, stock_row['symbol'], snapshot_ts)
+        if append_history:
+            # History is append-only: every new snapshot goes to the hypertable via COPY
+            write_option_rows(db, _dedupe_legs(option_rows), HISTORY_TABLE)
+            # Per-expiry OI/PCR/ATM IV rows feed the 1m/5m continuous aggregates
+            db.execute(insert(METRICS_TABLE), expiry_metrics(chain))
+
+        # The latest chain is swapped in the same transaction, so readers see either the old or the new one
+        delete_option_legs(db, stock_row['symbol'], removed, LATEST_TABLE)
+        upsert_option_rows(db, changed, LATEST_TABLE)
+        if previous:
+            upsert_option_rows(db, new, LATEST_TABLE)
         else:
-            logging.info(f"Creating new stock data entry for {symbol}.")
-            db.add(stock_data)
-        
-        
-        #instead of adding the new data we are deleting the old data
-        db.query(OptionData).filter(OptionData.symbol == symbol).delete(synchronize_session=False)
-        
-        
-        db.add_all(options_list)
+            # Nothing stored yet for this symbol: no conflicts possible, so COPY is safe
+            write_option_rows(db, new, LATEST_TABLE)
         #Saving the data to the database
         db.commit()
+        with _previous_lock:
+            _previous_legs[stock_row['symbol']] = current
+            if append_history:
+                _last_history_ts[stock_row['symbol']] = snapshot_ts
+        # Readers are served from memory; publish only after the commit so the store never runs ahead of the DB
+        chain_store.publish(chain)
         logging.info(f"Successfully stored data for {symbol}.")
+        return True
     except Exception as e:
         logging.error(f"Ingestion failed for {symbol}: {e}")
         db.rollback()
+        return False
     finally:
         db.close()
\ No newline at end of file
@@ -0,0 +1,57 @@
+# backend/services/market_calendar.py
+"""
+NSE trading-session helpers.
+
+- Regular session: Monday-Friday, 09:15-15:30 IST.
+- Holidays come from NSE_HOLIDAYS (comma-separated YYYY-MM-DD) and/or
+  NSE_HOLIDAYS_FILE (one date per line, '#' comments allowed), since the
+  exchange publishes the list every year.
+"""
+
+import logging
+import os
+from datetime import date, datetime, time as dtime
+from typing import Optional, Set
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+IST = pytz.timezone("Asia/Kolkata")
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+
+def _load_holidays() -> Set[date]:
+    raw = [d for d in os.getenv("NSE_HOLIDAYS", "").split(",")]
+    path = os.getenv("NSE_HOLIDAYS_FILE", "").strip()
+    if path:
+        try:
+            with open(path) as f:
+                raw.extend(line.split("#", 1)[0] for line in f)
+        except OSError as e:
+            logger.warning(f"Could not read NSE_HOLIDAYS_FILE {path}: {e}")
+
+    holidays = set()
+    for d in raw:
+        d = d.strip()
+        if not d:
+            continue
+        try:
+            holidays.add(datetime.strptime(d, "%Y-%m-%d").date())
+        except ValueError:
+            logger.warning(f"Ignoring invalid NSE holiday date: {d}")
+    return holidays
+
+
+HOLIDAYS = _load_holidays()
+
+
+def is_trading_day(d: date) -> bool:
+    return d.weekday() < 5 and d not in HOLIDAYS
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """True while the NSE regular session is running."""
+    now = now.astimezone(IST) if now else datetime.now(IST)
+    return is_trading_day(now.date()) and MARKET_OPEN <= now.time() <= MARKET_CLOSE
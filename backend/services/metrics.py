@@ -0,0 +1,55 @@
+# backend/services/metrics.py
+"""
+In-process API latency metrics.
+
+Keeps the last N request durations per route, split by whether ingestion was
+parsing a chain while the request ran, so the effect of ingestion (and of the
+process-pool offload) on request latency is visible at /api/v1/admin/metrics.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class LatencyRecorder:
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = window or int(os.getenv("LATENCY_WINDOW", "2000"))
+        self._lock = threading.Lock()
+        self._samples: Dict[Tuple[str, bool], Deque[float]] = {}
+
+    def record(self, route: str, seconds: float, during_ingest: bool):
+        key = (route, during_ingest)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._samples.items()}
+        out: Dict[str, dict] = {}
+        for (route, during_ingest), values in sorted(snapshot.items()):
+            ms = np.array(values) * 1000.0
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            out.setdefault(route, {})["during_ingest" if during_ingest else "idle"] = {
+                "count": len(values),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(ms.max()), 2),
+            }
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+# single global instance
+latency_recorder = LatencyRecorder()
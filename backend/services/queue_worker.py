@@ -1,6 +1,4 @@
 # backend/services/queue_worker.py
-import os
-import time
 import threading
 import queue
 import logging
@@ -10,7 +8,7 @@ logger = logging.getLogger(__name__)
 
 from services.ingestion import fetch_and_store
 
-RATE = float(os.getenv("DHAN_RATE_LIMIT_SEC", "3.0"))
+from services.rate_limiter import dhan_rate_limiter
 
 _symbol_queue: "queue.Queue[str]" = queue.Queue()
 
@@ -26,7 +24,7 @@ def enqueue_many(symbols: Iterable[str]):
 
 
 def _worker_loop():
-    logger.info("Dhan ingestion worker started (rate %.2fs)", RATE)
+    logger.info("Dhan ingestion worker started (rate %.2fs)", dhan_rate_limiter.interval_sec)
     while True:
         symbol = _symbol_queue.get()
         try:
@@ -34,7 +32,7 @@ def _worker_loop():
             fetch_and_store(symbol)
         except Exception as e:
             logger.exception("Error processing symbol %s: %s", symbol, e)
-        time.sleep(RATE)
+        # Pacing is enforced by the shared Dhan rate limiter inside the provider
         _symbol_queue.task_done()
 
 
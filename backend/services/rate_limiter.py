@@ -0,0 +1,41 @@
+# backend/services/rate_limiter.py
+"""
+Thread-safe rate limiter shared by everything that calls an upstream provider.
+
+Each caller reserves the next free slot (slots are `interval_sec` apart) and then
+sleeps until its slot, so concurrent workers are spaced out evenly instead of
+bursting and then all sleeping a fixed amount.
+"""
+
+import os
+import threading
+import time
+
+
+class RateLimiter:
+
+    def __init__(self, interval_sec: float):
+        self.interval_sec = max(0.0, float(interval_sec))
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def reserve(self) -> float:
+        """Reserve the next slot and return how long the caller has to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval_sec
+            return slot - now
+
+    def acquire(self):
+        """Block until the caller is allowed to make one upstream call."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+# One budget for the Dhan API, shared by the provider, ingestion engine and queue worker
+dhan_rate_limiter = RateLimiter(float(os.getenv("DHAN_RATE_LIMIT_SEC", "3.0")))
+
+# Separate budget for the NSE scraper (cookie fast path and browser navigations alike)
+nse_rate_limiter = RateLimiter(float(os.getenv("NSE_RATE_LIMIT_SEC", "1.0")))
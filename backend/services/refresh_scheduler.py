@@ -0,0 +1,322 @@
+# backend/services/refresh_scheduler.py
+"""
+Single deadline-based refresh scheduler for all tracked symbols.
+
+Instead of one interval job per symbol (which fire in bursts), one dispatcher
+thread keeps a heap of next-due deadlines:
+
+- Initial deadlines are staggered `spacing` seconds apart (the provider budget:
+  the rate-limit interval times the upstream calls one refresh makes), and
+  consecutive dispatches are never closer than `spacing`.
+- If the configured intervals ask for more fetches than the budget allows, every
+  interval is stretched by the same factor.
+- Outside NSE market hours each symbol is refreshed at most every
+  REFRESH_OFF_HOURS_INTERVAL_SEC seconds.
+- A symbol whose previous run is still in flight is skipped for that round.
+- With a `demand_fn`, intervals are periodically rebalanced towards the symbols
+  clients are requesting: hot symbols refresh faster, cold ones slower, while the
+  total refresh rate stays the same as the configured tiers.
+- refresh_now() moves a symbol to the front of the queue (still within the
+  budget); with a `requests_fn` the loop polls for such requests, e.g. admin
+  refreshes forwarded by workers that are not the ingest leader.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.market_calendar import is_market_open
+
+logger = logging.getLogger(__name__)
+
+# Smallest demand weight a symbol can get, so even with DEMAND_COLD_FACTOR=0 a cold
+# symbol keeps a (very long) finite interval instead of a zero rate
+MIN_DEMAND_WEIGHT = 0.01
+
+
+class RefreshScheduler:
+
+    def __init__(
+        self,
+        job_fn: Callable[[str], object],
+        spacing_sec: Optional[float] = None,
+        max_workers: Optional[int] = None,
+        off_hours_interval_sec: Optional[float] = None,
+        market_open_fn: Callable[[], bool] = is_market_open,
+        demand_fn: Optional[Callable[[], Dict[str, float]]] = None,
+        calls_per_refresh_fn: Optional[Callable[[], int]] = None,
+        requests_fn: Optional[Callable[[], List[str]]] = None,
+    ):
+        self.job_fn = job_fn
+        self.call_spacing = spacing_sec if spacing_sec is not None else float(os.getenv("DHAN_RATE_LIMIT_SEC", "3.0"))
+        self.calls_per_refresh_fn = calls_per_refresh_fn
+        self.requests_fn = requests_fn
+        self.request_poll_sec = float(os.getenv("REFRESH_REQUEST_POLL_SEC", "2"))
+        self.max_workers = max_workers or int(os.getenv("REFRESH_WORKERS", "4"))
+        self.off_hours_interval = (
+            off_hours_interval_sec if off_hours_interval_sec is not None
+            else float(os.getenv("REFRESH_OFF_HOURS_INTERVAL_SEC", "1800"))
+        )
+        self.market_open_fn = market_open_fn
+        self.demand_fn = demand_fn
+        self.rebalance_every = float(os.getenv("DEMAND_REBALANCE_SEC", "60"))
+        self.max_boost = float(os.getenv("DEMAND_MAX_BOOST", "4.0"))
+        self.cold_factor = float(os.getenv("DEMAND_COLD_FACTOR", "0.5"))
+        self.min_interval = float(os.getenv("REFRESH_MIN_INTERVAL_SEC", "30"))
+
+        self._base_intervals: Dict[str, float] = {}
+        self._intervals: Dict[str, float] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._in_flight = set()
+        self._one_shot = set()  # untracked symbols queued once by refresh_now
+        self._requested = set()  # symbols refresh_now asked for that have not been dispatched yet
+        self._rerun = set()  # requested symbols that were in flight; re-queued when that run ends
+        self._cond = threading.Condition()
+        self._stretch = 1.0
+        self._last_dispatch = 0.0
+        self._last_rebalance = 0.0
+        self._last_request_poll = 0.0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.stats = {"dispatched": 0, "skipped_in_flight": 0, "failed": 0}
+
+    @property
+    def calls_per_refresh(self) -> int:
+        if self.calls_per_refresh_fn is None:
+            return 1
+        try:
+            return max(1, int(self.calls_per_refresh_fn()))
+        except Exception:
+            return 1
+
+    @property
+    def spacing(self) -> float:
+        """Seconds of provider budget one refresh uses."""
+        return self.call_spacing * self.calls_per_refresh
+
+    # ------------------------
+    # Registration
+    # ------------------------
+    def add(self, symbol: str, interval_sec: float):
+        """Track `symbol`, refreshing it every `interval_sec` seconds during market hours."""
+        with self._cond:
+            first = symbol not in self._intervals
+            self._base_intervals[symbol] = float(interval_sec)
+            self._intervals[symbol] = float(interval_sec)
+            self._recompute_stretch()
+            if first:
+                # Slot new symbols behind everything already queued
+                last_due = max((d for d, _, _ in self._heap), default=time.monotonic())
+                heapq.heappush(self._heap, (last_due + self.spacing, next(self._seq), symbol))
+            self._cond.notify()
+
+    def _recompute_stretch(self):
+        demand = sum(1.0 / iv for iv in self._intervals.values() if iv > 0)
+        self._stretch = max(1.0, demand * self.spacing)
+
+    def rebalance(self, scores: Dict[str, float]):
+        """
+        Redistribute the configured refresh rate by demand.
+
+        Each symbol's base rate (1 / tier interval) is weighted between
+        `cold_factor` (no recent requests) and `max_boost` (the hottest symbol),
+        never below MIN_DEMAND_WEIGHT, then all rates are scaled so their sum matches the configured total.
+        """
+        with self._cond:
+            if not self._base_intervals:
+                return
+            hottest = max((scores.get(s, 0.0) for s in self._base_intervals), default=0.0)
+            base_rates = {s: 1.0 / iv for s, iv in self._base_intervals.items()}
+            total_rate = sum(base_rates.values())
+            if hottest <= 0:
+                weighted = dict(base_rates)
+            else:
+                weighted = {
+                    s: r * max(
+                        MIN_DEMAND_WEIGHT,
+                        self.cold_factor + (self.max_boost - self.cold_factor) * scores.get(s, 0.0) / hottest,
+                    )
+                    for s, r in base_rates.items()
+                }
+            # Water-fill: symbols capped at min_interval hand their excess back to the rest
+            max_rate = 1.0 / self.min_interval
+            rates: Dict[str, float] = {}
+            free = dict(weighted)
+            budget = total_rate
+            while free:
+                scale = budget / sum(free.values())
+                capped = {s for s, w in free.items() if w * scale > max_rate}
+                if not capped:
+                    rates.update({s: w * scale for s, w in free.items()})
+                    break
+                for s in capped:
+                    rates[s] = max_rate
+                    budget -= max_rate
+                    del free[s]
+            old_intervals = self._intervals
+            self._intervals = {s: 1.0 / r for s, r in rates.items()}
+            self._recompute_stretch()
+
+            # Pull hot symbols forward instead of waiting out their old, longer deadline
+            now = time.monotonic()
+            entries = []
+            for due, seq, sym in self._heap:
+                if sym in self._intervals and self._intervals[sym] < old_intervals.get(sym, 0.0):
+                    due = min(due, now + self._intervals[sym] * self._stretch)
+                entries.append((due, seq, sym))
+            self._heap = entries
+            heapq.heapify(self._heap)
+            self._cond.notify()
+
+    def refresh_now(self, symbol: str):
+        """Refresh `symbol` as soon as the budget allows (tracked or not), keeping its cadence afterwards."""
+        with self._cond:
+            now = time.monotonic()
+            self._requested.add(symbol)
+            if symbol in self._intervals:
+                self._heap = [(min(due, now) if sym == symbol else due, seq, sym) for due, seq, sym in self._heap]
+                heapq.heapify(self._heap)
+            elif symbol not in self._one_shot:
+                self._one_shot.add(symbol)
+                heapq.heappush(self._heap, (now, next(self._seq), symbol))
+            self._cond.notify()
+
+    def effective_interval(self, symbol: str) -> float:
+        interval = self._intervals[symbol] * self._stretch
+        if not self.market_open_fn():
+            interval = max(interval, self.off_hours_interval)
+        return interval
+
+    # ------------------------
+    # Dispatch loop
+    # ------------------------
+    def _run_job(self, symbol: str):
+        try:
+            # Jobs like fetch_and_store report failure by returning False rather than raising
+            if not self.job_fn(symbol):
+                self.stats["failed"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"Scheduled refresh for {symbol} failed: {e}")
+        finally:
+            with self._cond:
+                self._in_flight.discard(symbol)
+                rerun = symbol in self._rerun
+                self._rerun.discard(symbol)
+            if rerun:
+                self.refresh_now(symbol)
+
+    def _maybe_rebalance(self):
+        if not self.demand_fn or time.monotonic() - self._last_rebalance < self.rebalance_every:
+            return
+        self._last_rebalance = time.monotonic()
+        try:
+            self.rebalance(self.demand_fn())
+        except Exception as e:
+            logger.warning(f"Demand rebalance failed: {e}")
+
+    def _maybe_take_requests(self):
+        if not self.requests_fn or time.monotonic() - self._last_request_poll < self.request_poll_sec:
+            return
+        self._last_request_poll = time.monotonic()
+        try:
+            for symbol in self.requests_fn():
+                logger.info(f"🔁 Refresh of {symbol} requested")
+                self.refresh_now(symbol)
+        except Exception as e:
+            logger.warning(f"Reading refresh requests failed: {e}")
+
+    def _loop(self):
+        while True:
+            self._maybe_rebalance()
+            self._maybe_take_requests()
+            with self._cond:
+                if not self._running:
+                    return
+                max_wait = min(self.rebalance_every, self.request_poll_sec) if self.requests_fn else self.rebalance_every
+                if not self._heap:
+                    self._cond.wait(max_wait)
+                    continue
+                due, _, symbol = self._heap[0]
+                now = time.monotonic()
+                ready_at = max(due, self._last_dispatch + self.spacing)
+                if ready_at > now:
+                    self._cond.wait(min(ready_at - now, max_wait))
+                    continue
+                heapq.heappop(self._heap)
+                if symbol in self._one_shot:
+                    self._one_shot.discard(symbol)
+                elif symbol not in self._intervals:
+                    continue
+                else:
+                    # The calls per refresh follow the provider preference, which can change at runtime
+                    self._recompute_stretch()
+                    # Keep the cadence anchored to the deadline, but never schedule into the past
+                    next_due = max(due + self.effective_interval(symbol), now + self.spacing)
+                    heapq.heappush(self._heap, (next_due, next(self._seq), symbol))
+
+                if symbol in self._in_flight:
+                    # An explicit request must not be lost: run it again once the current refresh ends
+                    if symbol in self._requested:
+                        self._requested.discard(symbol)
+                        self._rerun.add(symbol)
+                    self.stats["skipped_in_flight"] += 1
+                    logger.info(f"⏭️  Skipping {symbol}: previous refresh still running")
+                    continue
+                self._in_flight.add(symbol)
+                self._requested.discard(symbol)
+                self._last_dispatch = now
+                self.stats["dispatched"] += 1
+            self._executor.submit(self._run_job, symbol)
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            # Re-stagger everything registered before start() relative to now
+            now = time.monotonic()
+            entries = sorted(self._heap)
+            self._heap = [(now + self.spacing * (i + 1), seq, sym) for i, (_, seq, sym) in enumerate(entries)]
+            heapq.heapify(self._heap)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="refresh")
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="refresh-scheduler")
+        self._thread.start()
+        logger.info(
+            f"⏰ Refresh scheduler started: {len(self._intervals)} symbols, "
+            f"spacing {self.spacing:.1f}s, stretch x{self._stretch:.2f}"
+        )
+
+    def shutdown(self, wait: bool = False):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._executor:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def status(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            upcoming = sorted(self._heap)[:10]
+            return {
+                "running": self._running,
+                "market_open": self.market_open_fn(),
+                "symbols": len(self._intervals),
+                "spacing_sec": round(self.spacing, 2),
+                "calls_per_refresh": self.calls_per_refresh,
+                "stretch": round(self._stretch, 2),
+                "in_flight": sorted(self._in_flight),
+                "fastest": [
+                    {"symbol": s, "interval_sec": round(iv * self._stretch, 1)}
+                    for s, iv in sorted(self._intervals.items(), key=lambda kv: kv[1])[:5]
+                ],
+                "next_due": [{"symbol": s, "in_sec": round(max(0.0, d - now), 1)} for d, _, s in upcoming],
+                **self.stats,
+            }
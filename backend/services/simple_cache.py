@@ -3,73 +3,359 @@
 Simple caching helper.
 
 - Uses Redis if REDIS_URL is set and `redis` package is installed.
-- Otherwise falls back to an in-memory TTL cache (suitable for dev).
+- Otherwise falls back to an in-memory cache (suitable for dev and single-host
+  deployments): a thread-safe LRU with per-key TTLs, bounded by
+  CACHE_MAX_BYTES (serialized size) and CACHE_MAX_ENTRIES. Expired entries
+  are swept every CACHE_SWEEP_SEC by a background thread, not only when read.
+
+get_or_compute_async adds single-flight misses: concurrent callers for the
+same missing key share one computation. In-process they await the task that
+is already computing; across workers (Redis only) the computing worker holds
+a short `lock:<key>` (SET NX PX) and the others poll the key until it is
+filled, the lock is released, or CACHE_WAIT_TIMEOUT_SEC passes (then they
+compute themselves). It talks to Redis through redis.asyncio (or the sync
+client in a thread), never blocking the event loop.
+
+Stale-while-revalidate: entries set with a soft TTL (set(..., soft_ttl=) or
+get_or_compute_async(..., soft_ttl=)) carry two deadlines. Before the soft one the
+value is fresh; between soft and hard (the key's real TTL) it is returned
+immediately while one background refresh runs; past hard the caller waits.
 """
 
+import asyncio
 import time
 import os
 import json
-from typing import Any, Optional
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 try:
     import redis
 except Exception:
     redis = None  # optional dependency
+try:
+    import redis.asyncio as redis_asyncio
+except Exception:
+    redis_asyncio = None  # redis-py < 4.2: the async path runs the sync client in threads
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_SWEEP_SEC = float(os.getenv("CACHE_SWEEP_SEC", "30"))
+
+CACHE_LOCK_TTL_MS = int(os.getenv("CACHE_LOCK_TTL_MS", "15000"))
+CACHE_WAIT_TIMEOUT_SEC = float(os.getenv("CACHE_WAIT_TIMEOUT_SEC", "15"))
+CACHE_LOCK_POLL_SEC = float(os.getenv("CACHE_LOCK_POLL_SEC", "0.05"))
+
+# Deletes the lock only if this caller still owns it (it may have expired and been taken over)
+_RELEASE_LOCK = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+# Envelope field holding the soft-expiry time of stale-while-revalidate entries
+_SOFT_UNTIL = "__soft_until__"
+
+# Rough per-entry bookkeeping cost (tuple, OrderedDict node, key object) added to key + payload size
+_ENTRY_OVERHEAD = 100
+
+
+class _MemoryStore:
+    """LRU of key -> (expire_ts, json_str, size); the most recently used entries are at the end."""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, max_entries: int = CACHE_MAX_ENTRIES,
+                 sweep_sec: float = CACHE_SWEEP_SEC):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.sweep_sec = sweep_sec
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self.stats = {"hits": 0, "misses": 0, "sets": 0, "expired": 0, "evicted": 0, "rejected": 0}
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            expire_ts, json_str, _ = entry
+            if expire_ts != 0 and time.time() > expire_ts:
+                self._remove(key)
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return json_str
+
+    def set(self, key: str, json_str: str, ttl: int):
+        # json.dumps output is ASCII, so len() is the byte size
+        size = len(key) + len(json_str) + _ENTRY_OVERHEAD
+        expire_ts = 0 if not ttl else time.time() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                self.stats["rejected"] += 1
+                return
+            self._entries[key] = (expire_ts, json_str, size)
+            self._bytes += size
+            self.stats["sets"] += 1
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats["evicted"] += 1
+        self._ensure_sweeper()
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def sweep(self) -> int:
+        """Drop every expired entry. Returns how many were dropped."""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (expire_ts, _, _) in self._entries.items() if expire_ts != 0 and now > expire_ts]
+            for key in expired:
+                self._remove(key)
+            self.stats["expired"] += len(expired)
+        return len(expired)
+
+    def _ensure_sweeper(self):
+        if self._sweeper is None and self.sweep_sec > 0:
+            with self._lock:
+                if self._sweeper is None:
+                    self._sweeper = threading.Thread(target=self._sweep_loop, name="cache-sweeper", daemon=True)
+                    self._sweeper.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_sec)
+            self.sweep()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                **self.stats,
+            }
+
 
 class SimpleCache:
     def __init__(self):
         self.redis_url = os.getenv("REDIS_URL", "").strip() or None
+        self.client = None
+        self.async_client = None
         if self.redis_url and redis:
             try:
                 self.client = redis.from_url(self.redis_url)
+                if redis_asyncio is not None:
+                    self.async_client = redis_asyncio.from_url(self.redis_url)
             except Exception:
                 self.client = None
-        else:
-            self.client = None
-            self._store = {}  # key -> (expire_ts, json_str)
+                self.async_client = None
+        self._store = _MemoryStore()  # used whenever there is no Redis client
+        # In-flight computations per key
+        self._async_flights: Dict[str, asyncio.Task] = {}
+        self.flight_stats = {"computed": 0, "coalesced": 0, "stale_served": 0, "waited_on_lock": 0, "lock_timeouts": 0}
 
-    def get(self, key: str) -> Optional[Any]:
+    @staticmethod
+    def _decode_entry(v) -> Tuple[Optional[Any], Optional[float]]:
+        if v is None:
+            return None, None
+        try:
+            value = json.loads(v)
+        except Exception:
+            return None, None
+        if isinstance(value, dict) and _SOFT_UNTIL in value:
+            return value.get("value"), value[_SOFT_UNTIL]
+        return value, None
+
+    def _get_entry(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        """(value, soft_until) for `key`; soft_until is None for entries set without a soft TTL."""
         if self.client:
             try:
                 v = self.client.get(key)
             except Exception:
-                return None
-            if v is None:
-                return None
+                return None, None
+        else:
+            v = self._store.get(key)
+        return self._decode_entry(v)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._get_entry(key)[0]
+
+    def set(self, key: str, value: Any, ttl: int = 60, soft_ttl: Optional[float] = None):
+        """Store `value` for `ttl` seconds. With `soft_ttl` the entry counts as stale (but is still
+        served by get_or_compute_async) after that many seconds, and is gone after `ttl` (the hard TTL)."""
+        payload = self._encode(value, soft_ttl)
+        if payload is None:
+            return
+        if self.client:
             try:
-                return json.loads(v)
+                if ttl and ttl > 0:
+                    self.client.setex(key, ttl, payload)
+                else:
+                    self.client.set(key, payload)
             except Exception:
-                return None
+                pass
         else:
-            entry = self._store.get(key)
-            if not entry:
-                return None
-            expire_ts, json_str = entry
-            if expire_ts != 0 and time.time() > expire_ts:
-                del self._store[key]
-                return None
+            self._store.set(key, payload, ttl)
+
+    @staticmethod
+    def _encode(value: Any, soft_ttl: Optional[float]) -> Optional[str]:
+        if soft_ttl is not None:
+            value = {_SOFT_UNTIL: time.time() + soft_ttl, "value": value}
+        try:
+            return json.dumps(value, default=str)
+        except Exception:
+            # If not JSON-serializable, skip caching
+            return None
+
+    def delete(self, key: str):
+        if self.client:
             try:
-                return json.loads(json_str)
+                self.client.delete(key)
             except Exception:
-                return None
+                pass
+        else:
+            self._store.delete(key)
 
-    def set(self, key: str, value: Any, ttl: int = 60):
+    # ------------------------
+    # Single-flight misses and stale-while-revalidate
+    # ------------------------
+    async def _redis(self, command: str, *args, **kwargs):
+        """One Redis command without blocking the event loop."""
+        if self.async_client is not None:
+            return await getattr(self.async_client, command)(*args, **kwargs)
+        return await asyncio.to_thread(getattr(self.client, command), *args, **kwargs)
+
+    async def _get_entry_async(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        if not self.client:
+            return self._get_entry(key)
         try:
-            payload = json.dumps(value, default=str)
+            return self._decode_entry(await self._redis("get", key))
         except Exception:
-            # If not JSON-serializable, skip caching
-            return
+            return None, None
+
+    async def _fresh_async(self, key: str) -> Optional[Any]:
+        value, soft_until = await self._get_entry_async(key)
+        if value is not None and (soft_until is None or time.time() < soft_until):
+            return value
+        return None
+
+    async def _acquire_lock_async(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if not self.client:
+            return token
+        try:
+            return token if await self._redis("set", f"lock:{key}", token, nx=True, px=CACHE_LOCK_TTL_MS) else None
+        except Exception:
+            return token  # Redis unavailable: compute locally
+
+    async def _release_lock_async(self, key: str, token: str):
         if self.client:
+            try:
+                await self._redis("eval", _RELEASE_LOCK, 1, f"lock:{key}", token)
+            except Exception:
+                pass
+
+    async def _lock_held_async(self, key: str) -> bool:
+        try:
+            return bool(await self._redis("exists", f"lock:{key}"))
+        except Exception:
+            return False
+
+    async def _store_computed_async(self, key: str, value: Any, ttl: int, soft_ttl: Optional[float]) -> Any:
+        self.flight_stats["computed"] += 1
+        if not self.client:
+            if value is not None:
+                self.set(key, value, ttl, soft_ttl)
+            return value
+        payload = self._encode(value, soft_ttl) if value is not None else None
+        if payload is not None:
             try:
                 if ttl and ttl > 0:
-                    self.client.setex(key, ttl, payload)
+                    await self._redis("setex", key, ttl, payload)
                 else:
-                    self.client.set(key, payload)
+                    await self._redis("set", key, payload)
             except Exception:
                 pass
-        else:
-            expire_ts = 0 if not ttl else time.time() + ttl
-            self._store[key] = (expire_ts, payload)
+        return value
+
+    async def _compute_across_workers_async(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int,
+                                            soft_ttl: Optional[float], background: bool) -> Any:
+        deadline = time.monotonic() + CACHE_WAIT_TIMEOUT_SEC
+        while True:
+            token = await self._acquire_lock_async(key)
+            if token:
+                break
+            if background:
+                return None  # another worker is already refreshing it
+            self.flight_stats["waited_on_lock"] += 1
+            while await self._lock_held_async(key) and time.monotonic() < deadline:
+                await asyncio.sleep(CACHE_LOCK_POLL_SEC)
+                value = await self._fresh_async(key)
+                if value is not None:
+                    return value
+            if time.monotonic() >= deadline:
+                self.flight_stats["lock_timeouts"] += 1
+                token = uuid.uuid4().hex
+                break
+        try:
+            value = await self._fresh_async(key)
+            if value is not None:
+                return value
+            return await self._store_computed_async(key, await compute(), ttl, soft_ttl)
+        finally:
+            await self._release_lock_async(key, token)
+
+    def _start_async_flight(self, key: str, compute, ttl, soft_ttl, background: bool) -> asyncio.Task:
+        task = self._async_flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute_across_workers_async(key, compute, ttl, soft_ttl, background))
+            self._async_flights[key] = task
+            task.add_done_callback(lambda t: self._flight_done(key, t))
+        elif not background:
+            self.flight_stats["coalesced"] += 1
+        return task
+
+    async def get_or_compute_async(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int = 60,
+                                   soft_ttl: Optional[float] = None) -> Any:
+        """Cached value of `key`, or compute() once for all concurrent callers (None results are not
+        cached). The computation runs as its own task, so a caller that
+        disconnects doesn't cancel it for the others waiting on the same key; past `soft_ttl` the
+        stale value is returned and that task refreshes it in the background."""
+        value, soft_until = await self._get_entry_async(key)
+        if value is not None:
+            if soft_until is None or time.time() < soft_until:
+                return value
+            self.flight_stats["stale_served"] += 1
+            self._start_async_flight(key, compute, ttl, soft_ttl, background=True)
+            return value
+        return await asyncio.shield(self._start_async_flight(key, compute, ttl, soft_ttl, background=False))
+
+    def _flight_done(self, key: str, task: asyncio.Task):
+        if self._async_flights.get(key) is task:
+            del self._async_flights[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved here, so a failure nobody awaited (background refresh) isn't lost
+            logger.warning(f"Computing {key} failed: {task.exception()}")
+
+    def status(self) -> Dict[str, Any]:
+        if self.client:
+            return {"backend": "redis", "single_flight": dict(self.flight_stats)}
+        return {"backend": "memory", **self._store.status(), "single_flight": dict(self.flight_stats)}
 
 # single global instance
 cache = SimpleCache()
@@ -0,0 +1,409 @@
+# backend/services/snapshot_archive.py
+"""
+Parquet archive tier for the snapshot history.
+
+Retention: rows of option_data and option_chain_metrics older than
+HISTORY_RETENTION_DAYS are written to Parquet under ARCHIVE_DIR and then
+removed from the database (drop_chunks on TimescaleDB, DELETE otherwise).
+The cut is made on a chunk boundary, so only whole chunks are dropped.
+
+Layout (one file per table / UTC day / symbol, rows ordered by timestamp):
+
+    <ARCHIVE_DIR>/<table>/date=YYYY-MM-DD/symbol=<quoted symbol>/part-0.parquet
+    <ARCHIVE_DIR>/manifest.json   {"<table>": {"archived_before": "<iso>"}}
+
+Files are written under a temporary name and renamed, the manifest is
+updated before anything is dropped, and re-running a day overwrites its
+file, so a run interrupted at any point can simply be repeated.
+
+Readers: chain_history consults archived_before() and reads the archived part
+of a range through read_metric_rows / find_expiry / read_chain_as_of, so the
+history endpoints see one continuous history.
+
+Needs pyarrow; without it the retention job does not run (nothing is dropped).
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+import numpy as np
+from sqlalchemy import BigInteger, Date, DateTime, Float, Integer, String, delete, func, select, text
+from sqlalchemy.engine import Engine
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional: archive tier disabled
+    pa = None
+
+from models import OptionChainMetrics, OptionData
+from services.chain_columns import ARRAY_DTYPES, OptionChainColumns
+from services.chain_repository import db_time, from_db_time
+from services.market_calendar import IST
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.getenv(
+    "ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "archive")
+)
+HISTORY_RETENTION_DAYS = float(os.getenv("HISTORY_RETENTION_DAYS", "30"))
+ARCHIVE_INTERVAL_SEC = float(os.getenv("ARCHIVE_INTERVAL_SEC", "3600"))
+ARCHIVE_BATCH_ROWS = int(os.getenv("ARCHIVE_BATCH_ROWS", "100000"))
+# How far back an as-of lookup searches the archive for the previous snapshot
+ARCHIVE_AS_OF_LOOKBACK_DAYS = int(os.getenv("ARCHIVE_AS_OF_LOOKBACK_DAYS", "7"))
+
+ARCHIVED_TABLES = (OptionData.__table__, OptionChainMetrics.__table__)
+_MANIFEST = "manifest.json"
+
+
+def available() -> bool:
+    return pa is not None
+
+
+# ------------------------
+# Layout
+# ------------------------
+
+def _arrow_type(column):
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if isinstance(column.type, (Integer, BigInteger)):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, String):
+        return pa.string()
+    raise TypeError(f"No Arrow type for {column.name} ({column.type})")
+
+
+def arrow_schema(table):
+    return pa.schema([(c.name, _arrow_type(c)) for c in table.columns])
+
+
+def _partition_dir(root: str, table_name: str, day: date, symbol: str) -> str:
+    return os.path.join(root, table_name, f"date={day.isoformat()}", f"symbol={quote(symbol, safe='')}")
+
+
+def _days(start: datetime, end: datetime) -> List[date]:
+    """UTC days touched by [start, end]."""
+    first, last = start.astimezone(timezone.utc).date(), end.astimezone(timezone.utc).date()
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+def _files(root: str, table_name: str, symbol: str, start: datetime, end: datetime) -> List[str]:
+    paths = (os.path.join(_partition_dir(root, table_name, d, symbol), "part-0.parquet") for d in _days(start, end))
+    return [p for p in paths if os.path.exists(p)]
+
+
+class _Manifest:
+    """archived_before per table, re-read when the file changes (the job may run in another worker)."""
+
+    def __init__(self, root: str):
+        self.path = os.path.join(root, _MANIFEST)
+        self._mtime = None
+        self._data: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, dict]:
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                return {}
+            if mtime != self._mtime:
+                with open(self.path) as f:
+                    self._data = json.load(f)
+                self._mtime = mtime
+            return self._data
+
+    def archived_before(self, table_name: str) -> Optional[datetime]:
+        entry = self.load().get(table_name)
+        return datetime.fromisoformat(entry["archived_before"]) if entry else None
+
+    def set_archived_before(self, table_name: str, boundary: datetime):
+        # Never moves back (e.g. after raising the retention window): older rows are already gone
+        current = self.archived_before(table_name)
+        if current and current >= boundary:
+            return
+        data = dict(self.load())
+        data[table_name] = {"archived_before": boundary.astimezone(timezone.utc).isoformat()}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+_manifest = _Manifest(ARCHIVE_DIR)
+
+
+def archived_before(table_name: str) -> Optional[datetime]:
+    """Everything of `table_name` before this time lives in the archive (None: nothing archived)."""
+    return _manifest.archived_before(table_name) if available() else None
+
+
+# ------------------------
+# Writing (retention job)
+# ------------------------
+
+def _is_hypertable(conn, table_name: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_extension e, timescaledb_information.hypertables h "
+        "WHERE e.extname = 'timescaledb' AND h.hypertable_name = :t"
+    ), {"t": table_name}).scalar())
+
+
+def _boundary(conn, table_name: str, cutoff: datetime, hypertable: bool) -> Optional[datetime]:
+    """Latest chunk end at or before `cutoff` (midnight UTC for plain tables)."""
+    if hypertable:
+        return conn.execute(text(
+            "SELECT max(range_end) FROM timescaledb_information.chunks "
+            "WHERE hypertable_name = :t AND range_end <= :cutoff"
+        ), {"t": table_name, "cutoff": cutoff}).scalar()
+    return datetime.combine(cutoff.astimezone(timezone.utc).date(), datetime.min.time(), tzinfo=timezone.utc)
+
+
+def _record_batch(rows: Sequence[tuple], schema):
+    columns = list(zip(*rows))
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_timestamp(field.type):
+            values = [from_db_time(v) if v is not None else None for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _PartitionWriter:
+    """Writes one (day, symbol) file via a temporary name."""
+
+    def __init__(self, root: str, table_name: str, day: date, symbol: str, schema):
+        directory = _partition_dir(root, table_name, day, symbol)
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "part-0.parquet")
+        self.tmp = f"{self.path}.tmp"
+        self.writer = pq.ParquetWriter(self.tmp, schema, compression="zstd")
+
+    def write(self, batch):
+        self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+        os.replace(self.tmp, self.path)
+
+
+def _export_day(conn, root: str, table, day_start: datetime, day_end: datetime) -> int:
+    """Stream one UTC day of `table` (ordered by symbol, timestamp) into per-symbol files."""
+    schema = arrow_schema(table)
+    stmt = (
+        select(table)
+        .where(table.c.timestamp >= db_time(conn.dialect.name, day_start),
+               table.c.timestamp < db_time(conn.dialect.name, day_end))
+        .order_by(table.c.symbol, table.c.timestamp)
+    )
+    result = conn.execution_options(stream_results=True, yield_per=ARCHIVE_BATCH_ROWS).execute(stmt)
+    writer, symbol, count = None, None, 0
+    try:
+        for batch in result.partitions():
+            for sym, group in itertools.groupby(batch, key=lambda r: r.symbol):
+                if sym != symbol:
+                    if writer:
+                        writer.close()
+                    writer = _PartitionWriter(root, table.name, day_start.date(), sym, schema)
+                    symbol = sym
+                rows = [tuple(r) for r in group]
+                writer.write(_record_batch(rows, schema))
+                count += len(rows)
+    finally:
+        if writer:
+            writer.close()
+    return count
+
+
+def archive_table(engine: Engine, table, cutoff: datetime, root: str = ARCHIVE_DIR, manifest: _Manifest = _manifest) -> int:
+    """Move whole chunks of `table` older than `cutoff` to Parquet. Returns the rows archived."""
+    with engine.connect() as conn:
+        hypertable = _is_hypertable(conn, table.name)
+        boundary = _boundary(conn, table.name, cutoff, hypertable)
+        if boundary is None:
+            return 0
+        first = conn.execute(
+            select(func.min(table.c.timestamp)).where(table.c.timestamp < db_time(conn.dialect.name, boundary))
+        ).scalar()
+        count = 0
+        if first is not None:
+            day = datetime.combine(from_db_time(first).astimezone(timezone.utc).date(), datetime.min.time(), tzinfo=timezone.utc)
+            while day < boundary:
+                count += _export_day(conn, root, table, day, min(day + timedelta(days=1), boundary))
+                day += timedelta(days=1)
+
+    # Readers switch to the archive for this range before the rows disappear from the database
+    manifest.set_archived_before(table.name, boundary)
+    with engine.begin() as conn:
+        if hypertable:
+            conn.execute(text("SELECT drop_chunks(:t, older_than => :b)"), {"t": table.name, "b": boundary})
+        else:
+            conn.execute(delete(table).where(table.c.timestamp < db_time(conn.dialect.name, boundary)))
+    if count:
+        logger.info(f"Archived {count} {table.name} rows before {boundary.isoformat()} to {root}")
+    return count
+
+
+def archive_history(engine: Engine, retention_days: float = HISTORY_RETENTION_DAYS, root: str = ARCHIVE_DIR) -> Dict[str, int]:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    manifest = _manifest if root == ARCHIVE_DIR else _Manifest(root)
+    return {table.name: archive_table(engine, table, cutoff, root, manifest) for table in ARCHIVED_TABLES}
+
+
+class RetentionJob:
+    """Runs archive_history every ARCHIVE_INTERVAL_SEC on the ingest leader."""
+
+    def __init__(self, engine: Engine, interval_sec: Optional[float] = None, retention_days: Optional[float] = None):
+        self.engine = engine
+        self.interval = interval_sec or ARCHIVE_INTERVAL_SEC
+        self.retention_days = retention_days if retention_days is not None else HISTORY_RETENTION_DAYS
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run: Optional[float] = None
+        self.last_result: Dict[str, int] = {}
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        if not available():
+            logger.warning("pyarrow not installed; history retention/archiving disabled")
+            return
+        if self.retention_days <= 0 or self._thread:
+            return
+        self._thread = threading.Thread(target=self._loop, name="history-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self) -> Dict[str, int]:
+        try:
+            self.last_result = archive_history(self.engine, self.retention_days)
+            self.last_error = None
+        except Exception as e:
+            logger.error(f"History archiving failed: {e}")
+            self.last_error = str(e)
+        self.last_run = time.time()
+        return self.last_result
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def status(self) -> dict:
+        boundaries = {t.name: archived_before(t.name) for t in ARCHIVED_TABLES}
+        return {
+            "enabled": bool(self._thread),
+            "retention_days": self.retention_days,
+            "archive_dir": ARCHIVE_DIR,
+            "archived_before": {name: b.isoformat() if b else None for name, b in boundaries.items()},
+            "last_run": self.last_run,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+# ------------------------
+# Reading (history interface)
+# ------------------------
+
+def _dataset(table_name: str, symbol: str, start: datetime, end: datetime):
+    files = _files(ARCHIVE_DIR, table_name, symbol, start, end)
+    return ds.dataset(files, format="parquet") if files else None
+
+
+def _ts(value: datetime):
+    return pa.scalar(value.astimezone(timezone.utc), type=pa.timestamp("us", tz="UTC"))
+
+
+def iter_days(table_name: str, symbol: str, start: datetime, end: datetime, columns: Optional[List[str]] = None):
+    """(day, table) for each archived UTC day of `symbol` in [start, end], oldest first, one file at a time."""
+    for day in _days(start, end):
+        path = os.path.join(_partition_dir(ARCHIVE_DIR, table_name, day, symbol), "part-0.parquet")
+        if not os.path.exists(path):
+            continue
+        window = (ds.field("timestamp") >= _ts(start)) & (ds.field("timestamp") <= _ts(end))
+        yield day, ds.dataset(path, format="parquet").to_table(columns=columns, filter=window)
+
+
+def find_expiry(symbol: str, start: datetime, end: datetime) -> Optional[date]:
+    """Nearest archived expiry of `symbol` live at `end` (same rule as the database lookup)."""
+    dataset = _dataset(OptionChainMetrics.__tablename__, symbol, start, end)
+    if dataset is None:
+        return None
+    expiries = dataset.to_table(
+        columns=["expiry_date"],
+        filter=(ds.field("timestamp") >= _ts(start)) & (ds.field("timestamp") <= _ts(end))
+        & (ds.field("expiry_date") >= pa.scalar(end.astimezone(IST).date(), type=pa.date32())),
+    ).column("expiry_date")
+    return pc.min(expiries).as_py() if len(expiries) else None
+
+
+def read_metric_rows(
+    symbol: str, expiry: date, start: datetime, end: datetime, metrics: Sequence[str], width: int
+) -> List[tuple]:
+    """
+    (bucket start, *metrics) rows of one expiry from the archive, bucketed in Arrow: the
+    last row of each `width`-second bucket (epoch-aligned, like time_bucket), so a long
+    archived range hands at most one row per bucket to Python.
+    """
+    dataset = _dataset(OptionChainMetrics.__tablename__, symbol, start, end)
+    if dataset is None:
+        return []
+    table = dataset.to_table(
+        columns=["timestamp", *metrics],
+        filter=(ds.field("expiry_date") == pa.scalar(expiry, type=pa.date32()))
+        & (ds.field("timestamp") >= _ts(start)) & (ds.field("timestamp") <= _ts(end)),
+    ).sort_by("timestamp")
+    if not table.num_rows:
+        return []
+    micros = pc.cast(table.column("timestamp"), pa.int64()).to_numpy()
+    buckets = micros // (width * 1_000_000)
+    last = np.flatnonzero(np.append(buckets[1:] != buckets[:-1], True))
+    table = table.take(pa.array(last))
+    starts = [datetime.fromtimestamp(int(b) * width, tz=timezone.utc) for b in buckets[last]]
+    return list(zip(starts, *(table.column(m).to_pylist() for m in metrics)))
+
+
+def read_chain_as_of(symbol: str, as_of: datetime) -> Optional[OptionChainColumns]:
+    """The last archived snapshot of `symbol` at or before `as_of`."""
+    start = as_of - timedelta(days=ARCHIVE_AS_OF_LOOKBACK_DAYS)
+    dataset = _dataset(OptionData.__tablename__, symbol, start, as_of)
+    if dataset is None:
+        return None
+    window = (ds.field("timestamp") >= _ts(start)) & (ds.field("timestamp") <= _ts(as_of))
+    timestamps = dataset.to_table(columns=["timestamp"], filter=window).column("timestamp")
+    if not len(timestamps):
+        return None
+    latest = pc.max(timestamps)
+    legs = dataset.to_table(columns=list(ARRAY_DTYPES), filter=ds.field("timestamp") == latest).sort_by("strike_price")
+
+    metrics = _dataset(OptionChainMetrics.__tablename__, symbol, latest.as_py(), latest.as_py())
+    spot = None
+    if metrics is not None:
+        spots = metrics.to_table(columns=["underlying_value"], filter=ds.field("timestamp") == latest).column(0)
+        spot = spots[0].as_py() if len(spots) else None
+
+    arrays = {}
+    for name, dtype in ARRAY_DTYPES.items():
+        column = legs.column(name)
+        if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+            column = pc.fill_null(column, 0)
+        arrays[name] = np.asarray(column.to_numpy(zero_copy_only=False)).astype(dtype)
+    return OptionChainColumns(symbol=symbol, underlying_value=spot, timestamp=latest.as_py(), **arrays)
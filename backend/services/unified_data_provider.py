@@ -65,7 +65,8 @@ class UnifiedDataProvider:
         is_index = symbol.upper() in ["NIFTY", "BANKNIFTY", "FINNIFTY"]
         seg = "IDX_I" if is_index else "NSE_FNO"
         
-        return self.dhan_provider.get_option_chain_by_instrument(scrip_id, seg)
+        # Nearest DHAN_EXPIRY_COUNT expiries, merged into one NSE-shaped payload
+        return self.dhan_provider.get_option_chain_all_expiries(scrip_id, seg)
 
     def get_option_chain(self, symbol: str) -> Dict[str, Any]:
         """
@@ -91,3 +92,13 @@ class UnifiedDataProvider:
         
         # Fallback
         return self.nse_provider.get_option_chain(symbol)
+
+    def calls_per_refresh(self) -> int:
+        """Upstream calls one get_option_chain makes under the preferred source (for the scheduler budget)."""
+        if self.preference == self.SOURCE_SCRAPER:
+            return 1
+        return self.dhan_provider.calls_per_refresh()
+
+    def close(self):
+        """Release long-lived resources (shared scraper browser)."""
+        self.nse_provider.close()
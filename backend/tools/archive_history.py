@@ -0,0 +1,41 @@
+# backend/tools/archive_history.py
+"""
+One-off run of the history retention job (normally run hourly by the ingest leader).
+
+  python tools/archive_history.py [--days 30] [--archive-dir /data/cme-archive]
+
+Moves option_data / option_chain_metrics chunks older than --days to Parquet
+under the archive directory and drops them from the database. ARCHIVE_DIR
+must point at the same directory the API reads from.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import engine  # noqa: E402
+from services import snapshot_archive  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=float, default=snapshot_archive.HISTORY_RETENTION_DAYS)
+    parser.add_argument("--archive-dir", default=snapshot_archive.ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    if not snapshot_archive.available():
+        sys.exit("pyarrow is required for the archive tier (pip install pyarrow).")
+    if args.days <= 0:
+        sys.exit("--days must be positive.")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    result = snapshot_archive.archive_history(engine, args.days, args.archive_dir)
+    for table, rows in result.items():
+        print(f"{table}: {rows} rows archived")
+
+
+if __name__ == "__main__":
+    main()
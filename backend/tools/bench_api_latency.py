@@ -0,0 +1,81 @@
+# backend/tools/bench_api_latency.py
+"""
+API latency under ingestion load, to compare with and without the process-pool offload.
+
+  # terminal 1 (run once with each setting)
+  INGEST_PROCESS_POOL=0 uvicorn main:app      # or INGEST_PROCESS_POOL=1
+  # terminal 2
+  python tools/bench_api_latency.py --base http://localhost:8000 --seconds 30
+
+Hammers a few read endpoints from several threads while repeatedly triggering
+admin refreshes of the big index chains, then prints the client-side
+percentiles and the server's /api/v1/admin/metrics (which splits latency by
+whether a chain was being parsed at the time).
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import requests
+
+READ_PATHS = ["/api/v1/option-chain/{s}", "/api/v1/open-interest/{s}", "/api/v1/max-pain/{s}"]
+INGEST_SYMBOLS = ["NIFTY", "BANKNIFTY", "FINNIFTY"]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", default="http://localhost:8000")
+    ap.add_argument("--key", default=os.getenv("ADMIN_API_KEY", "admin-key-456"))
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=30)
+    ap.add_argument("--refresh-every", type=float, default=2.0)
+    args = ap.parse_args()
+
+    headers = {"x-api-key": args.key}
+    requests.get(f"{args.base}/api/v1/admin/metrics", params={"reset": True}, headers=headers, timeout=10)
+
+    stop = time.time() + args.seconds
+    latencies = []
+    lock = threading.Lock()
+
+    def reader(i):
+        session = requests.Session()
+        n = 0
+        while time.time() < stop:
+            path = READ_PATHS[n % len(READ_PATHS)].format(s=INGEST_SYMBOLS[n % len(INGEST_SYMBOLS)])
+            start = time.perf_counter()
+            try:
+                session.get(args.base + path, headers=headers, timeout=30)
+            except requests.RequestException:
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+            n += 1
+
+    def refresher():
+        n = 0
+        while time.time() < stop:
+            sym = INGEST_SYMBOLS[n % len(INGEST_SYMBOLS)]
+            requests.post(f"{args.base}/api/v1/admin/refresh/{sym}", headers=headers, timeout=10)
+            n += 1
+            time.sleep(args.refresh_every)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.threads)]
+    threads.append(threading.Thread(target=refresher))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    ms = np.array(latencies) * 1000
+    print(f"client: {len(ms)} requests  p50 {np.percentile(ms, 50):.1f} ms  "
+          f"p95 {np.percentile(ms, 95):.1f} ms  p99 {np.percentile(ms, 99):.1f} ms  max {ms.max():.1f} ms")
+    metrics = requests.get(f"{args.base}/api/v1/admin/metrics", headers=headers, timeout=10).json()
+    print(json.dumps(metrics, indent=2))
+
+
+if __name__ == "__main__":
+    main()
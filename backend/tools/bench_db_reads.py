@@ -0,0 +1,110 @@
+# backend/tools/bench_db_reads.py
+"""
+Sync vs async read path under high concurrency.
+
+  python tools/bench_db_reads.py --symbol NIFTY --requests 5000 --concurrency 50,200,500
+
+Runs the cold-miss read the API endpoints fall back to (load_latest_chain:
+stock row + all legs) `--requests` times at each concurrency level:
+
+- sync:  a thread per in-flight request on the sync psycopg2 engine, i.e. what
+         `def` endpoints do on FastAPI's threadpool (40 threads by default).
+- async: one event loop, asyncio tasks on an asyncpg engine (same URL as
+         database.async_engine), i.e. the `async def` endpoints.
+
+Both engines use the same pool size, so the difference is the cost of threads
+blocking on the pool versus tasks awaiting it. Prints throughput and latency
+percentiles for each mode.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import database  # noqa: E402
+from services.chain_repository import load_latest_chain, load_latest_chain_async  # noqa: E402
+
+
+def _report(mode: str, concurrency: int, latencies: list, elapsed: float):
+    ms = np.array(latencies) * 1000
+    print(f"{mode:>5}  c={concurrency:<4} {len(ms) / elapsed:8.0f} req/s   "
+          f"p50 {np.percentile(ms, 50):7.1f} ms   p95 {np.percentile(ms, 95):7.1f} ms   "
+          f"p99 {np.percentile(ms, 99):7.1f} ms")
+
+
+def run_sync(symbol: str, requests: int, concurrency: int, pool_size: int, max_overflow: int):
+    engine = create_engine(database.db_url, pool_size=pool_size, max_overflow=max_overflow, pool_timeout=60)
+    Session = sessionmaker(bind=engine)
+
+    def one(_):
+        start = time.perf_counter()
+        with Session() as db:
+            load_latest_chain(db, symbol)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(min(concurrency, requests))))  # warm up connections
+        start = time.perf_counter()
+        latencies = list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+    engine.dispose()
+    _report("sync", concurrency, latencies, elapsed)
+
+
+async def run_async(symbol: str, requests: int, concurrency: int, pool_size: int, max_overflow: int):
+    engine = create_async_engine(
+        database.async_engine.url, pool_size=pool_size, max_overflow=max_overflow, pool_timeout=60,
+    )
+    Session = async_sessionmaker(engine)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            start = time.perf_counter()
+            async with Session() as db:
+                await load_latest_chain_async(db, symbol)
+            return time.perf_counter() - start
+
+    await asyncio.gather(*(one() for _ in range(min(concurrency, requests))))  # warm up
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    _report("async", concurrency, latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbol", default="NIFTY")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", default="50,200,500")
+    args = parser.parse_args()
+
+    if database.async_engine is None:
+        sys.exit("Async engine unavailable (install asyncpg, or DB_ASYNC_READS is off).")
+    with database.SessionLocal() as db:
+        if load_latest_chain(db, args.symbol) is None:
+            sys.exit(f"No stored chain for {args.symbol}; ingest it first.")
+
+    print(f"pool_size={database.DB_ASYNC_POOL_SIZE} max_overflow={database.DB_ASYNC_MAX_OVERFLOW} "
+          f"requests={args.requests}")
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        run_sync(args.symbol, args.requests, concurrency, database.DB_ASYNC_POOL_SIZE, database.DB_ASYNC_MAX_OVERFLOW)
+        asyncio.run(run_async(
+            args.symbol, args.requests, concurrency, database.DB_ASYNC_POOL_SIZE, database.DB_ASYNC_MAX_OVERFLOW,
+        ))
+
+
+if __name__ == "__main__":
+    main()
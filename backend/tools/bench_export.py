@@ -0,0 +1,72 @@
+# backend/tools/bench_export.py
+"""
+Per-symbol JSON pulls vs one bulk Arrow export, as a bulk consumer sees them.
+
+  uvicorn main:app    # with the chains loaded
+  python tools/bench_export.py --base http://localhost:8000 --rounds 5
+
+For every symbol the JSON path fetches /api/v1/option-chain/{symbol}
+and builds columns from the decoded legs; the bulk path fetches
+/api/v1/export/option-chains once and opens the Arrow stream. Prints the
+wall time of each (transfer + decode into columns) and the bytes received.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pyarrow as pa
+import requests
+
+
+def json_pull(session, base, headers, symbols):
+    received, legs = 0, 0
+    for symbol in symbols:
+        r = session.get(f"{base}/api/v1/option-chain/{symbol}", headers=headers, timeout=30)
+        if r.status_code != 200:
+            continue
+        received += len(r.content)
+        body = r.json()
+        # What a consumer does next: columns out of the list of leg dicts
+        columns = {k: np.array([leg[k] for leg in body["legs"]]) for k in ("strike", "type", "oi", "iv")}
+        legs += len(columns["strike"])
+    return received, legs
+
+
+def arrow_pull(session, base, headers, symbols):
+    r = session.get(
+        f"{base}/api/v1/export/option-chains", params={"symbols": ",".join(symbols)}, headers=headers, timeout=120
+    )
+    r.raise_for_status()
+    table = pa.ipc.open_stream(r.content).read_all()
+    return len(r.content), table.num_rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", default="http://localhost:8000")
+    ap.add_argument("--key", default=os.getenv("API_KEY", "demo-key-123"))
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--symbols", default=None, help="comma-separated; default indices + tier-1 stocks")
+    args = ap.parse_args()
+
+    headers = {"x-api-key": args.key}
+    session = requests.Session()
+    if args.symbols:
+        symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    else:
+        tracking = session.get(f"{args.base}/", timeout=10).json()["tracking"]
+        symbols = tracking["indices"] + tracking["tier_1_stocks"]
+
+    for name, pull in (("json per symbol", json_pull), ("arrow bulk", arrow_pull)):
+        times = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            received, legs = pull(session, args.base, headers, symbols)
+            times.append(time.perf_counter() - start)
+        print(f"{name:16s} {len(symbols)} symbols, {legs} legs, {received / 1e6:.2f} MB: "
+              f"median {np.median(times) * 1000:.0f} ms, best {min(times) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
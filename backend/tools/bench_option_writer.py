@@ -0,0 +1,93 @@
+# backend/tools/bench_option_writer.py
+"""
+Benchmark: legs/sec for the option_data write paths.
+
+  cd backend && python tools/bench_option_writer.py --strikes 400 --rounds 3
+
+Compares the old ORM path (OptionData objects + db.add_all) with the bulk
+writer (COPY on psycopg2, executemany otherwise) using a synthetic chain under
+a scratch symbol, which is deleted afterwards. Needs DATABASE_URL.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal  # noqa: E402
+from models import OptionData  # noqa: E402
+from services.data_parser import parse_option_chain_data, parse_option_chain_rows  # noqa: E402
+from services.bulk_writer import copy_option_rows, insert_option_rows  # noqa: E402
+
+BENCH_SYMBOL = "__BENCH__"
+
+
+def synthetic_chain(strikes: int, expiries: int) -> dict:
+    now = datetime.now()
+    spot = 20000.0
+    data = []
+    for e in range(expiries):
+        expiry = (now + timedelta(days=7 * (e + 1))).strftime("%d-%b-%Y")
+        for i in range(strikes):
+            strike = spot + (i - strikes // 2) * 50
+            leg = {"lastPrice": 100.0, "openInterest": 1000 + i, "changeinOpenInterest": 10,
+                   "totalTradedVolume": 500, "impliedVolatility": 15.0 + i % 7}
+            data.append({"strikePrice": strike, "expiryDate": expiry, "CE": dict(leg), "PE": dict(leg)})
+    return {"records": {"underlyingValue": spot, "timestamp": now.strftime("%d-%b-%Y %H:%M:%S"), "data": data}}
+
+
+def run(label, write_fn, rounds):
+    best = None
+    for _ in range(rounds):
+        db = SessionLocal()
+        try:
+            db.query(OptionData).filter(OptionData.symbol == BENCH_SYMBOL).delete(synchronize_session=False)
+            db.commit()
+            start = time.perf_counter()
+            n = write_fn(db)
+            db.commit()
+            elapsed = time.perf_counter() - start
+        finally:
+            db.query(OptionData).filter(OptionData.symbol == BENCH_SYMBOL).delete(synchronize_session=False)
+            db.commit()
+            db.close()
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<28} {n:>8} legs  {best * 1000:>9.1f} ms  {n / best:>12,.0f} legs/sec")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--strikes", type=int, default=400)
+    ap.add_argument("--expiries", type=int, default=3)
+    ap.add_argument("--rounds", type=int, default=3)
+    args = ap.parse_args()
+
+    raw = synthetic_chain(args.strikes, args.expiries)
+
+    # Parse time is included for both paths, since building ORM objects is part of the old cost
+    def orm_path(db):
+        _, options = parse_option_chain_data(BENCH_SYMBOL, raw)
+        db.add_all(options)
+        db.flush()
+        return len(options)
+
+    def executemany_path(db):
+        _, rows = parse_option_chain_rows(BENCH_SYMBOL, raw)
+        return insert_option_rows(db, rows)
+
+    def copy_path(db):
+        _, rows = parse_option_chain_rows(BENCH_SYMBOL, raw)
+        return copy_option_rows(db, rows)
+
+    run("ORM add_all (old)", orm_path, args.rounds)
+    run("executemany INSERT", executemany_path, args.rounds)
+    if SessionLocal().get_bind().dialect.driver == "psycopg2":
+        run("COPY FROM STDIN", copy_path, args.rounds)
+    else:
+        print("COPY FROM STDIN             skipped (needs a psycopg2 DATABASE_URL)")
+
+
+if __name__ == "__main__":
+    main()
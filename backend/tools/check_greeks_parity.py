@@ -0,0 +1,99 @@
+# backend/tools/check_greeks_parity.py
+"""
+Parity check: vectorized Greeks engine vs the scalar calculate_greeks.
+
+  cd backend && python tools/check_greeks_parity.py [--legs 20000]
+
+Runs both on random legs plus the edge cases (S/K/IV <= 0, T = 0, IV as
+percent and as decimal, missing IV with the 15% fallback) and exits non-zero
+if any Greek differs by more than one unit in its last rounded digit.
+Also prints the time each path takes for the same legs.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # data_parser imports models; no DB is touched
+
+from services.data_parser import calculate_greeks  # noqa: E402
+from services.greeks import calculate_greeks_vectorized, GREEK_NAMES  # noqa: E402
+
+# One unit in the last digit each Greek is rounded to
+TOLERANCE = {'delta': 1e-4, 'gamma': 1e-6, 'theta': 1e-2, 'vega': 1e-2}
+FALLBACK_IV = 15.0
+
+
+def build_legs(n, seed):
+    rng = np.random.default_rng(seed)
+    S = rng.uniform(50, 50000, n)
+    K = S * rng.uniform(0.5, 1.5, n)
+    T = rng.choice([0.0, 1 / 365, 7 / 365, 30 / 365, 90 / 365, 1.0], n)
+    IV = np.where(rng.random(n) < 0.5, rng.uniform(5, 80, n), rng.uniform(0.05, 0.8, n))
+    is_call = rng.random(n) < 0.5
+
+    # Edge cases
+    edge = [
+        (0.0, 100.0, 0.1, 15.0, True),     # S <= 0
+        (100.0, 0.0, 0.1, 15.0, False),    # K <= 0
+        (100.0, 100.0, 0.1, 0.0, True),    # missing IV -> fallback
+        (100.0, 100.0, 0.1, -3.0, False),  # negative IV -> fallback
+        (100.0, 100.0, 0.0, 15.0, True),   # expiry day
+        (100.0, 100.0, -0.5, 15.0, False), # past expiry (floored)
+        (100.0, 100.0, 0.1, 1.0, True),    # IV exactly 1 (decimal)
+        (100.0, 100.0, 0.1, 1.5, False),   # IV just above 1 (percent)
+        (19500.0, 5.0, 0.02, 90.0, True),  # deep ITM
+        (19500.0, 900000.0, 0.02, 90.0, False),
+    ]
+    S = np.concatenate([S, [e[0] for e in edge]])
+    K = np.concatenate([K, [e[1] for e in edge]])
+    T = np.concatenate([T, [e[2] for e in edge]])
+    IV = np.concatenate([IV, [e[3] for e in edge]])
+    is_call = np.concatenate([is_call, [e[4] for e in edge]])
+    return S, K, T, IV, is_call
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--legs", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+    R = 0.05
+
+    S, K, T, IV, is_call = build_legs(args.legs, args.seed)
+
+    start = time.perf_counter()
+    scalar = [
+        calculate_greeks(s, k, t, R, iv if iv > 0 else FALLBACK_IV, 'CE' if c else 'PE')
+        for s, k, t, iv, c in zip(S.tolist(), K.tolist(), T.tolist(), IV.tolist(), is_call.tolist())
+    ]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vec = calculate_greeks_vectorized(S, K, T, R, IV, is_call, fallback_iv=FALLBACK_IV)
+    vec_time = time.perf_counter() - start
+
+    failures = 0
+    for name in GREEK_NAMES:
+        expected = np.array([g[name] for g in scalar])
+        diff = np.abs(expected - vec[name])
+        bad = np.flatnonzero(diff > TOLERANCE[name] * 1.0001)
+        failures += len(bad)
+        print(f"{name:<6} max abs diff {diff.max():.3g}  mismatches {len(bad)}")
+        for i in bad[:5]:
+            print(f"   leg {i}: S={S[i]} K={K[i]} T={T[i]} IV={IV[i]} call={is_call[i]} "
+                  f"scalar={expected[i]} vectorized={vec[name][i]}")
+
+    print(f"\n{len(S)} legs: scalar {scalar_time * 1000:.1f} ms, vectorized {vec_time * 1000:.1f} ms "
+          f"({scalar_time / max(vec_time, 1e-9):.0f}x)")
+    if failures:
+        print("PARITY FAILED")
+        sys.exit(1)
+    print("Parity OK")
+
+
+if __name__ == "__main__":
+    main()
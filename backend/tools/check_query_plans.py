@@ -0,0 +1,163 @@
+# backend/tools/check_query_plans.py
+"""
+Query-plan regression check for the hot queries (needs a local Postgres).
+
+  DATABASE_URL=postgresql://... python tools/check_query_plans.py [--keep]
+
+Applies the migrations into a throwaway schema, seeds it with a realistic
+amount of synthetic data, VACUUM ANALYZEs, then runs EXPLAIN on every query the API
+and ingestion issue per request / per cycle. Exits non-zero if any of them
+plans a sequential scan on one of our tables (or hypertable chunks), so a
+dropped or unusable index shows up before it reaches production.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select, text  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+
+from migrations import upgrade  # noqa: E402
+from models import OptionChainLatest, OptionData, StockData  # noqa: E402
+from services.chain_columns import ARRAY_DTYPES, OPTION_COLUMNS  # noqa: E402
+
+SYMBOL = "SYM0042"
+
+
+def hot_queries():
+    """(name, statement, require_index_only) mirroring the code paths they come from."""
+    return [
+        (
+            "load_latest_chain: stock row",
+            select(StockData.underlying_value, StockData.timestamp).where(StockData.symbol == SYMBOL),
+            False,
+        ),
+        (
+            "load_latest_chain: legs ordered by strike",
+            select(*[getattr(OptionChainLatest, c) for c in ARRAY_DTYPES])
+            .where(OptionChainLatest.symbol == SYMBOL)
+            .order_by(OptionChainLatest.strike_price),
+            True,
+        ),
+        (
+            "ingestion._load_previous_legs",
+            select(*[getattr(OptionChainLatest, c) for c in OPTION_COLUMNS]).where(OptionChainLatest.symbol == SYMBOL),
+            False,
+        ),
+        (
+            "ingestion._history_has_snapshot",
+            select(func.max(OptionData.timestamp)).where(OptionData.symbol == SYMBOL),
+            False,
+        ),
+        (
+            "chain_history: as-of snapshot lookup",
+            select(func.max(OptionData.timestamp)).where(
+                OptionData.symbol == SYMBOL, OptionData.timestamp <= func.now() - text("interval '30 minutes'")
+            ),
+            False,
+        ),
+    ]
+
+
+def seed(conn, symbols: int, snapshots: int):
+    conn.execute(text("""
+        INSERT INTO stock_data (symbol, underlying_value, timestamp)
+        SELECT 'SYM' || lpad(s::text, 4, '0'), 1000 + s, now()
+        FROM generate_series(1, :symbols) s
+    """), {"symbols": symbols})
+    # 3 expiries x 50 strikes x CE/PE per symbol
+    conn.execute(text("""
+        INSERT INTO option_chain_latest
+            (timestamp, symbol, expiry_date, strike_price, option_type, last_price, iv, oi, volume,
+             oi_change, delta, gamma, theta, vega)
+        SELECT now(), 'SYM' || lpad(s::text, 4, '0'), current_date + 7 * e, 1000 + 10 * k, t,
+               random() * 100, random() * 40, (random() * 1e5)::int, (random() * 1e4)::int,
+               0, random(), random() / 100, -random() * 10, random() * 5
+        FROM generate_series(1, :symbols) s, generate_series(0, 2) e, generate_series(0, 49) k,
+             unnest(ARRAY['CE', 'PE']) t
+    """), {"symbols": symbols})
+    # History: `snapshots` one-minute snapshots of 60 legs per symbol
+    conn.execute(text("""
+        INSERT INTO option_data
+            (timestamp, symbol, expiry_date, strike_price, option_type, last_price, iv, oi, volume,
+             oi_change, delta, gamma, theta, vega)
+        SELECT now() - make_interval(mins => n), 'SYM' || lpad(s::text, 4, '0'), current_date + 7,
+               1000 + 10 * k, t, random() * 100, random() * 40, (random() * 1e5)::int, 0,
+               0, 0, 0, 0, 0
+        FROM generate_series(1, :symbols) s, generate_series(1, :snapshots) n,
+             generate_series(0, 29) k, unnest(ARRAY['CE', 'PE']) t
+    """), {"symbols": symbols, "snapshots": snapshots})
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--snapshots", type=int, default=60)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema for inspection")
+    args = parser.parse_args()
+
+    url = (args.url or "").replace("postgresql+asyncpg://", "postgresql+psycopg2://")
+    if not url.startswith("postgresql"):
+        sys.exit("A Postgres DATABASE_URL (or --url) is required.")
+
+    schema = f"plan_check_{os.getpid()}"
+    admin = create_engine(url)
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    # Everything below resolves unqualified names in the scratch schema first
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema},public"})
+
+    failures = 0
+    try:
+        upgrade(engine)
+        with engine.begin() as conn:
+            seed(conn, args.symbols, args.snapshots)
+        # VACUUM sets the visibility map, which index-only scans depend on (can't run in a transaction)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for table in ("stock_data", "option_chain_latest", "option_data"):
+                conn.execute(text(f"VACUUM ANALYZE {table}"))
+
+        with engine.connect() as conn:
+            for name, stmt, require_index_only in hot_queries():
+                sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+                plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                nodes = list(plan_nodes(plan[0]["Plan"]))
+                seq = [n.get("Relation Name") for n in nodes if n["Node Type"] == "Seq Scan"]
+                index_only = any(n["Node Type"] == "Index Only Scan" for n in nodes)
+                ok = not seq and (index_only or not require_index_only)
+                failures += not ok
+                summary = " > ".join(
+                    n["Node Type"] + (f" [{n['Index Name']}]" if "Index Name" in n else "") for n in nodes
+                )
+                print(f"{'OK  ' if ok else 'FAIL'} {name}\n     {summary}")
+                if seq:
+                    print(f"     sequential scan on: {', '.join(r or '?' for r in seq)}")
+                elif not ok:
+                    print("     expected an index-only scan (covering index not used)")
+    finally:
+        engine.dispose()
+        if not args.keep:
+            with admin.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
+
+    if failures:
+        sys.exit(f"{failures} hot quer{'y' if failures == 1 else 'ies'} regressed")
+    print("All hot queries use indexes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,36 @@
 // frontend/src/components/widgets/MaxPainWidget.tsx
-import React from 'react';
+import React, { useState } from 'react';
 import useSWR from 'swr';
 import { useAppStore } from '../../store/useAppStore';
 import axios from 'axios';
+import {
+  ResponsiveContainer,
+  AreaChart,
+  Area,
+  XAxis,
+  YAxis,
+  Tooltip,
+  ReferenceLine,
+} from 'recharts';
 
 // Define the shape of the API response
+interface PainPoint {
+  strike: number;
+  pain: number;
+}
+
+interface ExpiryMaxPain {
+  expiry: string;
+  max_pain_strike: number;
+  curve: PainPoint[];
+}
+
 interface MaxPainData {
   symbol: string;
   max_pain_strike: number;
   current_price: number;
+  expiry: string | null;
+  expiries: ExpiryMaxPain[];
 }
 
 // func define
@@ -32,6 +54,8 @@ const getThemeClasses = (theme: 'light' | 'dark') => {
 export const MaxPainWidget: React.FC = () => {
   const { currentSymbol, theme } = useAppStore();
   const classes = getThemeClasses(theme);
+  const isDark = theme === 'dark';
+  const [selectedExpiry, setSelectedExpiry] = useState<string | null>(null);
 
   // Fetch data from our new Max Pain endpoint
   const { data, error } = useSWR(
@@ -64,16 +88,34 @@ export const MaxPainWidget: React.FC = () => {
     );
   }
 
+  // Curve for the chosen expiry (nearest by default); all expiries come in the same response
+  const expiries = data.expiries ?? [];
+  const active = expiries.find(e => e.expiry === selectedExpiry) ?? expiries[0];
+  const maxPainStrike = active ? active.max_pain_strike : data.max_pain_strike;
+
   // Calculate the distance
-  const distance = data.current_price - data.max_pain_strike;
+  const distance = data.current_price - maxPainStrike;
   
   return (
     <div className={cardClasses}>
-      <h3 className={`text-lg font-semibold ${classes.textPrimary}`}>Max Pain</h3>
+      <div className="flex items-center justify-between">
+        <h3 className={`text-lg font-semibold ${classes.textPrimary}`}>Max Pain</h3>
+        {expiries.length > 1 && (
+          <select
+            value={active?.expiry}
+            onChange={e => setSelectedExpiry(e.target.value)}
+            className={`text-xs rounded border ${classes.border} ${classes.bg} ${classes.textSecondary} px-2 py-1`}
+          >
+            {expiries.map(e => (
+              <option key={e.expiry} value={e.expiry}>{e.expiry}</option>
+            ))}
+          </select>
+        )}
+      </div>
       <div className="mt-3">
         <p className={`text-xs ${classes.textSecondary} uppercase`}>Strike Price</p>
         <p className={`text-4xl font-bold ${classes.textPrimary} text-purple-400`}>
-          {data.max_pain_strike.toLocaleString('en-IN')}
+          {maxPainStrike.toLocaleString('en-IN')}
         </p>
         <p className={`text-sm ${classes.textSecondary} mt-2`}>
           Price is currently 
@@ -83,6 +125,34 @@ export const MaxPainWidget: React.FC = () => {
           {distance > 0 ? ' above' : ' below'} the max pain level.
         </p>
       </div>
+
+      {active && active.curve.length > 1 && (
+        <div className="h-32 mt-4">
+          <ResponsiveContainer width="100%" height="100%">
+            <AreaChart data={active.curve} margin={{ top: 5, right: 5, left: 0, bottom: 0 }}>
+              <XAxis
+                dataKey="strike"
+                type="number"
+                domain={['dataMin', 'dataMax']}
+                tick={{ fontSize: 10 }}
+                stroke={isDark ? '#9ca3af' : '#6b7280'}
+              />
+              <YAxis hide />
+              <Tooltip
+                formatter={(value) => [Number(value).toLocaleString('en-IN'), 'Writer payout']}
+                labelFormatter={(label) => `Expiry at ${label}`}
+                contentStyle={{
+                  backgroundColor: isDark ? '#1f2937' : '#ffffff',
+                  borderColor: isDark ? '#374151' : '#e5e7eb',
+                }}
+              />
+              <Area type="monotone" dataKey="pain" stroke="#a78bfa" fill="#a78bfa" fillOpacity={0.25} />
+              <ReferenceLine x={maxPainStrike} stroke="#a78bfa" strokeDasharray="3 3" />
+              <ReferenceLine x={data.current_price} stroke={distance > 0 ? '#22c55e' : '#ef4444'} />
+            </AreaChart>
+          </ResponsiveContainer>
+        </div>
+      )}
     </div>
   );
 };